@@ -0,0 +1,236 @@
+"""Descarga de recibos de ANSES por lotes, sin interfaz gráfica
+
+Uso:
+    python anses_cli.py lote.csv --salida descargas --captcha mi_modulo:resolver
+
+El CSV (separado por coma o punto y coma) tiene las columnas ``beneficio``,
+``mes_inicial``, ``anio_inicial``, ``mes_final`` y ``anio_final``; las
+columnas ``usuario`` y ``clave`` son opcionales y, si faltan, se usan
+``--usuario``/``--clave`` o las variables ANSES_USUARIO y ANSES_CLAVE.
+Cada beneficio se descarga en ``<salida>/<beneficio>/`` y al final se escribe
+``<salida>/resumen_lote.csv`` con el resultado de cada fila. Con
+``--navegadores N`` se mantienen N navegadores abiertos en paralelo; las filas
+de un mismo usuario comparten el login.
+"""
+import argparse
+import csv
+import logging
+import os
+import re
+import sys
+import threading
+
+from anses_engine import ANSESEngine, load_captcha_hook
+from batch_scheduler import BatchJob, BatchObserver, BatchScheduler
+from receipt_cache import ReceiptCache
+from log_sink import DIRECTORIO_LOGS, configurar_log_json
+
+COLUMNAS = ("beneficio", "mes_inicial", "anio_inicial", "mes_final", "anio_final")
+COLUMNAS_RESUMEN = ("beneficio", "completado", "archivos_procesados", "total_meses", "pdf", "excel", "error")
+
+
+def leer_lote(ruta_csv):
+    """Lee las filas del lote y valida las columnas obligatorias"""
+    with open(ruta_csv, newline="", encoding="utf-8-sig") as archivo:
+        muestra = archivo.read(4096)
+        archivo.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=",;")
+        except csv.Error:
+            dialecto = csv.excel
+        filas = list(csv.DictReader(archivo, dialect=dialecto))
+
+    if filas:
+        faltantes = [c for c in COLUMNAS if c not in filas[0]]
+        if faltantes:
+            raise ValueError(f"Faltan columnas en {ruta_csv}: {', '.join(faltantes)}")
+    return filas
+
+
+def carpeta_beneficio(salida, beneficio):
+    return os.path.join(salida, re.sub(r"[^0-9A-Za-z_-]", "_", beneficio))
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="Descarga recibos de ANSES para un lote de beneficios")
+    parser.add_argument("lote", help="CSV con beneficios y rangos de períodos")
+    parser.add_argument("--salida", default="descargas_lote", help="Carpeta donde se crea una subcarpeta por beneficio")
+    parser.add_argument("--usuario", default=os.environ.get("ANSES_USUARIO"), help="Usuario por defecto (ANSES_USUARIO)")
+    parser.add_argument("--clave", default=os.environ.get("ANSES_CLAVE"), help="Clave por defecto (ANSES_CLAVE)")
+    parser.add_argument("--captcha", help="Hook que resuelve el CAPTCHA, como modulo:funcion(driver, esperas)")
+    parser.add_argument("--navegadores", type=int, default=1, help="Navegadores abiertos en paralelo")
+    parser.add_argument("--con-ventana", action="store_true", help="Mostrar Chrome en lugar de usarlo headless")
+    parser.add_argument("--modo-http", action="store_true", help="Consultar los recibos por HTTP tras el login")
+    parser.add_argument("--workers", type=int, default=4, help="Workers HTTP en paralelo (con --modo-http)")
+    parser.add_argument("--sin-cache", action="store_true", help="No usar la caché local de recibos")
+    parser.add_argument("--log", default="INFO", help="Nivel de log (DEBUG, INFO, WARNING, ERROR)")
+    parser.add_argument("--log-json", default=DIRECTORIO_LOGS, help="Carpeta del registro JSON rotativo")
+    parser.add_argument("--sin-log-json", action="store_true", help="No escribir el registro JSON")
+    return parser
+
+
+def verificar_licencia():
+    from license_manager import LicenseManager
+
+    valida, mensaje = LicenseManager().check_license()
+    if not valida:
+        logging.error("Licencia inválida: %s", mensaje)
+    return valida
+
+
+def crear_fabrica_motores(args):
+    """Devuelve una función que crea motores configurados según los argumentos"""
+    captcha_hook = load_captcha_hook(args.captcha) if args.captcha else None
+    if captcha_hook is None and not args.con_ventana:
+        logging.warning("Sin --captcha el login headless solo avanza si el sitio no pide resolver el CAPTCHA")
+
+    def crear_motor():
+        motor = ANSESEngine()
+        motor.headless = not args.con_ventana
+        motor.modo_http = args.modo_http
+        motor.workers_http = args.workers
+        motor.cache_recibos = not args.sin_cache
+        motor.captcha_hook = captcha_hook
+        return motor
+
+    return crear_motor
+
+
+class _ObservadorLote(BatchObserver):
+    """Informa por logging el avance de cada beneficio"""
+
+    def __init__(self, total):
+        self.total = total
+        self.terminados = 0
+        self._lock = threading.Lock()
+
+    def job_started(self, trabajo, navegador):
+        logging.info("Beneficio %s en el navegador %d", trabajo.beneficio, navegador)
+
+    def job_progress(self, trabajo, procesados, total):
+        logging.info("Beneficio %s: mes %d/%d", trabajo.beneficio, procesados, total)
+
+    def job_finished(self, trabajo, resultado):
+        with self._lock:
+            self.terminados += 1
+            terminados = self.terminados
+        if resultado['completado']:
+            logging.info("[%d/%d] Beneficio %s completo", terminados, self.total, trabajo.beneficio)
+        else:
+            logging.error("[%d/%d] Beneficio %s sin completar: %s",
+                          terminados, self.total, trabajo.beneficio, resultado['error'] or "interrumpido")
+
+
+def validar_periodos(mes_inicial, anio_inicial, mes_final, anio_final):
+    """Devuelve el motivo por el que el rango de períodos es inválido, o None"""
+    for mes in (mes_inicial, mes_final):
+        if not 1 <= mes <= 12:
+            return f"Mes fuera de rango: {mes}"
+    for anio in (anio_inicial, anio_final):
+        if not 1990 <= anio <= 2100:
+            return f"Año fuera de rango: {anio}"
+    if (anio_inicial, mes_inicial) > (anio_final, mes_final):
+        return "El período inicial es posterior al final"
+    return None
+
+
+def armar_trabajos(filas, args):
+    """Convierte las filas del CSV en trabajos; las filas inválidas se informan y se omiten
+
+    Returns:
+        Lista alineada con las filas, con un BatchJob o un resultado con el error.
+    """
+    trabajos = []
+    # La fila 1 del CSV es el encabezado
+    for numero, fila in enumerate(filas, start=2):
+        # DictReader completa con None los campos que faltan en filas cortas
+        beneficio = (fila.get("beneficio") or "").strip()
+        usuario = (fila.get("usuario") or args.usuario or "").strip()
+        clave = fila.get("clave") or args.clave or ""
+        error = None
+        if not beneficio:
+            error = "Fila sin beneficio"
+        elif not usuario or not clave:
+            error = "Faltan usuario o clave"
+        else:
+            try:
+                periodos = [int((fila.get(columna) or "").strip()) for columna in COLUMNAS[1:]]
+            except ValueError as e:
+                error = f"Período inválido: {e}"
+            else:
+                error = validar_periodos(*periodos)
+                if error is None:
+                    trabajos.append(BatchJob(
+                        usuario, clave, beneficio, *periodos,
+                        carpeta_beneficio(args.salida, beneficio)
+                    ))
+                    continue
+        logging.error("Fila %d omitida (beneficio %r): %s", numero, beneficio, error)
+        resultado = ANSESEngine.nuevo_resultado(beneficio, None)
+        resultado['error'] = error
+        trabajos.append(resultado)
+    return trabajos
+
+
+def ejecutar_lote(crear_motor, filas, args):
+    """Descarga todas las filas del lote y devuelve la lista de resultados en orden"""
+    trabajos = armar_trabajos(filas, args)
+    validos = [t for t in trabajos if isinstance(t, BatchJob)]
+
+    cache = None
+    if not args.sin_cache:
+        cache = ReceiptCache()
+    planificador = BatchScheduler(
+        crear_motor, navegadores=args.navegadores, observador=_ObservadorLote(len(validos)), cache=cache
+    )
+    try:
+        resultados = iter(planificador.run(validos))
+    finally:
+        if cache is not None:
+            cache.close()
+    return [next(resultados) if isinstance(t, BatchJob) else t for t in trabajos]
+
+
+def escribir_resumen(salida, resultados):
+    ruta = os.path.join(salida, "resumen_lote.csv")
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+        escritor = csv.DictWriter(archivo, fieldnames=COLUMNAS_RESUMEN, extrasaction="ignore")
+        escritor.writeheader()
+        escritor.writerows(resultados)
+    return ruta
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    nivel = getattr(logging, args.log.upper(), logging.INFO)
+    logging.basicConfig(level=nivel, format="%(asctime)s %(levelname)s %(message)s")
+    # El registro JSON recibe también los tiempos por paso (DEBUG) sin mostrarlos por pantalla
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(nivel)
+    if not args.sin_log_json:
+        try:
+            logging.info("Registro JSON en %s", configurar_log_json(args.log_json))
+        except OSError as e:
+            logging.warning("No se pudo abrir el registro JSON: %s", e)
+
+    try:
+        filas = leer_lote(args.lote)
+        crear_motor = crear_fabrica_motores(args)
+    except (OSError, ValueError, ImportError, AttributeError) as e:
+        logging.error("%s", e)
+        return 2
+
+    if not verificar_licencia():
+        return 2
+
+    os.makedirs(args.salida, exist_ok=True)
+    resultados = ejecutar_lote(crear_motor, filas, args)
+    ruta_resumen = escribir_resumen(args.salida, resultados)
+
+    completos = sum(1 for r in resultados if r['completado'])
+    logging.info("Lote terminado: %d de %d beneficios completos. Resumen: %s", completos, len(resultados), ruta_resumen)
+    return 0 if completos == len(resultados) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1410 @@
+import glob
+import importlib
+import os
+from datetime import datetime
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait, Select
+from selenium.webdriver.support import expected_conditions as EC
+from openpyxl.utils import get_column_letter
+from openpyxl.cell import WriteOnlyCell
+
+from excel_builder import ExcelWorkbookBuilder
+from page_waits import PageWaits
+from download_watcher import DownloadWatcher
+from http_fetcher import ReceiptHttpFetcher
+from parallel_fetch import ParallelPeriodFetcher
+from run_manifest import RunManifest
+from receipt_cache import ReceiptCache
+from pdf_merge import ChunkedPdfMerger
+from log_sink import LogHub
+from step_timings import StepTimings
+from receipt_table import TABLA_CONCEPTOS_ID, SELECTOR_FILAS, SCRIPT_FILAS_CONCEPTOS, procesar_filas_conceptos
+
+URL_LOGIN = "https://servicioscorp.anses.gob.ar/clavelogon/logon.aspx?system=miansesv2"
+
+
+class EngineObserver:
+    """Notificaciones de avance del motor; la interfaz gráfica redefine lo que necesita"""
+
+    def update_stats(self, status=None, progress=None, files=None):
+        pass
+
+    def update_progress(self, procesados, total):
+        pass
+
+    def pdf_ready(self, ruta_pdf):
+        pass
+
+    def excel_ready(self, ruta_excel):
+        pass
+
+    def run_finished(self, resultado):
+        pass
+
+    def run_failed(self, error):
+        pass
+
+
+def load_captcha_hook(referencia):
+    """Importa un hook de CAPTCHA indicado como ``modulo:funcion``"""
+    modulo, _, funcion = referencia.partition(":")
+    if not modulo or not funcion:
+        raise ValueError(f"Hook de CAPTCHA inválido: {referencia!r} (se espera modulo:funcion)")
+    return getattr(importlib.import_module(modulo), funcion)
+
+
+class ANSESEngine:
+    """Motor de descarga de recibos de ANSES, sin dependencias de la interfaz gráfica
+
+    Contiene el login, la navegación al formulario, el bucle de períodos y la
+    generación del PDF unificado y del Excel de análisis. Los mensajes van a
+    ``console``, un LogHub que los registra en el logger ``anses`` con el
+    beneficio y el período en curso y los reenvía a sus suscriptores
+    (cualquier objeto con ``log(mensaje, tipo)``); el avance va a
+    ``observador`` (ver EngineObserver).
+
+    El CAPTCHA del login se resuelve con ``captcha_hook(driver, esperas)``,
+    llamado con las credenciales ya ingresadas; sin hook se espera a que el
+    usuario lo resuelva en el navegador durante ``timeout_captcha`` segundos.
+    """
+
+    def __init__(self, console=None, observador=None):
+        self.console = LogHub()
+        if console is not None:
+            self.console.subscribe(console)
+        self.observador = observador or EngineObserver()
+        
+        # Variables
+        self.driver = None
+        self.is_running = False
+        self.pdf_final_path = ""
+        
+        # NUEVA VARIABLE: Almacenar TODOS los datos de períodos
+        self.todos_los_datos = []  # Lista de diccionarios con datos de cada período
+        
+        # Libro Excel en memoria durante la descarga (se guarda una vez al final)
+        self.excel_builder = None
+        self.excel_checkpoint_cada = 12  # Guardar a disco cada N períodos (0 = solo al final)
+        self.excel_resumen_streaming = True  # Emitir "Resumen Neto Detallado" en modo write-only
+        self.extraccion_masiva = True  # Leer la grilla de conceptos con un solo execute_script
+        self.timeout_espera = 15  # Cota máxima (s) de cada espera de página
+        self.timeout_descarga = 20  # Cota máxima (s) para que un PDF descargado quede completo
+        self.navegacion_directa = True  # Consultar el mes siguiente sin driver.back() si el formulario sigue activo
+        self.modo_http = False  # Tras el login, consultar recibos por HTTP con las cookies del navegador
+        self.timeout_http = 30  # Cota máxima (s) de cada POST en modo HTTP
+        self.workers_http = 4  # Períodos consultados en paralelo en modo HTTP (1 = secuencial)
+        self.intervalo_http = 0.5  # Segundos mínimos entre consultas de un mismo worker
+        self.pdf_recibos_por_bloque = 12  # Recibos por bloque del PDF unificado escrito a disco
+        self.reanudar_descargas = True  # Retomar los períodos ya completos de una ejecución interrumpida
+        self.cache_recibos = True  # Reutilizar recibos de ejecuciones anteriores (caché local)
+        self.cache_max_mb = 500  # Tamaño máximo de la caché de recibos
+        self.cache_max_dias = 730  # Antigüedad máxima de un recibo en caché
+        self.cache_meses_recientes = 2  # Meses más nuevos que siempre se consultan a ANSES
+        self.cache_compartida = None  # ReceiptCache común a varios motores (la cierra quien la creó)
+        self.headless = False  # Chrome sin ventana (servidores sin display)
+        self.captcha_hook = None  # Callable(driver, esperas) que resuelve el CAPTCHA del login
+        self.timeout_captcha = 30  # Cota máxima (s) para que el CAPTCHA quede resuelto
+
+    def extraer_datos_tabla(self, mes, anio):
+        """Extrae los datos de la tabla de conceptos del HTML actual"""
+        try:
+            # Buscar la tabla de conceptos
+            tabla = WebDriverWait(self.driver, 10).until(
+                EC.presence_of_element_located((By.ID, TABLA_CONCEPTOS_ID))
+            )
+            
+            periodo = f"{mes:02d}/{anio}"
+            filas = self._leer_filas_tabla(tabla)
+            conceptos_haberes, conceptos_deducciones = procesar_filas_conceptos(filas)
+            
+            self.console.log(f"Extraídos {len(conceptos_haberes)} haberes y {len(conceptos_deducciones)} deducciones del período {periodo}", "info")
+            
+            return {
+                'periodo': periodo,
+                'haberes': conceptos_haberes,
+                'deducciones': conceptos_deducciones
+            }
+            
+        except Exception as e:
+            self.console.log(f"Error extrayendo datos de tabla: {e}", "error")
+            return None
+
+    def _leer_filas_tabla(self, tabla):
+        """Devuelve el texto de las celdas de cada fila de datos de la grilla
+        
+        En modo masivo toda la grilla se lee con un único execute_script; si el
+        script falla se recurre a la lectura celda por celda.
+        """
+        if self.extraccion_masiva:
+            try:
+                filas = self.driver.execute_script(SCRIPT_FILAS_CONCEPTOS, tabla, SELECTOR_FILAS)
+                if filas is not None:
+                    return filas
+            except Exception as e:
+                self.console.log(f"Lectura masiva no disponible, se lee celda por celda: {e}", "warning")
+        
+        filas = tabla.find_elements(By.CSS_SELECTOR, SELECTOR_FILAS)
+        return [[celda.text for celda in fila.find_elements(By.TAG_NAME, "td")] for fila in filas]
+
+    def actualizar_excel(self, datos_periodo, ruta_excel):
+        """Actualiza el archivo Excel con los datos del período - VERSIÓN MEJORADA"""
+        with self.console.paso("actualizar_excel"):
+            try:
+                # NUEVO: Almacenar datos para procesamiento posterior
+                self.todos_los_datos.append(datos_periodo)
+                
+                periodo = datos_periodo['periodo']
+                haberes = datos_periodo['haberes']
+                deducciones = datos_periodo['deducciones']
+                
+                self.console.log(f"Actualizando Excel para período {periodo}...", "process")
+                
+                # El libro se mantiene en memoria durante toda la descarga
+                builder = self._obtener_excel_builder(ruta_excel)
+                
+                # Estilos compartidos del libro
+                styler = builder.styler
+                
+                # Crear/actualizar hoja de haberes
+                if haberes:
+                    ws_haberes = builder.get_sheet('Haberes')
+                    self._actualizar_hoja_excel_corregida(ws_haberes, haberes, periodo, "HABERES", styler, builder.sheet_index('Haberes'))
+                    self.console.log(f"✅ {len(haberes)} conceptos de haberes agregados", "success")
+                
+                # Crear/actualizar hoja de deducciones
+                if deducciones:
+                    ws_deducciones = builder.get_sheet('Deducciones')
+                    self._actualizar_hoja_excel_corregida(ws_deducciones, deducciones, periodo, "DEDUCCIONES", styler, builder.sheet_index('Deducciones'))
+                    self.console.log(f"✅ {len(deducciones)} conceptos de deducciones agregados", "success")
+                
+                # Checkpoint periódico a disco (opcional)
+                if builder.register_period():
+                    self.console.log(f"💾 Checkpoint de Excel guardado en período {periodo}", "info")
+                self.console.log(f"📊 Excel actualizado exitosamente para período {periodo}", "success")
+                
+            except Exception as e:
+                self.console.log(f"❌ Error actualizando Excel: {e}", "error")
+
+    def _obtener_excel_builder(self, ruta_excel):
+        """Devuelve el libro en memoria para la ruta indicada, creándolo si hace falta"""
+        if self.excel_builder is None or self.excel_builder.ruta_excel != ruta_excel:
+            if self.excel_builder is not None:
+                self.excel_builder.close()
+            self.excel_builder = ExcelWorkbookBuilder(ruta_excel, self.excel_checkpoint_cada)
+        return self.excel_builder
+
+    def guardar_excel(self):
+        """Escribe a disco el libro en memoria si tiene cambios pendientes"""
+        if self.excel_builder is None:
+            return
+        try:
+            self.excel_builder.close()
+        except Exception as e:
+            self.console.log(f"❌ Error guardando Excel: {e}", "error")
+
+    def crear_resumen_neto_completo(self, ruta_excel):
+        """Crea la hoja de resumen neto con TODOS los datos recolectados"""
+        try:
+            self.console.log("🔄 Creando resumen neto completo...", "process")
+            
+            builder = self._obtener_excel_builder(ruta_excel)
+            styler = builder.styler
+            
+            # Recolectar TODOS los conceptos únicos de todos los períodos
+            todos_haberes = set()
+            todas_deducciones = set()
+            
+            for datos in self.todos_los_datos:
+                todos_haberes.update(datos['haberes'].keys())
+                todas_deducciones.update(datos['deducciones'].keys())
+            
+            # Ordenar conceptos
+            haberes_ordenados = sorted(list(todos_haberes))
+            deducciones_ordenadas = sorted(list(todas_deducciones))
+            
+            self.console.log(f"📊 Conceptos únicos encontrados: {len(haberes_ordenados)} haberes, {len(deducciones_ordenadas)} deducciones", "info")
+            
+            # Modo streaming: la hoja se emite fila por fila al guardar el libro
+            if self.excel_resumen_streaming:
+                builder.add_streamed_sheet(
+                    'Resumen Neto Detallado',
+                    lambda ws: self._escribir_resumen_neto_streaming(ws, styler, haberes_ordenados, deducciones_ordenadas)
+                )
+                self.console.log("✅ Resumen neto detallado preparado (escritura en streaming)", "success")
+                self.console.log(f"📊 Procesados {len(self.todos_los_datos)} períodos con {len(haberes_ordenados) + len(deducciones_ordenadas)} conceptos únicos", "info")
+                return
+            
+            # Crear o limpiar hoja
+            hoja_existente = builder.has_sheet('Resumen Neto Detallado')
+            ws_neto = builder.get_sheet('Resumen Neto Detallado')
+            if hoja_existente:
+                ws_neto.delete_rows(1, ws_neto.max_row)
+            
+            # CREAR ESTRUCTURA COMPLETA
+            columna_actual = 1
+            
+            # 1. Título principal
+            title_cell = ws_neto.cell(row=1, column=1, value="💰 RESUMEN NETO DETALLADO - ANÁLISIS COMPLETO")
+            title_cell.font = styler.font(size=18, bold=True, color='FF1E40AF')
+            title_cell.alignment = styler.alignment('left')
+            
+            # 2. Subtitle con fecha
+            subtitle = f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')} | Conceptos: H:{len(haberes_ordenados)} D:{len(deducciones_ordenadas)}"
+            subtitle_cell = ws_neto.cell(row=2, column=1, value=subtitle)
+            subtitle_cell.font = styler.font(size=11, italic=True, color='FF6B7280')
+            
+            # 3. HEADERS
+            # Columna PERÍODO
+            period_header = ws_neto.cell(row=3, column=columna_actual, value="PERÍODO")
+            self._apply_header_style_especial(period_header, styler, 'primary')
+            ws_neto.column_dimensions[get_column_letter(columna_actual)].width = 12
+            columna_actual += 1
+            
+            # SECCIÓN HABERES
+            inicio_haberes = columna_actual
+            if haberes_ordenados:
+                # Header de sección
+                seccion_haberes = ws_neto.cell(row=2, column=columna_actual, value="🟢 HABERES")
+                seccion_haberes.font = styler.font(size=14, bold=True, color='FF10B981')
+                
+                # Headers individuales
+                for concepto in haberes_ordenados:
+                    header_cell = ws_neto.cell(row=3, column=columna_actual, value=concepto)
+                    self._apply_header_style_especial(header_cell, styler, 'haberes_bg')
+                    ws_neto.column_dimensions[get_column_letter(columna_actual)].width = min(max(len(concepto) + 2, 15), 25)
+                    columna_actual += 1
+            
+            # TOTAL HABERES
+            total_haberes_col = columna_actual
+            total_haberes_header = ws_neto.cell(row=3, column=columna_actual, value="TOTAL HABERES")
+            self._apply_header_style_especial(total_haberes_header, styler, 'totales_bg')
+            ws_neto.column_dimensions[get_column_letter(columna_actual)].width = 15
+            columna_actual += 1
+            
+            # SECCIÓN DEDUCCIONES
+            inicio_deducciones = columna_actual
+            if deducciones_ordenadas:
+                # Header de sección
+                seccion_deducciones = ws_neto.cell(row=2, column=columna_actual, value="🔴 DEDUCCIONES")
+                seccion_deducciones.font = styler.font(size=14, bold=True, color='FFEF4444')
+                
+                # Headers individuales
+                for concepto in deducciones_ordenadas:
+                    header_cell = ws_neto.cell(row=3, column=columna_actual, value=concepto)
+                    self._apply_header_style_especial(header_cell, styler, 'deducciones_bg')
+                    ws_neto.column_dimensions[get_column_letter(columna_actual)].width = min(max(len(concepto) + 2, 15), 25)
+                    columna_actual += 1
+            
+            # TOTAL DEDUCCIONES
+            total_deducciones_col = columna_actual
+            total_deducciones_header = ws_neto.cell(row=3, column=columna_actual, value="TOTAL DEDUCCIONES")
+            self._apply_header_style_especial(total_deducciones_header, styler, 'totales_bg')
+            ws_neto.column_dimensions[get_column_letter(columna_actual)].width = 18
+            columna_actual += 1
+            
+            # NETO FINAL
+            neto_col = columna_actual
+            neto_header = ws_neto.cell(row=3, column=columna_actual, value="NETO (H-D)")
+            self._apply_header_style_especial(neto_header, styler, 'primary')
+            ws_neto.column_dimensions[get_column_letter(columna_actual)].width = 15
+            
+            # LLENAR DATOS
+            fila_actual = 4
+            for datos in self.todos_los_datos:
+                periodo = datos['periodo']
+                haberes = datos['haberes']
+                deducciones = datos['deducciones']
+                
+                # Columna período
+                period_cell = ws_neto.cell(row=fila_actual, column=1, value=periodo)
+                self._apply_period_style(period_cell, styler)
+                
+                # Haberes individuales
+                col_haber = inicio_haberes
+                for concepto in haberes_ordenados:
+                    valor = haberes.get(concepto, 0)
+                    cell = ws_neto.cell(row=fila_actual, column=col_haber, value=valor if valor > 0 else None)
+                    if valor > 0:
+                        self._apply_data_style_especial(cell, valor, styler, 'haber')
+                    col_haber += 1
+                
+                # Total haberes (fórmula)
+                if haberes_ordenados:
+                    inicio_col = get_column_letter(inicio_haberes)
+                    fin_col = get_column_letter(inicio_haberes + len(haberes_ordenados) - 1)
+                    formula = f"=SUM({inicio_col}{fila_actual}:{fin_col}{fila_actual})"
+                else:
+                    formula = 0
+                
+                total_haberes_cell = ws_neto.cell(row=fila_actual, column=total_haberes_col, value=formula)
+                self._apply_data_style_especial(total_haberes_cell, None, styler, 'total_haber')
+                
+                # Deducciones individuales
+                col_deduccion = inicio_deducciones
+                for concepto in deducciones_ordenadas:
+                    valor = deducciones.get(concepto, 0)
+                    cell = ws_neto.cell(row=fila_actual, column=col_deduccion, value=valor if valor > 0 else None)
+                    if valor > 0:
+                        self._apply_data_style_especial(cell, valor, styler, 'deduccion')
+                    col_deduccion += 1
+                
+                # Total deducciones (fórmula)
+                if deducciones_ordenadas:
+                    inicio_col = get_column_letter(inicio_deducciones)
+                    fin_col = get_column_letter(inicio_deducciones + len(deducciones_ordenadas) - 1)
+                    formula = f"=SUM({inicio_col}{fila_actual}:{fin_col}{fila_actual})"
+                else:
+                    formula = 0
+                
+                total_deducciones_cell = ws_neto.cell(row=fila_actual, column=total_deducciones_col, value=formula)
+                self._apply_data_style_especial(total_deducciones_cell, None, styler, 'total_deduccion')
+                
+                # Neto final (fórmula)
+                col_total_haberes = get_column_letter(total_haberes_col)
+                col_total_deducciones = get_column_letter(total_deducciones_col)
+                neto_formula = f"={col_total_haberes}{fila_actual}-{col_total_deducciones}{fila_actual}"
+                
+                neto_cell = ws_neto.cell(row=fila_actual, column=neto_col, value=neto_formula)
+                self._apply_data_style_especial(neto_cell, None, styler, 'neto')
+                
+                # Aplicar formato de fila alternativa
+                self._apply_alternate_row_formatting(ws_neto, fila_actual, styler)
+                
+                fila_actual += 1
+            
+            # Configuraciones finales
+            ws_neto.freeze_panes = 'B4'
+            if ws_neto.max_row > 3:
+                end_col = get_column_letter(ws_neto.max_column)
+                ws_neto.auto_filter.ref = f"A3:{end_col}{ws_neto.max_row}"
+            
+            # Ajustar dimensiones
+            ws_neto.row_dimensions[1].height = 25
+            ws_neto.row_dimensions[2].height = 20
+            ws_neto.row_dimensions[3].height = 25
+            
+            self.console.log("✅ Resumen neto detallado creado exitosamente", "success")
+            self.console.log(f"📊 Procesados {len(self.todos_los_datos)} períodos con {len(haberes_ordenados) + len(deducciones_ordenadas)} conceptos únicos", "info")
+            
+        except Exception as e:
+            self.console.log(f"❌ Error creando resumen neto completo: {e}", "error")
+
+    def _escribir_resumen_neto_streaming(self, ws_neto, styler, haberes_ordenados, deducciones_ordenadas):
+        """Escribe el resumen neto en una hoja write-only, fila por fila y en orden"""
+        # Layout de columnas precalculado (mismo orden que la versión en memoria)
+        inicio_haberes = 2
+        total_haberes_col = inicio_haberes + len(haberes_ordenados)
+        inicio_deducciones = total_haberes_col + 1
+        total_deducciones_col = inicio_deducciones + len(deducciones_ordenadas)
+        neto_col = total_deducciones_col + 1
+        
+        # Dimensiones, paneles y filtros deben definirse antes de emitir filas
+        ws_neto.column_dimensions['A'].width = 12
+        for offset, concepto in enumerate(haberes_ordenados):
+            ws_neto.column_dimensions[get_column_letter(inicio_haberes + offset)].width = min(max(len(concepto) + 2, 15), 25)
+        ws_neto.column_dimensions[get_column_letter(total_haberes_col)].width = 15
+        for offset, concepto in enumerate(deducciones_ordenadas):
+            ws_neto.column_dimensions[get_column_letter(inicio_deducciones + offset)].width = min(max(len(concepto) + 2, 15), 25)
+        ws_neto.column_dimensions[get_column_letter(total_deducciones_col)].width = 18
+        ws_neto.column_dimensions[get_column_letter(neto_col)].width = 15
+        
+        ws_neto.row_dimensions[1].height = 25
+        ws_neto.row_dimensions[2].height = 20
+        ws_neto.row_dimensions[3].height = 25
+        
+        ws_neto.freeze_panes = 'B4'
+        ultima_fila = 3 + len(self.todos_los_datos)
+        if ultima_fila > 3:
+            ws_neto.auto_filter.ref = f"A3:{get_column_letter(neto_col)}{ultima_fila}"
+        
+        def nueva_celda(valor=None):
+            return WriteOnlyCell(ws_neto, value=valor)
+        
+        # 1. Título principal
+        title_cell = nueva_celda("💰 RESUMEN NETO DETALLADO - ANÁLISIS COMPLETO")
+        title_cell.font = styler.font(size=18, bold=True, color='FF1E40AF')
+        title_cell.alignment = styler.alignment('left')
+        ws_neto.append([title_cell])
+        
+        # 2. Subtitle con fecha y headers de sección
+        fila = [None] * neto_col
+        subtitle = f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')} | Conceptos: H:{len(haberes_ordenados)} D:{len(deducciones_ordenadas)}"
+        fila[0] = nueva_celda(subtitle)
+        fila[0].font = styler.font(size=11, italic=True, color='FF6B7280')
+        if haberes_ordenados:
+            fila[inicio_haberes - 1] = nueva_celda("🟢 HABERES")
+            fila[inicio_haberes - 1].font = styler.font(size=14, bold=True, color='FF10B981')
+        if deducciones_ordenadas:
+            fila[inicio_deducciones - 1] = nueva_celda("🔴 DEDUCCIONES")
+            fila[inicio_deducciones - 1].font = styler.font(size=14, bold=True, color='FFEF4444')
+        ws_neto.append(fila)
+        
+        # 3. HEADERS
+        headers = [("PERÍODO", 'primary')]
+        headers += [(concepto, 'haberes_bg') for concepto in haberes_ordenados]
+        headers.append(("TOTAL HABERES", 'totales_bg'))
+        headers += [(concepto, 'deducciones_bg') for concepto in deducciones_ordenadas]
+        headers.append(("TOTAL DEDUCCIONES", 'totales_bg'))
+        headers.append(("NETO (H-D)", 'primary'))
+        fila = []
+        for texto, tipo_color in headers:
+            header_cell = nueva_celda(texto)
+            self._apply_header_style_especial(header_cell, styler, tipo_color)
+            fila.append(header_cell)
+        ws_neto.append(fila)
+        
+        # Letras de columna reutilizadas en todas las fórmulas
+        col_total_haberes = get_column_letter(total_haberes_col)
+        col_total_deducciones = get_column_letter(total_deducciones_col)
+        rango_haberes = (get_column_letter(inicio_haberes), get_column_letter(total_haberes_col - 1))
+        rango_deducciones = (get_column_letter(inicio_deducciones), get_column_letter(total_deducciones_col - 1))
+        alt_fill = styler.fill(styler.colors['alt_row'])
+        
+        # LLENAR DATOS
+        def celda_estilizada(valor, tipo, alterna):
+            """Celda de datos con estilo resuelto una sola vez por combinación (tipo, fila alterna)"""
+            cell = nueva_celda(valor)
+            
+            def aplicar(c):
+                if tipo == 'periodo':
+                    self._apply_period_style(c, styler)
+                elif tipo is not None:
+                    self._apply_data_style_especial(c, valor, styler, tipo)
+                # Formato de fila alternativa (la columna de período ya tiene relleno propio)
+                if alterna and tipo != 'periodo':
+                    c.fill = alt_fill
+            
+            styler.apply_cached(cell, ('resumen', tipo, alterna), aplicar)
+            return cell
+        
+        for fila_actual, datos in enumerate(self.todos_los_datos, start=4):
+            haberes = datos['haberes']
+            deducciones = datos['deducciones']
+            alterna = (fila_actual - 4) % 2 == 1
+            fila = [None] * neto_col
+            
+            fila[0] = celda_estilizada(datos['periodo'], 'periodo', alterna)
+            
+            for offset, concepto in enumerate(haberes_ordenados):
+                valor = haberes.get(concepto, 0)
+                if valor > 0:
+                    fila[inicio_haberes - 1 + offset] = celda_estilizada(valor, 'haber', alterna)
+            
+            if haberes_ordenados:
+                formula = f"=SUM({rango_haberes[0]}{fila_actual}:{rango_haberes[1]}{fila_actual})"
+            else:
+                formula = 0
+            fila[total_haberes_col - 1] = celda_estilizada(formula, 'total_haber', alterna)
+            
+            for offset, concepto in enumerate(deducciones_ordenadas):
+                valor = deducciones.get(concepto, 0)
+                if valor > 0:
+                    fila[inicio_deducciones - 1 + offset] = celda_estilizada(valor, 'deduccion', alterna)
+            
+            if deducciones_ordenadas:
+                formula = f"=SUM({rango_deducciones[0]}{fila_actual}:{rango_deducciones[1]}{fila_actual})"
+            else:
+                formula = 0
+            fila[total_deducciones_col - 1] = celda_estilizada(formula, 'total_deduccion', alterna)
+            
+            neto_formula = f"={col_total_haberes}{fila_actual}-{col_total_deducciones}{fila_actual}"
+            fila[neto_col - 1] = celda_estilizada(neto_formula, 'neto', alterna)
+            
+            # Las celdas vacías de filas alternas también llevan el relleno
+            if alterna:
+                for idx in range(1, neto_col):
+                    if fila[idx] is None:
+                        fila[idx] = celda_estilizada(None, None, True)
+            
+            ws_neto.append(fila)
+
+    def _actualizar_hoja_excel_corregida(self, worksheet, conceptos_dict, periodo, tipo_hoja, styler, indice):
+        """Actualiza una hoja específica del Excel - VERSIÓN CORREGIDA SIN MÚLTIPLES TOTALES
+        
+        ``indice`` es el SheetIndex persistente de la hoja: evita releer la fila 3
+        y la columna A en cada período, así que solo se tocan las celdas nuevas.
+        """
+        try:
+            # Configurar título de la hoja
+            worksheet.title = tipo_hoja.title()
+            
+            # Verificar si necesita estructura inicial
+            if indice.ultima_fila <= 1:
+                self._crear_estructura_hoja_simple(worksheet, tipo_hoja, styler)
+                indice.reset()
+                self.console.log(f"📋 Estructura inicial creada para hoja {tipo_hoja}", "info")
+            
+            # Agregar nuevos conceptos como columnas
+            conceptos_agregados = 0
+            
+            for concepto in conceptos_dict.keys():
+                if concepto not in indice.conceptos:
+                    nueva_columna = indice.add_concept(concepto)
+                    
+                    # Crear header del concepto
+                    cell = worksheet.cell(row=3, column=nueva_columna, value=concepto)
+                    self._apply_header_style(cell, styler)
+                    
+                    # Ajustar ancho de columna
+                    column_letter = get_column_letter(nueva_columna)
+                    worksheet.column_dimensions[column_letter].width = max(15, min(len(concepto) + 2, 30))
+                    
+                    conceptos_agregados += 1
+            
+            if conceptos_agregados > 0:
+                self.console.log(f"➕ {conceptos_agregados} nuevos conceptos agregados", "info")
+            
+            # Determinar fila del período
+            periodo_str = str(periodo)
+            if periodo_str in indice.periodos:
+                fila_periodo = indice.periodos[periodo_str]
+                self.console.log(f"📅 Actualizando período existente {periodo} en fila {fila_periodo}", "info")
+            else:
+                fila_periodo = indice.add_period(periodo_str)
+                # Crear celda de período
+                period_cell = worksheet.cell(row=fila_periodo, column=1, value=periodo)
+                self._apply_period_style(period_cell, styler)
+                self._apply_alternate_row_formatting(worksheet, fila_periodo, styler, indice.max_column)
+                self.console.log(f"📅 Nuevo período {periodo} agregado en fila {fila_periodo}", "info")
+            
+            # Agregar valores de conceptos
+            valores_agregados = 0
+            for concepto, valor in conceptos_dict.items():
+                if concepto in indice.conceptos:
+                    columna_concepto = indice.conceptos[concepto]
+                    cell = worksheet.cell(row=fila_periodo, column=columna_concepto, value=valor)
+                    self._apply_data_style(cell, valor, styler)
+                    valores_agregados += 1
+            
+            self.console.log(f"💰 {valores_agregados} valores agregados para período {periodo}", "info")
+            
+            # Aplicar configuraciones finales solo una vez
+            if worksheet.freeze_panes is None:
+                worksheet.freeze_panes = 'B4'
+            
+            # Aplicar filtros automáticos
+            if indice.ultima_fila > 3:
+                end_col = get_column_letter(indice.max_column)
+                worksheet.auto_filter.ref = f"A3:{end_col}{indice.ultima_fila}"
+            
+        except Exception as e:
+            self.console.log(f"❌ Error actualizando hoja {tipo_hoja}: {e}", "error")
+
+    def crear_columnas_total_finales(self, ruta_excel):
+        """Crea las columnas TOTAL al final, después de procesar todos los períodos"""
+        try:
+            self.console.log("🔄 Creando columnas TOTAL finales...", "process")
+            
+            builder = self._obtener_excel_builder(ruta_excel)
+            styler = builder.styler
+            
+            # Procesar hojas de Haberes y Deducciones
+            for sheet_name in ['Haberes', 'Deducciones']:
+                if builder.has_sheet(sheet_name):
+                    ws = builder.get_sheet(sheet_name)
+                    indice = builder.sheet_index(sheet_name)
+                    
+                    # Verificar si ya existe columna TOTAL
+                    if indice.total_column is None:
+                        # Crear columna TOTAL al final
+                        total_col = indice.max_column + 1
+                        self._crear_columna_total(ws, total_col, styler)
+                        indice.total_column = total_col
+                        
+                        # Actualizar fórmulas para todas las filas de datos con período
+                        for row in indice.periodos.values():
+                            self._actualizar_formula_total(ws, row, total_col, styler)
+                        
+                        self.console.log(f"✅ Columna TOTAL creada para {sheet_name}", "success")
+            
+            self.console.log("✅ Columnas TOTAL finales creadas exitosamente", "success")
+            
+        except Exception as e:
+            self.console.log(f"❌ Error creando columnas TOTAL: {e}", "error")
+
+    # ===============================
+    # FUNCIONES AUXILIARES CORREGIDAS
+    # ===============================
+    def _crear_estructura_hoja_simple(self, worksheet, tipo_hoja, styler):
+        """Crea la estructura inicial de una hoja - VERSIÓN SIMPLE"""
+        try:
+            # Limpiar hoja completamente
+            worksheet.delete_rows(1, worksheet.max_row)
+            
+            # Título principal (fila 1)
+            title_cell = worksheet.cell(row=1, column=1, value=f"📊 {tipo_hoja}")
+            title_cell.font = styler.font(size=18, bold=True, color='FF1E40AF')
+            title_cell.alignment = styler.alignment('left')
+            
+            # Subtitle con fecha (fila 2)
+            subtitle = f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+            subtitle_cell = worksheet.cell(row=2, column=1, value=subtitle)
+            subtitle_cell.font = styler.font(size=11, italic=True, color='FF6B7280')
+            
+            # Header de período (fila 3, columna 1)
+            period_header = worksheet.cell(row=3, column=1, value="PERÍODO")
+            period_header.font = styler.font(size=12, bold=True, color='FFFFFFFF')
+            period_header.fill = styler.fill(styler.colors['primary'])
+            period_header.alignment = styler.alignment('center')
+            period_header.border = styler.border(
+                left=('thick', 'FF000000'),
+                right=('thin', 'FF000000'),
+                top=('thick', 'FF000000'),
+                bottom=('thick', 'FF000000')
+            )
+            
+            # Ajustar dimensiones
+            worksheet.column_dimensions['A'].width = 12
+            worksheet.row_dimensions[1].height = 25
+            worksheet.row_dimensions[2].height = 18
+            worksheet.row_dimensions[3].height = 20
+            
+        except Exception as e:
+            self.console.log(f"❌ Error creando estructura: {e}", "error")
+
+    def _crear_columna_total(self, worksheet, columna_total, styler):
+        """Crea la columna TOTAL en la posición especificada"""
+        try:
+            # Header TOTAL
+            total_header = worksheet.cell(row=3, column=columna_total, value="TOTAL")
+            total_header.font = styler.font(size=12, bold=True, color='FFFFFFFF')
+            total_header.fill = styler.fill(styler.colors['secondary'])
+            total_header.alignment = styler.alignment('center')
+            total_header.border = styler.border(
+                left=('thin', 'FF000000'),
+                right=('thick', 'FF000000'),
+                top=('thick', 'FF000000'),
+                bottom=('thick', 'FF000000')
+            )
+            
+            # Ajustar ancho
+            worksheet.column_dimensions[get_column_letter(columna_total)].width = 12
+            
+        except Exception as e:
+            self.console.log(f"❌ Error creando columna TOTAL: {e}", "error")
+
+    def _actualizar_formula_total(self, worksheet, fila, columna_total, styler):
+        """Actualiza la fórmula de total para una fila específica"""
+        try:
+            total_cell = worksheet.cell(row=fila, column=columna_total)
+            
+            # Solo actualizar si la celda está vacía o tiene una fórmula antigua
+            if not total_cell.value or str(total_cell.value).startswith('='):
+                start_col = get_column_letter(2)
+                end_col = get_column_letter(columna_total - 1)
+                total_cell.value = f"=SUM({start_col}{fila}:{end_col}{fila})"
+                total_cell.number_format = '$#,##0.00'
+                total_cell.font = styler.font(size=11, bold=True, color='FF1E40AF')
+                total_cell.alignment = styler.alignment('right')
+                total_cell.border = styler.border(
+                    left=('thin', 'FFE5E7EB'),
+                    right=('thick', 'FF1E40AF'),
+                    top=('thin', 'FFE5E7EB'),
+                    bottom=('thin', 'FFE5E7EB')
+                )
+            
+        except Exception as e:
+            self.console.log(f"❌ Error actualizando fórmula TOTAL: {e}", "error")
+
+    def _apply_header_style_especial(self, cell, styler, tipo_color):
+        """Aplica estilo de header especial según el tipo"""
+        try:
+            color_map = {
+                'primary': styler.colors['primary'],
+                'haberes_bg': styler.colors['haberes_bg'],
+                'deducciones_bg': styler.colors['deducciones_bg'],
+                'totales_bg': styler.colors['totales_bg']
+            }
+            
+            cell.font = styler.font(size=11, bold=True, color='FFFFFFFF')
+            cell.fill = styler.fill(color_map.get(tipo_color, styler.colors['primary']))
+            cell.border = styler.border(
+                left=('thin', 'FF000000'),
+                right=('thin', 'FF000000'),
+                top=('thin', 'FF000000'),
+                bottom=('thick', 'FF000000')
+            )
+            cell.alignment = styler.alignment('center', wrap_text=True)
+        except Exception as e:
+            pass
+
+    def _apply_data_style_especial(self, cell, valor, styler, tipo):
+        """Aplica estilo de datos especial según el tipo"""
+        try:
+            cell.alignment = styler.alignment('right')
+            cell.number_format = '$#,##0.00'
+            
+            # Colores según tipo
+            color_map = {
+                'haber': 'FF10B981',           # Verde para haberes
+                'deduccion': 'FFEF4444',       # Rojo para deducciones
+                'total_haber': 'FF059669',     # Verde oscuro para total haberes
+                'total_deduccion': 'FFDC2626', # Rojo oscuro para total deducciones
+                'neto': 'FF1E40AF'             # Azul para neto
+            }
+            
+            color = color_map.get(tipo, 'FF374151')
+            es_total = tipo.startswith('total') or tipo == 'neto'
+            cell.font = styler.font(size=11, color=color, bold=es_total)
+            
+            # Borde especial para totales
+            cell.border = styler.border(
+                left=('thin', 'FFE5E7EB'),
+                right=('thick', color) if es_total else ('thin', 'FFE5E7EB'),
+                top=('thin', 'FFE5E7EB'),
+                bottom=('thin', 'FFE5E7EB')
+            )
+                
+        except Exception as e:
+            pass
+
+    def _apply_header_style(self, cell, styler):
+        """Aplica estilo de header a una celda"""
+        try:
+            header_style = styler.create_header_style()
+            cell.font = header_style.font
+            cell.fill = header_style.fill
+            cell.border = header_style.border
+            cell.alignment = header_style.alignment
+        except Exception as e:
+            pass  # Ignorar errores de estilo
+
+    def _apply_period_style(self, cell, styler):
+        """Aplica estilo de período a una celda"""
+        try:
+            period_style = styler.create_period_style()
+            cell.font = period_style.font
+            cell.fill = period_style.fill
+            cell.border = period_style.border
+            cell.alignment = period_style.alignment
+        except Exception as e:
+            pass
+
+    def _apply_data_style(self, cell, valor, styler):
+        """Aplica estilo de datos a una celda"""
+        try:
+            data_style = styler.create_data_style()
+            cell.border = data_style.border
+            cell.alignment = data_style.alignment
+            cell.number_format = data_style.number_format
+            
+            # Formato condicional para valores
+            if valor > 0:
+                cell.font = styler.font(size=11, color='FF059669')  # Verde
+            elif valor < 0:
+                cell.font = styler.font(size=11, color='FFEF4444')  # Rojo
+            else:
+                cell.font = styler.font(size=11, color='FF6B7280')  # Gris
+        except Exception as e:
+            pass
+
+    def _apply_alternate_row_formatting(self, worksheet, fila, styler, max_column=None):
+        """Aplica formato de fila alternativa"""
+        try:
+            if (fila - 4) % 2 == 1:  # Filas impares
+                alt_fill = styler.fill(styler.colors['alt_row'])
+                if max_column is None:
+                    max_column = worksheet.max_column
+                for col in range(1, max_column + 1):
+                    cell = worksheet.cell(row=fila, column=col)
+                    if cell.fill.start_color.index in ['00000000', '00FFFFFF']:  # Sin color o blanco
+                        cell.fill = alt_fill
+        except Exception as e:
+            pass
+
+    def limpiar_pdfs_individuales(self, carpeta):
+        """Elimina todos los PDFs excepto el unificado"""
+        try:
+            lista_pdfs = glob.glob(os.path.join(carpeta, "*.pdf"))
+            eliminados = 0
+            for pdf in lista_pdfs:
+                if not pdf.endswith("todos_los_recibos.pdf"):
+                    os.remove(pdf)
+                    eliminados += 1
+            if eliminados > 0:
+                self.console.log(f"Limpieza completada: {eliminados} archivos temporales eliminados", "success")
+        except Exception as e:
+            self.console.log(f"Error en limpieza de archivos: {e}", "warning")
+
+    def limpiar_carpeta_completa(self, carpeta):
+        """Elimina todos los archivos de la carpeta al iniciar nueva descarga
+        
+        Los subdirectorios se conservan: ahí queda el checkpoint (.progreso)
+        que permite retomar una descarga interrumpida.
+        """
+        try:
+            if os.path.exists(carpeta):
+                archivos_eliminados = 0
+                # Eliminar todos los archivos en la carpeta
+                for archivo in os.listdir(carpeta):
+                    ruta_archivo = os.path.join(carpeta, archivo)
+                    if os.path.isfile(ruta_archivo):
+                        os.remove(ruta_archivo)
+                        archivos_eliminados += 1
+                
+                if archivos_eliminados > 0:
+                    self.console.log(f"🗑️ Carpeta limpiada: {archivos_eliminados} archivos eliminados", "success")
+                else:
+                    self.console.log("📁 Carpeta ya estaba vacía", "info")
+            else:
+                self.console.log("📁 Carpeta no existe, se creará automáticamente", "info")
+        except Exception as e:
+            self.console.log(f"❌ Error limpiando carpeta: {e}", "error")
+
+
+    def run(self, usuario, clave, beneficio, mes_inicial, anio_inicial, mes_final, anio_final,
+            carpeta_descargas, limpiar_carpeta=True):
+        """Ejecuta la descarga completa de un beneficio: navegador, login, períodos y reportes
+        
+        Returns:
+            Diccionario con el resultado (ver nuevo_resultado).
+        """
+        resultado = self.nuevo_resultado(beneficio, carpeta_descargas)
+        self.is_running = True
+        try:
+            self.observador.update_stats(status="🟡 Configurando...")
+            
+            # Crear carpeta si no existe
+            if not os.path.exists(carpeta_descargas):
+                os.makedirs(carpeta_descargas)
+                self.console.log(f"Carpeta creada: {carpeta_descargas}", "success")
+            elif limpiar_carpeta:
+                self.limpiar_carpeta_completa(carpeta_descargas)
+            
+            esperas = self.iniciar_navegador(carpeta_descargas)
+            self.observador.update_stats(status="🟡 Conectando...")
+            
+            if not self.login(esperas, usuario, clave):
+                resultado['error'] = "CAPTCHA no resuelto"
+                return resultado
+            if not self.abrir_formulario_recibos(esperas):
+                resultado['error'] = "No se pudo acceder al formulario de recibos"
+                return resultado
+            
+            self.descargar_rango(
+                esperas, beneficio, mes_inicial, anio_inicial, mes_final, anio_final,
+                carpeta_descargas, resultado
+            )
+        
+        except Exception as e:
+            self.console.log(f"Error crítico del sistema: {e}", "error")
+            resultado['error'] = str(e)
+            self.observador.run_failed(e)
+        
+        finally:
+            self.is_running = False
+            self.cerrar_navegador()
+        
+        return resultado
+    
+    def stop(self):
+        """Pide al bucle de períodos que termine y cierra el navegador"""
+        self.is_running = False
+        self.cerrar_navegador()
+    
+    @staticmethod
+    def nuevo_resultado(beneficio, carpeta_descargas):
+        return {
+            'beneficio': beneficio,
+            'carpeta': carpeta_descargas,
+            'completado': False,
+            'archivos_procesados': 0,
+            'total_meses': 0,
+            'pdf': None,
+            'excel': None,
+            'error': None
+        }
+    
+    def iniciar_navegador(self, carpeta_descargas):
+        """Abre Chrome con las descargas dirigidas a la carpeta indicada
+        
+        Returns:
+            PageWaits asociado al navegador.
+        """
+        opciones = Options()
+        if self.headless:
+            opciones.add_argument("--headless=new")
+            opciones.add_argument("--window-size=1920,1080")
+        else:
+            opciones.add_argument("--start-maximized")
+        prefs = {
+            # Chrome no resuelve rutas relativas al directorio del proceso
+            "download.default_directory": os.path.abspath(carpeta_descargas),
+            "download.prompt_for_download": False,
+            "plugins.always_open_pdf_externally": True
+        }
+        opciones.add_experimental_option("prefs", prefs)
+        
+        self.driver = webdriver.Chrome(options=opciones)
+        self.console.log("Navegador Chrome iniciado correctamente", "success")
+        return PageWaits(self.driver, self.timeout_espera)
+    
+    def cambiar_carpeta_descargas(self, carpeta_descargas):
+        """Redirige las descargas del navegador ya abierto a otra carpeta"""
+        parametros = {"behavior": "allow", "downloadPath": os.path.abspath(carpeta_descargas)}
+        try:
+            self.driver.execute_cdp_cmd("Browser.setDownloadBehavior", parametros)
+        except Exception:
+            # Versiones de Chrome sin el dominio Browser: se aplica a la pestaña actual
+            self.driver.execute_cdp_cmd("Page.setDownloadBehavior", parametros)
+    
+    def cerrar_sesion(self):
+        """Borra las cookies de todos los dominios para poder ingresar con otro usuario"""
+        self.driver.switch_to.default_content()
+        try:
+            self.driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        except Exception:
+            self.driver.delete_all_cookies()
+    
+    def cerrar_navegador(self):
+        if self.driver:
+            try:
+                self.driver.quit()
+                self.console.log("Navegador cerrado correctamente", "info")
+            except Exception:
+                pass
+            self.driver = None
+    
+    def login(self, esperas, usuario, clave):
+        """Ingresa las credenciales, resuelve el CAPTCHA y entra al sistema
+        
+        Returns:
+            True si el login se completó.
+        """
+        self.driver.get(URL_LOGIN)
+        esperas.presence((By.ID, "Usuario"))
+        
+        self.driver.find_element(By.ID, "Usuario").send_keys(usuario)
+        self.driver.find_element(By.ID, "Clave").send_keys(clave)
+        
+        self.console.log("Credenciales ingresadas. Esperando resolución de CAPTCHA...", "process")
+        self.observador.update_stats(status="🟡 CAPTCHA...")
+        
+        try:
+            if self.captcha_hook is not None:
+                with self.console.paso("captcha"):
+                    self.captcha_hook(self.driver, esperas)
+            WebDriverWait(self.driver, self.timeout_captcha).until(
+                EC.element_to_be_clickable((By.ID, "Ingresar"))
+            )
+            boton = self.driver.find_element(By.ID, "Ingresar")
+            self.console.log("Intentando acceder al sistema...", "process")
+            with self.console.paso("login"):
+                boton.click()
+                # Esperar a que la página de login sea reemplazada
+                esperas.stale(boton)
+                esperas.document_ready()
+        except Exception as e:
+            self.console.log(f"Tiempo agotado. CAPTCHA no resuelto: {e}", "error")
+            return False
+        
+        self.observador.update_stats(status="🟢 Conectado")
+        return True
+    
+    def abrir_formulario_recibos(self, esperas):
+        """Navega desde la página de inicio hasta el iframe del formulario de recibos
+        
+        Returns:
+            True si el formulario quedó disponible.
+        """
+        # Cerrar notificación
+        try:
+            self.console.log("Cerrando notificaciones emergentes...", "process")
+            boton_cerrar = esperas.clickable(
+                (By.XPATH, "//button[@class='btn-close' and @aria-label='Cerrar']"), timeout=10
+            )
+            boton_cerrar.click()
+        except Exception as e:
+            self.console.log("No se encontraron notificaciones para cerrar", "info")
+        
+        # Navegar a jubilaciones
+        try:
+            self.console.log("Navegando a 'Jubilaciones y pensiones'...", "process")
+            # El click espera a que el elemento sea clickeable (cubre el cierre del modal)
+            esperas.clickable((By.XPATH, "//span[text()='Jubilaciones y pensiones']")).click()
+        except Exception as e:
+            self.console.log(f"Error navegando a jubilaciones: {e}", "error")
+            return False
+        
+        # Consultar recibos
+        try:
+            self.console.log("Accediendo a 'Consultar recibos de haberes'...", "process")
+            esperas.clickable((By.XPATH, "//a[contains(@data-href, '10603')]")).click()
+        except Exception as e:
+            self.console.log(f"Error accediendo a recibos: {e}", "error")
+            return False
+        
+        # Cambiar al iframe
+        try:
+            self.console.log("Configurando interfaz de recibos...", "process")
+            esperas.frame_containing((By.ID, "ctl00_PlaceContent_ddl_Beneficios"))
+            self.console.log("Interfaz configurada correctamente", "success")
+        except Exception as e:
+            self.console.log(f"Error configurando interfaz: {e}", "error")
+            return False
+        return True
+    
+    def descargar_rango(self, esperas, beneficio, mes_inicial, anio_inicial, mes_final, anio_final,
+                        carpeta_descargas, resultado=None):
+        """Descarga los períodos de un beneficio con el formulario de recibos ya abierto
+        
+        Genera el PDF unificado y el Excel de análisis en la carpeta de descargas.
+        
+        Returns:
+            Diccionario con el resultado (ver nuevo_resultado).
+        """
+        if resultado is None:
+            resultado = self.nuevo_resultado(beneficio, carpeta_descargas)
+        
+        # Datos y libro propios de este beneficio
+        self.todos_los_datos = []
+        self.excel_builder = None
+        self.console.contexto(beneficio=beneficio)
+        self.console.tiempos = StepTimings()
+        
+        fetcher = None
+        pool = None
+        watcher = None
+        pdf_merger = None
+        cache = None
+        try:
+            # Traspaso opcional de la sesión autenticada a un cliente HTTP
+            if self.modo_http:
+                try:
+                    fetcher = ReceiptHttpFetcher.from_driver(self.driver, timeout=self.timeout_http)
+                    self.console.log("Sesión transferida a HTTP: los recibos se consultarán sin el navegador", "success")
+                except Exception as e:
+                    self.console.log(f"No se pudo transferir la sesión a HTTP, se usa el navegador: {e}", "warning")
+            
+            # Calcular total de meses
+            total_meses = self.calcular_total_meses(mes_inicial, anio_inicial, mes_final, anio_final)
+            mes_actual = 0
+            archivos_procesados = 0
+            
+            # Checkpoint de una ejecución anterior interrumpida
+            manifiesto = RunManifest(carpeta_descargas)
+            if not self.reanudar_descargas:
+                manifiesto.clear()
+            periodos = [(mes_inicial, anio_inicial)]
+            for _ in range(total_meses - 1):
+                periodos.append(self.siguiente_periodo(*periodos[-1]))
+            en_rango = set(periodos)
+            completados = {
+                periodo: entrada for periodo, entrada in manifiesto.load(beneficio).items()
+                if periodo in en_rango
+            }
+            if completados:
+                self.console.log(f"♻️ Se retoman {len(completados)} de {total_meses} períodos ya descargados", "info")
+            
+            # Recibos de ejecuciones anteriores (los meses recientes siempre van a la red)
+            cacheados = {}
+            if self.cache_recibos:
+                try:
+                    cache = self.cache_compartida or ReceiptCache(
+                        max_bytes=self.cache_max_mb * 1024 * 1024,
+                        max_dias=self.cache_max_dias,
+                        meses_recientes=self.cache_meses_recientes
+                    )
+                    for periodo in periodos:
+                        if periodo not in completados:
+                            encontrado = cache.get(beneficio, *periodo)
+                            if encontrado is not None:
+                                cacheados[periodo] = encontrado
+                    if cacheados:
+                        self.console.log(f"⚡ {len(cacheados)} períodos se toman de la caché local", "info")
+                except Exception as e:
+                    self.console.log(f"Caché de recibos no disponible: {e}", "warning")
+                    cache = None
+            
+            # Con varios workers HTTP los períodos se adelantan en paralelo y se consumen en orden
+            if fetcher is not None and self.workers_http > 1:
+                pool = ParallelPeriodFetcher(
+                    fetcher, beneficio, [p for p in periodos if p not in completados and p not in cacheados],
+                    carpeta_descargas,
+                    workers=self.workers_http, intervalo_minimo=self.intervalo_http
+                )
+                self.console.log(f"Descarga HTTP en paralelo con {self.workers_http} workers", "info")
+            
+            self.console.log(f"Iniciando descarga de {total_meses} recibos...", "success")
+            self.observador.update_stats(status="🟢 Descargando", files=0)
+            
+            # Inicializar merger por bloques, vigilancia de descargas y ruta del Excel
+            self.pdf_final_path = os.path.join(carpeta_descargas, "todos_los_recibos.pdf")
+            pdf_merger = ChunkedPdfMerger(self.pdf_final_path, recibos_por_bloque=self.pdf_recibos_por_bloque)
+            watcher = DownloadWatcher(carpeta_descargas)
+            ruta_excel = os.path.join(carpeta_descargas, "analisis_recibos.xlsx")
+            
+            # Bucle de descarga
+            mes = mes_inicial
+            anio = anio_inicial
+            
+            while (anio < anio_final) or (anio == anio_final and mes <= mes_final):
+                if not self.is_running:
+                    break
+                
+                mes_actual += 1
+                self.console.contexto(periodo=f"{mes:02d}/{anio}")
+                progreso = mes_actual / total_meses
+                self.observador.update_progress(mes_actual, total_meses)
+                self.observador.update_stats(progress=progreso)
+                
+                self.console.log(f"Procesando recibo {mes:02d}/{anio} ({mes_actual}/{total_meses})", "process")
+                
+                # Período completo en el checkpoint: se reconstruye sin volver a consultarlo
+                entrada = completados.get((mes, anio))
+                if entrada is not None:
+                    datos_tabla = manifiesto.datos_periodo(entrada)
+                    if datos_tabla:
+                        self.actualizar_excel(datos_tabla, ruta_excel)
+                    with self.console.paso("merge"):
+                        pdf_merger.append(entrada["pdf"])
+                    archivos_procesados += 1
+                    self.observador.update_stats(files=archivos_procesados)
+                    self.console.log(f"Recibo {mes:02d}/{anio} recuperado del checkpoint", "success")
+                    mes, anio = self.siguiente_periodo(mes, anio)
+                    continue
+                
+                # Período en la caché local: no hace falta ir a ANSES
+                datos_tabla, ruta_cache = cacheados.pop((mes, anio), (None, None))
+                if ruta_cache is not None and os.path.exists(ruta_cache):
+                    self.actualizar_excel(datos_tabla, ruta_excel)
+                    with self.console.paso("merge"):
+                        pdf_merger.append(ruta_cache)
+                    archivos_procesados += 1
+                    self.observador.update_stats(files=archivos_procesados)
+                    self.console.log(f"Recibo {mes:02d}/{anio} tomado de la caché local", "success")
+                    mes, anio = self.siguiente_periodo(mes, anio)
+                    continue
+                if ruta_cache is not None:
+                    self.console.log(f"El PDF de {mes:02d}/{anio} ya no está en la caché local, se vuelve a descargar", "warning")
+                
+                # Modo HTTP: consulta y PDF en dos POST, con el navegador como respaldo
+                if fetcher is not None:
+                    try:
+                        with self.console.paso("consulta_http"):
+                            # Los períodos que estaban en caché no se encolaron en el pool
+                            if pool is not None and ruta_cache is None:
+                                datos_tabla, ruta_pdf = pool.next_result(mes, anio)
+                            else:
+                                datos_tabla, ruta_pdf = fetcher.fetch_period(beneficio, mes, anio, carpeta_descargas)
+                    except Exception as e:
+                        self.console.log(f"Modo HTTP falló en {mes:02d}/{anio}, se continúa con el navegador: {e}", "warning")
+                        if pool is not None:
+                            pool.close()
+                            pool = None
+                        fetcher.close()
+                        fetcher = None
+                    else:
+                        self.console.log(f"Extraídos {len(datos_tabla['haberes'])} haberes y {len(datos_tabla['deducciones'])} deducciones del período {datos_tabla['periodo']}", "info")
+                        self.actualizar_excel(datos_tabla, ruta_excel)
+                        self._guardar_en_cache(cache, beneficio, mes, anio, datos_tabla, ruta_pdf)
+                        ruta_pdf = manifiesto.record_period(beneficio, mes, anio, datos_tabla, ruta_pdf)
+                        with self.console.paso("merge"):
+                            pdf_merger.append(ruta_pdf)
+                        archivos_procesados += 1
+                        self.observador.update_stats(files=archivos_procesados)
+                        self.console.log(f"Recibo {mes:02d}/{anio} descargado por HTTP", "success")
+                        mes, anio = self.siguiente_periodo(mes, anio)
+                        continue
+                
+                # Seleccionar beneficio
+                try:
+                    with self.console.paso("seleccion_beneficio"):
+                        select_benef = Select(esperas.presence((By.ID, "ctl00_PlaceContent_ddl_Beneficios")))
+                        # Si el formulario conserva la selección no hace falta volver a elegirlo
+                        if select_benef.first_selected_option.get_attribute("value") != beneficio:
+                            select_benef.select_by_value(beneficio)
+                except Exception as e:
+                    self.console.log(f"Error seleccionando beneficio: {e}", "error")
+                    break
+                
+                # Ingresar mes y año
+                try:
+                    with self.console.paso("fecha"):
+                        mes_input = self.driver.find_element(By.ID, "ctl00_PlaceContent_txtMes")
+                        anio_input = self.driver.find_element(By.ID, "ctl00_PlaceContent_txtAnio")
+                        mes_input.clear()
+                        mes_input.send_keys(str(mes))
+                        anio_input.clear()
+                        anio_input.send_keys(str(anio))
+                except Exception as e:
+                    self.console.log(f"Error ingresando fecha: {e}", "error")
+                    break
+                
+                # Consultar
+                try:
+                    with self.console.paso("consulta"):
+                        btn_consultar = self.driver.find_element(By.ID, "ctl00_PlaceContent_btnConsultar")
+                        btn_consultar.click()
+                        # El postback reemplaza el formulario (extraer_datos_tabla espera la grilla)
+                        esperas.stale(btn_consultar)
+                        esperas.document_ready()
+                except Exception as e:
+                    self.console.log(f"Error consultando recibo: {e}", "error")
+                    break
+                
+                # ===== NUEVA FUNCIONALIDAD: EXTRAER DATOS PARA EXCEL =====
+                with self.console.paso("extraccion"):
+                    datos_tabla = self.extraer_datos_tabla(mes, anio)
+                if datos_tabla:
+                    self.actualizar_excel(datos_tabla, ruta_excel)
+                    self.console.log(f"Datos del período {mes:02d}/{anio} agregados al Excel", "success")
+                # ===== FIN NUEVA FUNCIONALIDAD =====
+                
+                # Descargar PDF
+                try:
+                    self.console.log(f"Descargando PDF {mes:02d}/{anio}...", "process")
+                    with self.console.paso("imprimir"):
+                        imprimir_btn = esperas.clickable((By.ID, "ctl00_PlaceContent_btn_imprimir"), timeout=10)
+                        pdfs_previos = watcher.snapshot()
+                        imprimir_btn.click()
+                    
+                    # Despertar en cuanto el PDF nuevo esté completo en la carpeta
+                    with self.console.paso("espera_descarga"):
+                        pdf_descargado = watcher.wait_for_new(pdfs_previos, timeout=self.timeout_descarga)
+                    if pdf_descargado:
+                        self.console.log(f"Uniendo archivo: {os.path.basename(pdf_descargado)}", "success")
+                        self._guardar_en_cache(cache, beneficio, mes, anio, datos_tabla, pdf_descargado)
+                        # El PDF individual pasa al checkpoint hasta que termine la ejecución
+                        pdf_descargado = manifiesto.record_period(beneficio, mes, anio, datos_tabla, pdf_descargado)
+                        with self.console.paso("merge"):
+                            pdf_merger.append(pdf_descargado)
+                        archivos_procesados += 1
+                        self.observador.update_stats(files=archivos_procesados)
+                        self.console.log(f"Archivo procesado y guardado en el checkpoint: {os.path.basename(pdf_descargado)}", "info")
+                    else:
+                        self.console.log(f"El PDF de {mes:02d}/{anio} no se completó en {self.timeout_descarga}s", "warning")
+                
+                except Exception as e:
+                    self.console.log(f"Error descargando PDF: {e}", "error")
+                
+                # Volver atrás solo si el formulario de recibos ya no está disponible
+                if not (self.navegacion_directa and self._formulario_recibos_activo()):
+                    try:
+                        with self.console.paso("volver"):
+                            pagina_actual = self.driver.find_element(By.TAG_NAME, "html")
+                            self.driver.back()
+                            esperas.stale(pagina_actual)
+                            esperas.frame_containing((By.ID, "ctl00_PlaceContent_ddl_Beneficios"))
+                    except Exception as e:
+                        self.console.log(f"Error navegando hacia atrás: {e}", "error")
+                        break
+                
+                # Incrementar mes
+                mes, anio = self.siguiente_periodo(mes, anio)
+            
+            resultado['total_meses'] = total_meses
+            resultado['archivos_procesados'] = archivos_procesados
+            self.console.contexto(periodo=None)
+            
+            # Guardar PDF final
+            if self.is_running:
+                try:
+                    self.console.log("Generando PDF unificado final...", "process")
+                    self.observador.update_stats(status="🟡 Finalizando...")
+                    
+                    # Concatena los bloques ya escritos; reemplaza el archivo final anterior
+                    with self.console.paso("pdf_final"):
+                        duplicados = pdf_merger.write(self.pdf_final_path)
+                    if duplicados:
+                        self.console.log(f"{duplicados} fuentes y recursos repetidos unificados en el PDF", "info")
+                    
+                    # Limpiar cualquier PDF individual restante
+                    self.limpiar_pdfs_individuales(carpeta_descargas)
+                    
+                    self.console.log(f"PDF unificado creado exitosamente: {self.pdf_final_path}", "success")
+                    resultado['pdf'] = self.pdf_final_path
+                    self.observador.pdf_ready(self.pdf_final_path)
+
+                    # NUEVO: Crear resumen neto completo al final
+                    if self.excel_builder and self.todos_los_datos:
+                        with self.console.paso("excel_final"):
+                            self.crear_resumen_neto_completo(ruta_excel)
+                            self.crear_columnas_total_finales(ruta_excel)
+                            self.guardar_excel()
+                        resultado['excel'] = ruta_excel
+                        self.observador.excel_ready(ruta_excel)
+                        self.console.log(f"📊 Análisis Excel completo creado: analisis_recibos.xlsx", "success")
+                    
+                    # Con todos los períodos descargados el checkpoint ya no hace falta;
+                    # si faltó alguno se conserva para reintentar solo esos
+                    if archivos_procesados == total_meses:
+                        manifiesto.clear()
+                    
+                    resultado['completado'] = True
+                    self.observador.update_stats(status="✅ Completado", progress=1.0)
+                    self.observador.run_finished(resultado)
+                
+                except Exception as e:
+                    self.console.log(f"Error creando PDF final: {e}", "error")
+                    resultado['error'] = str(e)
+        
+        finally:
+            if watcher is not None:
+                watcher.close()
+            if pool is not None:
+                pool.close()
+            if fetcher is not None:
+                fetcher.close()
+            if pdf_merger is not None:
+                pdf_merger.close()
+            if cache is not None and cache is not self.cache_compartida:
+                cache.close()
+            # Conservar en disco lo procesado aunque el proceso se haya interrumpido
+            self.guardar_excel()
+            self._exportar_tiempos(carpeta_descargas)
+            self.console.contexto(beneficio=None, periodo=None)
+        
+        return resultado
+    
+    def _exportar_tiempos(self, carpeta_descargas):
+        """Resume los tiempos por paso en la consola y los exporta a la carpeta de descargas"""
+        tiempos, self.console.tiempos = self.console.tiempos, None
+        if tiempos is None:
+            return
+        resumen = tiempos.summary()
+        if not resumen:
+            return
+        for fila in sorted(resumen, key=lambda f: f["total_ms"], reverse=True):
+            self.console.log(
+                f"⏱️ {fila['paso']}: p50 {fila['p50_ms']:.0f} ms · p95 {fila['p95_ms']:.0f} ms · "
+                f"máx {fila['max_ms']:.0f} ms ({fila['cantidad']} veces)", "info"
+            )
+        try:
+            ruta_json, _ = tiempos.export(carpeta_descargas)
+            self.console.log(f"Tiempos por paso guardados en {os.path.basename(ruta_json)} y .csv", "info")
+        except OSError as e:
+            self.console.log(f"No se pudieron guardar los tiempos por paso: {e}", "warning")
+    
+    def _guardar_en_cache(self, cache, beneficio, mes, anio, datos, ruta_pdf):
+        """Agrega el período descargado a la caché local; un fallo no interrumpe la descarga"""
+        if cache is None:
+            return
+        try:
+            cache.put(beneficio, mes, anio, datos, ruta_pdf)
+        except Exception as e:
+            self.console.log(f"No se pudo guardar {mes:02d}/{anio} en la caché: {e}", "warning")
+    
+    def _formulario_recibos_activo(self):
+        """Indica si el formulario de consulta sigue operable en el frame actual"""
+        try:
+            campos = [
+                self.driver.find_elements(By.ID, "ctl00_PlaceContent_ddl_Beneficios"),
+                self.driver.find_elements(By.ID, "ctl00_PlaceContent_txtMes"),
+                self.driver.find_elements(By.ID, "ctl00_PlaceContent_btnConsultar")
+            ]
+            return all(campo and campo[0].is_displayed() and campo[0].is_enabled() for campo in campos)
+        except Exception:
+            return False
+
+    def siguiente_periodo(self, mes, anio):
+        """Devuelve el (mes, año) siguiente"""
+        if mes == 12:
+            return 1, anio + 1
+        return mes + 1, anio
+
+    def calcular_total_meses(self, mes_inicial, anio_inicial, mes_final, anio_final):
+        return (anio_final - anio_inicial) * 12 + (mes_final - mes_inicial) + 1
@@ -1,19 +1,97 @@
 """Aplicación FastAPI para gestionar descargas y licencias."""
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse
-import io
-import requests
+import hashlib
+from contextlib import asynccontextmanager
+from typing import Callable, Optional
+
+from starlette.types import Receive, Scope, Send
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, Response
 
 from .core.descargas import (
     iniciar_descarga,
     obtener_pdf,
     obtener_excel,
+    obtener_archivo,
+    liberar_archivo,
+    metricas_almacen,
 )
+from .core.licencias import (
+    ErrorLicencias,
+    cerrar_consultor,
+    obtener_licencia,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await cerrar_consultor()
+
+
+app = FastAPI(title="API de Descargas", lifespan=lifespan)
 
-app = FastAPI(title="API de Descargas")
 
-FIREBASE_URL = "https://recibos-anses-default-rtdb.firebaseio.com"
+def _coincide_etag(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara ``If-None-Match`` con el ETag del reporte (comparación débil, RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (valor.strip().removeprefix("W/") for valor in if_none_match.split(","))
+
+
+class _ReporteRetenido(FileResponse):
+    """``FileResponse`` que libera el reporte retenido al terminar el envío, aun si falla."""
+
+    def __init__(self, descarga_id: str, tipo: str, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.descarga_id = descarga_id
+        self.tipo = tipo
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            liberar_archivo(self.descarga_id, self.tipo)
+
+
+def _responder_reporte(
+    request: Request,
+    descarga_id: str,
+    tipo: str,
+    obtener: Callable[[str], Optional[bytes]],
+    media_type: str,
+    extension: str,
+) -> Response:
+    """Sirve un reporte con ETag fuerte, 304 condicional y, desde disco, rangos HTTP.
+
+    Los reportes en disco se envían con ``FileResponse`` (sin copiarlos a
+    memoria) y quedan retenidos hasta terminar, para que un desalojo
+    simultáneo no borre el archivo a mitad del envío; si el almacén no tiene
+    capa en disco se responde con los bytes.
+    """
+    cabeceras = {"Content-Disposition": f"attachment; filename={descarga_id}.{extension}"}
+    archivo = obtener_archivo(descarga_id, tipo, retener=True)
+    if archivo is not None:
+        ruta, sha256 = archivo
+        contenido = None
+    else:
+        contenido = obtener(descarga_id)
+        if not contenido:
+            raise HTTPException(status_code=404, detail="Descarga no encontrada")
+        sha256 = hashlib.sha256(contenido).hexdigest()
+
+    etag = f'"{sha256}"'
+    cabeceras["ETag"] = etag
+    if _coincide_etag(request.headers.get("if-none-match"), etag):
+        if contenido is None:
+            liberar_archivo(descarga_id, tipo)
+        return Response(status_code=304, headers={"ETag": etag})
+    if contenido is None:
+        return _ReporteRetenido(descarga_id, tipo, ruta, media_type=media_type, headers=cabeceras)
+    return Response(contenido, media_type=media_type, headers=cabeceras)
 
 
 @app.post("/descargas", summary="Inicia una descarga", tags=["Descargas"])
@@ -30,42 +108,57 @@ def post_descargas():
     return {"id": descarga_id}
 
 
+@app.get("/descargas/metricas", summary="Métricas del almacén de descargas", tags=["Descargas"])
+def get_metricas_descargas():
+    """Devuelve aciertos, fallos, desalojos y bytes ocupados por los reportes guardados.
+
+    **Ejemplo**
+
+    ```bash
+    curl -X GET http://localhost:8000/descargas/metricas
+    ```
+    """
+    return metricas_almacen()
+
+
 @app.get("/descargas/{descarga_id}/pdf", summary="Obtiene el PDF de una descarga", tags=["Descargas"])
-def get_descarga_pdf(descarga_id: str):
+def get_descarga_pdf(descarga_id: str, request: Request):
     """Devuelve el PDF asociado a una descarga.
 
+    Admite ``Range`` para retomar descargas cortadas e ``If-None-Match`` con
+    el ETag recibido antes.
+
     **Ejemplo**
 
     ```bash
     curl -X GET http://localhost:8000/descargas/<id>/pdf -o reporte.pdf
     ```
     """
-    pdf = obtener_pdf(descarga_id)
-    if not pdf:
-        raise HTTPException(status_code=404, detail="Descarga no encontrada")
-    return StreamingResponse(io.BytesIO(pdf), media_type="application/pdf", headers={"Content-Disposition": f"attachment; filename={descarga_id}.pdf"})
+    return _responder_reporte(request, descarga_id, "pdf", obtener_pdf, "application/pdf", "pdf")
 
 
 @app.get("/descargas/{descarga_id}/excel", summary="Obtiene el Excel de una descarga", tags=["Descargas"])
-def get_descarga_excel(descarga_id: str):
+def get_descarga_excel(descarga_id: str, request: Request):
     """Devuelve el Excel asociado a una descarga.
 
+    Admite ``Range`` e ``If-None-Match`` igual que el PDF.
+
     **Ejemplo**
 
     ```bash
     curl -X GET http://localhost:8000/descargas/<id>/excel -o reporte.csv
     ```
     """
-    excel = obtener_excel(descarga_id)
-    if not excel:
-        raise HTTPException(status_code=404, detail="Descarga no encontrada")
-    return StreamingResponse(io.BytesIO(excel), media_type="text/csv", headers={"Content-Disposition": f"attachment; filename={descarga_id}.csv"})
+    return _responder_reporte(request, descarga_id, "excel", obtener_excel, "text/csv", "csv")
 
 
 @app.get("/licencias/{licencia_id}", summary="Valida una licencia", tags=["Licencias"])
-def get_licencia(licencia_id: str):
+async def get_licencia(licencia_id: str):
     """Verifica si una licencia está activa.
 
+    Las respuestas de Firebase se reutilizan unos segundos y las consultas
+    simultáneas de un mismo ID comparten una sola petición.
+
     **Ejemplo**
 
     ```bash
@@ -73,13 +166,9 @@ def get_licencia(licencia_id: str):
     ```
     """
     try:
-        respuesta = requests.get(f"{FIREBASE_URL}/licenses/{licencia_id}.json", timeout=10)
-    except requests.RequestException:
-        raise HTTPException(status_code=503, detail="Servicio de licencias no disponible")
-
-    if respuesta.status_code != 200:
-        raise HTTPException(status_code=respuesta.status_code, detail="Error al consultar la licencia")
+        datos = await obtener_licencia(licencia_id)
+    except ErrorLicencias as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detalle)
 
-    datos = respuesta.json()
     activa = bool(datos and datos.get("active"))
     return {"id": licencia_id, "activa": activa}
@@ -0,0 +1,461 @@
+"""Almacenes acotados para los reportes generados por las descargas."""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+
+class AlmacenArtefactos:
+    """Interfaz común de los almacenes de artefactos.
+
+    Cada artefacto se identifica por la descarga y su tipo (``"pdf"``,
+    ``"excel"``). Los almacenes llevan métricas de aciertos, fallos y
+    desalojos.
+    """
+
+    def __init__(self):
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def guardar(self, descarga_id: str, tipo: str, contenido: bytes) -> None:
+        raise NotImplementedError
+
+    def obtener(self, descarga_id: str, tipo: str, contar: bool = True) -> Optional[bytes]:
+        """Devuelve el artefacto o ``None``.
+
+        Con ``contar=False`` la consulta no afecta las métricas (uso interno,
+        por ejemplo para volver a mirar tras esperar otra generación).
+        """
+        raise NotImplementedError
+
+    def ruta(
+        self, descarga_id: str, tipo: str, contar: bool = True, retener: bool = False
+    ) -> Optional[Tuple[str, str]]:
+        """Devuelve la ruta en disco del artefacto y el SHA-256 de su contenido.
+
+        Con ``retener=True`` el archivo no se borra (aunque se desaloje o
+        venza) hasta la llamada correspondiente a ``liberar``. Los almacenes
+        sin archivos devuelven siempre ``None``.
+        """
+        return None
+
+    def liberar(self, descarga_id: str, tipo: str) -> None:
+        """Suelta una retención tomada con ``ruta(..., retener=True)``."""
+
+    def bytes_usados(self) -> int:
+        raise NotImplementedError
+
+    def metricas(self) -> Dict[str, int]:
+        """Devuelve los contadores del almacén y los bytes ocupados."""
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "desalojos": self.desalojos,
+            "bytes": self.bytes_usados(),
+        }
+
+
+class AlmacenMemoria(AlmacenArtefactos):
+    """Almacén en memoria con desalojo LRU por bytes y vencimiento por antigüedad.
+
+    Al guardar se purgan también los artefactos vencidos (a lo sumo una vez
+    por ``intervalo_barrido`` segundos), aunque nadie los vuelva a pedir.
+
+    Args:
+        max_bytes: Presupuesto total de memoria para los artefactos.
+        ttl: Segundos que se conserva un artefacto desde que se guardó.
+        intervalo_barrido: Segundos mínimos entre dos purgas de vencidos.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float = 3600.0, intervalo_barrido: float = 60.0):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.intervalo_barrido = min(intervalo_barrido, ttl)
+        self._entradas: "OrderedDict[Tuple[str, str], Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._proximo_barrido = 0.0
+        self._lock = threading.Lock()
+
+    def guardar(self, descarga_id: str, tipo: str, contenido: bytes) -> None:
+        clave = (descarga_id, tipo)
+        with self._lock:
+            self._barrer_vencidos()
+            self._quitar(clave)
+            if len(contenido) > self.max_bytes:
+                return  # No entra ni vaciando el almacén
+            self._entradas[clave] = (time.monotonic() + self.ttl, contenido)
+            self._bytes += len(contenido)
+            while self._bytes > self.max_bytes:
+                self._quitar(next(iter(self._entradas)))
+                self.desalojos += 1
+
+    def obtener(self, descarga_id: str, tipo: str, contar: bool = True) -> Optional[bytes]:
+        clave = (descarga_id, tipo)
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[0] <= time.monotonic():
+                self._quitar(clave)
+                self.desalojos += 1
+                entrada = None
+            if entrada is None:
+                if contar:
+                    self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            if contar:
+                self.aciertos += 1
+            return entrada[1]
+
+    def bytes_usados(self) -> int:
+        return self._bytes
+
+    def _barrer_vencidos(self) -> None:
+        ahora = time.monotonic()
+        if ahora < self._proximo_barrido:
+            return
+        self._proximo_barrido = ahora + self.intervalo_barrido
+        for clave in [c for c, (vence, _) in self._entradas.items() if vence <= ahora]:
+            self._quitar(clave)
+            self.desalojos += 1
+
+    def _quitar(self, clave: Tuple[str, str]) -> None:
+        entrada = self._entradas.pop(clave, None)
+        if entrada is not None:
+            self._bytes -= len(entrada[1])
+
+
+class AlmacenDisco(AlmacenArtefactos):
+    """Almacén en disco: un archivo por artefacto más un índice incremental.
+
+    El índice es un registro JSONL donde cada escritura o borrado agrega una
+    línea; al abrir el almacén, y cuando el registro crece al doble de las
+    entradas vivas, se compacta reescribiéndolo de forma atómica. Así el costo
+    de guardar no depende de la cantidad de artefactos. El último uso se lleva
+    en memoria: tras un reinicio el orden LRU parte de la fecha de creación.
+    Al superar ``max_bytes`` se borran los artefactos usados hace más tiempo,
+    y al guardar se purgan los vencidos (a lo sumo una vez por
+    ``intervalo_barrido`` segundos). Si un artefacto desalojado está retenido
+    (por ejemplo, mientras se envía), sale del índice enseguida pero su
+    archivo se borra recién al liberarlo.
+
+    Args:
+        directorio: Carpeta exclusiva de los archivos y del índice; al abrir
+            se borra todo archivo que el índice no referencie.
+        max_bytes: Presupuesto total en disco.
+        ttl: Segundos que se conserva un artefacto desde que se guardó.
+        intervalo_barrido: Segundos mínimos entre dos purgas de vencidos.
+    """
+
+    def __init__(
+        self,
+        directorio: str,
+        max_bytes: int = 1024 * 1024 * 1024,
+        ttl: float = 7 * 24 * 3600.0,
+        intervalo_barrido: float = 60.0,
+    ):
+        super().__init__()
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.intervalo_barrido = min(intervalo_barrido, ttl)
+        self.ruta_indice = os.path.join(directorio, "indice.jsonl")
+        self._lock = threading.Lock()
+        self._proximo_barrido = 0.0
+        self._retenidos: Dict[str, int] = {}
+        self._por_borrar: Set[str] = set()
+        os.makedirs(directorio, exist_ok=True)
+        # Orden de uso: las primeras entradas son las usadas hace más tiempo
+        self._indice: "OrderedDict[str, Dict]" = self._leer_indice()
+        self._borrar_huerfanos()
+        self._bytes = sum(datos["bytes"] for datos in self._indice.values())
+        self._registro = None
+        self._lineas_registro = 0
+        self._compactar()
+
+    def _leer_indice(self) -> "OrderedDict[str, Dict]":
+        indice: Dict[str, Dict] = {}
+        try:
+            with open(self.ruta_indice, encoding="utf-8") as archivo:
+                for linea in archivo:
+                    try:
+                        datos = json.loads(linea)
+                        nombre = datos.pop("nombre")
+                    except (ValueError, KeyError, AttributeError):
+                        continue  # Línea cortada por una escritura interrumpida
+                    if datos.get("borrado"):
+                        indice.pop(nombre, None)
+                    else:
+                        indice[nombre] = datos
+        except OSError:
+            pass
+        # Entradas cuyo archivo ya no existe (borrado a mano o escritura cortada)
+        vivas = [
+            (nombre, dict(datos, usado=datos["creado"]))
+            for nombre, datos in indice.items()
+            if {"bytes", "sha256", "creado"} <= datos.keys() and os.path.exists(self._ruta(nombre))
+        ]
+        return OrderedDict(sorted(vivas, key=lambda item: item[1]["usado"]))
+
+    def _borrar_huerfanos(self) -> None:
+        """Borra los archivos que el índice no conoce (escrituras cortadas, ``*.tmp``)."""
+        conocidos = set(self._indice)
+        conocidos.add(os.path.basename(self.ruta_indice))
+        for nombre in os.listdir(self.directorio):
+            ruta = os.path.join(self.directorio, nombre)
+            if nombre not in conocidos and os.path.isfile(ruta):
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+
+    def _compactar(self) -> None:
+        """Reescribe el registro con una línea por entrada viva."""
+        if self._registro is not None:
+            self._registro.close()
+        temporal = self.ruta_indice + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            for nombre, datos in self._indice.items():
+                archivo.write(json.dumps(self._linea(nombre, datos)) + "\n")
+        os.replace(temporal, self.ruta_indice)
+        self._registro = open(self.ruta_indice, "a", encoding="utf-8")
+        self._lineas_registro = len(self._indice)
+
+    @staticmethod
+    def _linea(nombre: str, datos: Dict) -> Dict:
+        return {"nombre": nombre, "bytes": datos["bytes"], "sha256": datos["sha256"], "creado": datos["creado"]}
+
+    def _registrar(self, linea: Dict) -> None:
+        if self._registro is None:
+            return  # Almacén cerrado: lo no registrado se borra como huérfano al reabrir
+        self._registro.write(json.dumps(linea) + "\n")
+        self._registro.flush()
+        self._lineas_registro += 1
+        if self._lineas_registro > max(1000, 2 * len(self._indice)):
+            self._compactar()
+
+    @staticmethod
+    def _nombre(descarga_id: str, tipo: str) -> str:
+        # El ID llega desde la URL: se usa un hash como nombre de archivo
+        return hashlib.sha256(f"{descarga_id}/{tipo}".encode("utf-8")).hexdigest()
+
+    def _ruta(self, nombre: str) -> str:
+        return os.path.join(self.directorio, nombre)
+
+    def guardar(self, descarga_id: str, tipo: str, contenido: bytes) -> None:
+        nombre = self._nombre(descarga_id, tipo)
+        with self._lock:
+            self._barrer_vencidos()
+            self._olvidar(nombre)
+            # El archivo retenido se reemplaza: ya no hay que borrarlo al liberarlo
+            self._por_borrar.discard(nombre)
+            if len(contenido) > self.max_bytes:
+                return
+            temporal = self._ruta(nombre) + ".tmp"
+            with open(temporal, "wb") as archivo:
+                archivo.write(contenido)
+            os.replace(temporal, self._ruta(nombre))
+            ahora = time.time()
+            datos = {
+                "bytes": len(contenido),
+                "sha256": hashlib.sha256(contenido).hexdigest(),
+                "creado": ahora,
+                "usado": ahora,
+            }
+            self._indice[nombre] = datos
+            self._bytes += datos["bytes"]
+            self._registrar(self._linea(nombre, datos))
+            while self._bytes > self.max_bytes:
+                self._borrar(next(iter(self._indice)))
+                self.desalojos += 1
+
+    def _vigente(self, nombre: str) -> Optional[Dict]:
+        """Datos del índice si el artefacto no venció; los vencidos se borran."""
+        datos = self._indice.get(nombre)
+        if datos is not None and datos["creado"] + self.ttl <= time.time():
+            self._borrar(nombre)
+            self.desalojos += 1
+            datos = None
+        return datos
+
+    def _usar(self, nombre: str, datos: Dict) -> None:
+        datos["usado"] = time.time()
+        self._indice.move_to_end(nombre)
+
+    def obtener(self, descarga_id: str, tipo: str, contar: bool = True) -> Optional[bytes]:
+        nombre = self._nombre(descarga_id, tipo)
+        with self._lock:
+            datos = self._vigente(nombre)
+            contenido = None
+            if datos is not None:
+                try:
+                    with open(self._ruta(nombre), "rb") as archivo:
+                        contenido = archivo.read()
+                except OSError:
+                    self._olvidar(nombre)
+            if contenido is None:
+                if contar:
+                    self.fallos += 1
+                return None
+            self._usar(nombre, datos)
+            if contar:
+                self.aciertos += 1
+            return contenido
+
+    def ruta(
+        self, descarga_id: str, tipo: str, contar: bool = True, retener: bool = False
+    ) -> Optional[Tuple[str, str]]:
+        nombre = self._nombre(descarga_id, tipo)
+        with self._lock:
+            datos = self._vigente(nombre)
+            ruta = self._ruta(nombre)
+            if datos is None or not os.path.exists(ruta):
+                self._olvidar(nombre)
+                if contar:
+                    self.fallos += 1
+                return None
+            self._usar(nombre, datos)
+            if contar:
+                self.aciertos += 1
+            if retener:
+                self._retenidos[nombre] = self._retenidos.get(nombre, 0) + 1
+            return ruta, datos["sha256"]
+
+    def liberar(self, descarga_id: str, tipo: str) -> None:
+        nombre = self._nombre(descarga_id, tipo)
+        with self._lock:
+            restantes = self._retenidos.get(nombre, 0) - 1
+            if restantes > 0:
+                self._retenidos[nombre] = restantes
+                return
+            self._retenidos.pop(nombre, None)
+            if nombre in self._por_borrar:
+                self._por_borrar.discard(nombre)
+                self._quitar_archivo(nombre)
+
+    def bytes_usados(self) -> int:
+        return self._bytes
+
+    def _barrer_vencidos(self) -> None:
+        ahora = time.time()
+        if ahora < self._proximo_barrido:
+            return
+        self._proximo_barrido = ahora + self.intervalo_barrido
+        limite = ahora - self.ttl
+        for nombre in [n for n, datos in self._indice.items() if datos["creado"] <= limite]:
+            self._borrar(nombre)
+            self.desalojos += 1
+
+    def _olvidar(self, nombre: str) -> None:
+        """Quita la entrada del índice (y lo registra) sin tocar el archivo."""
+        datos = self._indice.pop(nombre, None)
+        if datos is not None:
+            self._bytes -= datos["bytes"]
+            self._registrar({"nombre": nombre, "borrado": True})
+
+    def _borrar(self, nombre: str) -> None:
+        self._olvidar(nombre)
+        if nombre in self._retenidos:
+            self._por_borrar.add(nombre)
+        else:
+            self._quitar_archivo(nombre)
+
+    def _quitar_archivo(self, nombre: str) -> None:
+        try:
+            os.remove(self._ruta(nombre))
+        except OSError:
+            pass
+
+    def cerrar(self) -> None:
+        """Cierra el registro del índice."""
+        with self._lock:
+            if self._registro is not None:
+                self._registro.close()
+                self._registro = None
+
+
+class AlmacenEnCapas(AlmacenArtefactos):
+    """Combina una capa rápida en memoria con una persistente en disco.
+
+    Las escrituras van a ambas capas; las lecturas que fallan en memoria se
+    buscan en disco y, si aparecen, se vuelven a subir a memoria.
+    """
+
+    def __init__(self, memoria: AlmacenArtefactos, disco: AlmacenArtefactos):
+        super().__init__()
+        self.memoria = memoria
+        self.disco = disco
+        self._lock = threading.Lock()
+
+    def guardar(self, descarga_id: str, tipo: str, contenido: bytes) -> None:
+        self.disco.guardar(descarga_id, tipo, contenido)
+        self.memoria.guardar(descarga_id, tipo, contenido)
+
+    def _contar(self, encontrado: bool) -> None:
+        with self._lock:
+            if encontrado:
+                self.aciertos += 1
+            else:
+                self.fallos += 1
+
+    def obtener(self, descarga_id: str, tipo: str, contar: bool = True) -> Optional[bytes]:
+        contenido = self.memoria.obtener(descarga_id, tipo, contar)
+        if contenido is None:
+            contenido = self.disco.obtener(descarga_id, tipo, contar)
+            if contenido is not None:
+                self.memoria.guardar(descarga_id, tipo, contenido)
+        if contar:
+            self._contar(contenido is not None)
+        return contenido
+
+    def ruta(
+        self, descarga_id: str, tipo: str, contar: bool = True, retener: bool = False
+    ) -> Optional[Tuple[str, str]]:
+        encontrado = self.disco.ruta(descarga_id, tipo, contar, retener)
+        if contar:
+            self._contar(encontrado is not None)
+        return encontrado
+
+    def liberar(self, descarga_id: str, tipo: str) -> None:
+        self.disco.liberar(descarga_id, tipo)
+
+    def bytes_usados(self) -> int:
+        return self.disco.bytes_usados()
+
+    def metricas(self) -> Dict[str, int]:
+        with self._lock:
+            metricas = super().metricas()
+        metricas["desalojos"] = self.memoria.desalojos + self.disco.desalojos
+        metricas["memoria"] = self.memoria.metricas()
+        metricas["disco"] = self.disco.metricas()
+        return metricas
+
+
+def crear_almacen() -> AlmacenArtefactos:
+    """Crea el almacén configurado por variables de entorno.
+
+    La capa en disco se guarda en ``ARTEFACTOS_DIR`` (por defecto, una
+    carpeta en el directorio temporal; vacía la desactiva).
+    ``ARTEFACTOS_MEMORIA_MB``, ``ARTEFACTOS_DISCO_MB`` y
+    ``ARTEFACTOS_TTL_SEGUNDOS`` fijan los límites.
+    """
+    ttl = float(os.environ.get("ARTEFACTOS_TTL_SEGUNDOS", 24 * 3600))
+    memoria = AlmacenMemoria(
+        max_bytes=int(float(os.environ.get("ARTEFACTOS_MEMORIA_MB", 64)) * 1024 * 1024),
+        ttl=ttl,
+    )
+    directorio = os.environ.get("ARTEFACTOS_DIR", os.path.join(tempfile.gettempdir(), "anses_artefactos"))
+    if not directorio:
+        return memoria
+    disco = AlmacenDisco(
+        directorio,
+        max_bytes=int(float(os.environ.get("ARTEFACTOS_DISCO_MB", 1024)) * 1024 * 1024),
+        ttl=ttl,
+    )
+    return AlmacenEnCapas(memoria, disco)
@@ -1,39 +1,147 @@
 """Lógica de gestión de descargas."""
 
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from uuid import uuid4
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional, Tuple
 
+from .artefactos import crear_almacen
 from .reportes import generar_pdf, generar_excel
 
-# Almacén en memoria de resultados de descargas
-_descargas: Dict[str, Dict[str, bytes]] = {}
+# Almacén acotado de resultados de descargas (memoria y disco)
+_almacen = crear_almacen()
 
+# Generador de cada formato; los reportes se generan la primera vez que se piden
+_GENERADORES: Dict[str, Callable[[str], bytes]] = {
+    "pdf": generar_pdf,
+    "excel": generar_excel,
+}
 
-def iniciar_descarga() -> str:
-    """Inicia una descarga y genera los reportes asociados.
+# Descargas registradas cuyos reportes pueden generarse: ID -> vencimiento.
+# Todas vencen a los mismos segundos, así que el orden de alta es el de vencimiento.
+_trabajos: "OrderedDict[str, float]" = OrderedDict()
+_MAX_TRABAJOS = int(os.environ.get("DESCARGAS_MAX_PENDIENTES", 10000))
+_TTL_TRABAJOS = float(os.environ.get("ARTEFACTOS_TTL_SEGUNDOS", 24 * 3600))
+
+_en_curso: Dict[Tuple[str, str], Future] = {}
+_lock = threading.Lock()
+_precalculo = ThreadPoolExecutor(max_workers=2, thread_name_prefix="reportes")
+
+
+def iniciar_descarga(precalcular: Optional[bool] = None) -> str:
+    """Registra una descarga; sus reportes se generan recién cuando se piden.
+
+    Args:
+        precalcular: Generar además ambos formatos en segundo plano. Por
+            defecto se toma de la variable ``REPORTES_PRECALCULAR``.
 
     Returns:
         Identificador único de la descarga.
     """
     descarga_id = str(uuid4())
-    _descargas[descarga_id] = {
-        "pdf": generar_pdf(descarga_id),
-        "excel": generar_excel(descarga_id),
-    }
+    ahora = time.monotonic()
+    with _lock:
+        # Se descartan los vencidos y, si no alcanza, los registrados hace más tiempo
+        while _trabajos and (
+            next(iter(_trabajos.values())) <= ahora or len(_trabajos) >= _MAX_TRABAJOS
+        ):
+            _trabajos.popitem(last=False)
+        _trabajos[descarga_id] = ahora + _TTL_TRABAJOS
+    if precalcular is None:
+        precalcular = os.environ.get("REPORTES_PRECALCULAR", "0") == "1"
+    if precalcular:
+        for tipo in _GENERADORES:
+            _precalculo.submit(_generar, descarga_id, tipo)
     return descarga_id
 
 
+def _trabajo_vigente(descarga_id: str) -> bool:
+    with _lock:
+        vence = _trabajos.get(descarga_id)
+        if vence is not None and vence <= time.monotonic():
+            del _trabajos[descarga_id]
+            vence = None
+        return vence is not None
+
+
+def _generar(descarga_id: str, tipo: str) -> Optional[bytes]:
+    """Genera y guarda un reporte si la descarga existe y todavía no lo tiene.
+
+    Si varios pedidos llegan a la vez, solo el primero genera el reporte y
+    los demás esperan ese mismo resultado.
+
+    Returns:
+        Contenido del reporte o ``None`` si la descarga no existe.
+    """
+    clave = (descarga_id, tipo)
+    with _lock:
+        futuro = _en_curso.get(clave)
+        propio = futuro is None
+        if propio:
+            futuro = Future()
+            _en_curso[clave] = futuro
+    if not propio:
+        return futuro.result()
+
+    try:
+        # Otro pedido pudo terminarlo entre la consulta al almacén y el lock
+        contenido = _almacen.obtener(descarga_id, tipo, contar=False)
+        if contenido is None and _trabajo_vigente(descarga_id):
+            contenido = _GENERADORES[tipo](descarga_id)
+            _almacen.guardar(descarga_id, tipo, contenido)
+        futuro.set_result(contenido)
+        return contenido
+    except BaseException as e:
+        futuro.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _en_curso.pop(clave, None)
+
+
+def _obtener_reporte(descarga_id: str, tipo: str) -> Optional[bytes]:
+    contenido = _almacen.obtener(descarga_id, tipo)
+    if contenido is None:
+        contenido = _generar(descarga_id, tipo)
+    return contenido
+
+
 def obtener_pdf(descarga_id: str) -> Optional[bytes]:
     """Obtiene el PDF generado para una descarga."""
-    descarga = _descargas.get(descarga_id)
-    if descarga:
-        return descarga.get("pdf")
-    return None
+    return _obtener_reporte(descarga_id, "pdf")
 
 
 def obtener_excel(descarga_id: str) -> Optional[bytes]:
     """Obtiene el Excel generado para una descarga."""
-    descarga = _descargas.get(descarga_id)
-    if descarga:
-        return descarga.get("excel")
-    return None
+    return _obtener_reporte(descarga_id, "excel")
+
+
+def obtener_archivo(descarga_id: str, tipo: str, retener: bool = False) -> Optional[Tuple[str, str]]:
+    """Obtiene la ruta en disco de un reporte y el SHA-256 de su contenido.
+
+    Genera el reporte si la descarga existe y todavía no lo tiene.
+
+    Args:
+        retener: Evitar que el archivo se borre hasta llamar a
+            ``liberar_archivo`` (solo si se devuelve una ruta).
+
+    Returns:
+        Tupla ``(ruta, sha256)`` o ``None`` si el reporte no está en disco.
+    """
+    archivo = _almacen.ruta(descarga_id, tipo, retener=retener)
+    if archivo is None and tipo in _GENERADORES and _generar(descarga_id, tipo) is not None:
+        archivo = _almacen.ruta(descarga_id, tipo, contar=False, retener=retener)
+    return archivo
+
+
+def liberar_archivo(descarga_id: str, tipo: str) -> None:
+    """Permite borrar el archivo retenido con ``obtener_archivo(..., retener=True)``."""
+    _almacen.liberar(descarga_id, tipo)
+
+
+def metricas_almacen() -> Dict[str, int]:
+    """Devuelve aciertos, fallos, desalojos y bytes del almacén de descargas."""
+    return _almacen.metricas()
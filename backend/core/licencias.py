@@ -0,0 +1,136 @@
+"""Consulta de licencias en Firebase con caché y conexiones reutilizables."""
+
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+FIREBASE_URL = "https://recibos-anses-default-rtdb.firebaseio.com"
+
+
+class ErrorLicencias(Exception):
+    """Falla al consultar Firebase, con el código HTTP a devolver al cliente."""
+
+    def __init__(self, status_code: int, detalle: str):
+        super().__init__(detalle)
+        self.status_code = status_code
+        self.detalle = detalle
+
+
+class ConsultorLicencias:
+    """Cliente asíncrono de licencias con caché TTL y consultas deduplicadas.
+
+    Las respuestas válidas se guardan ``ttl`` segundos y los IDs inexistentes
+    ``ttl_negativo`` segundos; los errores de Firebase no se guardan. Si llegan
+    varias consultas del mismo ID mientras una está en curso, todas esperan
+    esa única petición.
+
+    Args:
+        base_url: URL de la Realtime Database.
+        ttl: Segundos que se reutiliza una licencia encontrada.
+        ttl_negativo: Segundos que se recuerda que un ID no existe.
+        timeout: Límite en segundos de cada petición a Firebase.
+        max_conexiones: Conexiones keep-alive compartidas por todas las consultas.
+        max_entradas: Cantidad máxima de IDs en caché.
+    """
+
+    def __init__(
+        self,
+        base_url: str = FIREBASE_URL,
+        ttl: float = 60.0,
+        ttl_negativo: float = 30.0,
+        timeout: float = 10.0,
+        max_conexiones: int = 20,
+        max_entradas: int = 10000,
+    ):
+        self.base_url = base_url
+        self.ttl = ttl
+        self.ttl_negativo = ttl_negativo
+        self.timeout = timeout
+        self.max_conexiones = max_conexiones
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self._cliente: Optional[httpx.AsyncClient] = None
+        self._cache: Dict[str, Tuple[float, Optional[dict]]] = {}
+        self._en_curso: Dict[str, asyncio.Future] = {}
+
+    def _obtener_cliente(self) -> httpx.AsyncClient:
+        if self._cliente is None:
+            self._cliente = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_conexiones,
+                    max_keepalive_connections=self.max_conexiones,
+                ),
+            )
+        return self._cliente
+
+    async def obtener(self, licencia_id: str) -> Optional[dict]:
+        """Devuelve los datos de la licencia o ``None`` si el ID no está registrado.
+
+        Raises:
+            ErrorLicencias: Si Firebase no responde o responde con error.
+        """
+        entrada = self._cache.get(licencia_id)
+        if entrada is not None and entrada[0] > time.monotonic():
+            self.aciertos += 1
+            return entrada[1]
+
+        self.fallos += 1
+        tarea = self._en_curso.get(licencia_id)
+        if tarea is None:
+            tarea = asyncio.ensure_future(self._consultar(licencia_id))
+            self._en_curso[licencia_id] = tarea
+            tarea.add_done_callback(lambda _: self._en_curso.pop(licencia_id, None))
+        # Si un cliente cancela su petición, la consulta sigue para los demás
+        return await asyncio.shield(tarea)
+
+    async def _consultar(self, licencia_id: str) -> Optional[dict]:
+        try:
+            respuesta = await self._obtener_cliente().get(f"/licenses/{licencia_id}.json")
+        except httpx.HTTPError:
+            raise ErrorLicencias(503, "Servicio de licencias no disponible")
+
+        if respuesta.status_code != 200:
+            raise ErrorLicencias(respuesta.status_code, "Error al consultar la licencia")
+
+        datos = respuesta.json()
+        ttl = self.ttl if datos is not None else self.ttl_negativo
+        self._guardar(licencia_id, datos, ttl)
+        return datos
+
+    def _guardar(self, licencia_id: str, datos: Optional[dict], ttl: float) -> None:
+        self._cache.pop(licencia_id, None)
+        if len(self._cache) >= self.max_entradas:
+            # Se descarta la entrada guardada hace más tiempo
+            del self._cache[next(iter(self._cache))]
+        self._cache[licencia_id] = (time.monotonic() + ttl, datos)
+
+    def invalidar(self, licencia_id: Optional[str] = None) -> None:
+        """Olvida una licencia de la caché, o todas si no se indica el ID."""
+        if licencia_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(licencia_id, None)
+
+    async def cerrar(self) -> None:
+        """Cierra las conexiones abiertas con Firebase."""
+        if self._cliente is not None:
+            await self._cliente.aclose()
+            self._cliente = None
+
+
+_consultor = ConsultorLicencias()
+
+
+async def obtener_licencia(licencia_id: str) -> Optional[dict]:
+    """Obtiene los datos de una licencia con el consultor compartido."""
+    return await _consultor.obtener(licencia_id)
+
+
+async def cerrar_consultor() -> None:
+    """Libera las conexiones del consultor compartido."""
+    await _consultor.cerrar()
@@ -0,0 +1,23 @@
+"""Configuración común de las pruebas del backend."""
+
+import os
+
+# El almacén compartido de descargas se crea al importar el módulo: en las
+# pruebas se usa solo la capa en memoria y cada prueba arma el suyo.
+os.environ["ARTEFACTOS_DIR"] = ""
+
+
+class Reloj:
+    """Reloj manual que reemplaza al módulo ``time`` de los almacenes."""
+
+    def __init__(self, ahora: float = 1_000_000.0):
+        self.ahora = ahora
+
+    def time(self) -> float:
+        return self.ahora
+
+    def monotonic(self) -> float:
+        return self.ahora
+
+    def avanzar(self, segundos: float) -> None:
+        self.ahora += segundos
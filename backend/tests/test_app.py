@@ -0,0 +1,113 @@
+"""Pruebas de las respuestas HTTP de los reportes."""
+
+import hashlib
+from collections import OrderedDict
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app import app
+from backend.core import descargas
+from backend.core.artefactos import AlmacenDisco, AlmacenEnCapas, AlmacenMemoria
+
+
+@pytest.fixture
+def disco(monkeypatch, tmp_path):
+    disco = AlmacenDisco(str(tmp_path))
+    monkeypatch.setattr(descargas, "_almacen", AlmacenEnCapas(AlmacenMemoria(), disco))
+    monkeypatch.setattr(descargas, "_trabajos", OrderedDict())
+    yield disco
+    disco.cerrar()
+
+
+@pytest.fixture
+def cliente(disco):
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+def _nueva_descarga(cliente) -> str:
+    return cliente.post("/descargas").json()["id"]
+
+
+def test_pdf_con_etag_y_longitud(cliente, disco):
+    descarga_id = _nueva_descarga(cliente)
+    esperado = descargas.obtener_pdf(descarga_id)
+
+    respuesta = cliente.get(f"/descargas/{descarga_id}/pdf")
+
+    assert respuesta.status_code == 200
+    assert respuesta.content == esperado
+    assert respuesta.headers["content-length"] == str(len(esperado))
+    assert respuesta.headers["etag"] == f'"{hashlib.sha256(esperado).hexdigest()}"'
+    assert respuesta.headers["accept-ranges"] == "bytes"
+    assert respuesta.headers["content-disposition"] == f"attachment; filename={descarga_id}.pdf"
+    assert disco._retenidos == {}
+
+
+@pytest.mark.parametrize("if_none_match", ["{etag}", 'W/{etag}', '"otro", {etag}', "*"])
+def test_304_si_el_etag_coincide(cliente, disco, if_none_match):
+    descarga_id = _nueva_descarga(cliente)
+    etag = cliente.get(f"/descargas/{descarga_id}/excel").headers["etag"]
+
+    respuesta = cliente.get(
+        f"/descargas/{descarga_id}/excel",
+        headers={"If-None-Match": if_none_match.format(etag=etag)},
+    )
+
+    assert respuesta.status_code == 304
+    assert respuesta.content == b""
+    assert respuesta.headers["etag"] == etag
+    assert disco._retenidos == {}
+
+
+def test_200_si_el_etag_no_coincide(cliente):
+    descarga_id = _nueva_descarga(cliente)
+    respuesta = cliente.get(f"/descargas/{descarga_id}/pdf", headers={"If-None-Match": '"viejo"'})
+    assert respuesta.status_code == 200
+
+
+def test_206_con_range(cliente, disco):
+    descarga_id = _nueva_descarga(cliente)
+    completo = descargas.obtener_pdf(descarga_id)
+
+    respuesta = cliente.get(f"/descargas/{descarga_id}/pdf", headers={"Range": "bytes=0-6"})
+
+    assert respuesta.status_code == 206
+    assert respuesta.content == completo[:7]
+    assert respuesta.headers["content-range"] == f"bytes 0-6/{len(completo)}"
+    assert disco._retenidos == {}
+
+
+def test_416_con_range_fuera_del_archivo(cliente):
+    descarga_id = _nueva_descarga(cliente)
+    respuesta = cliente.get(f"/descargas/{descarga_id}/pdf", headers={"Range": "bytes=5000-"})
+    assert respuesta.status_code == 416
+
+
+def test_404_si_la_descarga_no_existe(cliente):
+    respuesta = cliente.get("/descargas/no-existe/pdf")
+    assert respuesta.status_code == 404
+    assert respuesta.json() == {"detail": "Descarga no encontrada"}
+
+
+def test_sin_capa_en_disco_responde_con_bytes(cliente, monkeypatch):
+    monkeypatch.setattr(descargas, "_almacen", AlmacenMemoria())
+    descarga_id = _nueva_descarga(cliente)
+
+    respuesta = cliente.get(f"/descargas/{descarga_id}/excel")
+
+    assert respuesta.status_code == 200
+    assert respuesta.content == descargas.obtener_excel(descarga_id)
+    assert "etag" in respuesta.headers
+
+
+def test_metricas(cliente):
+    descarga_id = _nueva_descarga(cliente)
+    cliente.get(f"/descargas/{descarga_id}/pdf")
+    cliente.get(f"/descargas/{descarga_id}/pdf")
+
+    metricas = cliente.get("/descargas/metricas").json()
+
+    assert (metricas["aciertos"], metricas["fallos"]) == (1, 1)
+    assert metricas["bytes"] > 0
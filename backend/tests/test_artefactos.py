@@ -0,0 +1,206 @@
+"""Pruebas de los almacenes de artefactos."""
+
+import json
+import os
+import threading
+
+import pytest
+
+from backend.core import artefactos
+from backend.core.artefactos import AlmacenDisco, AlmacenEnCapas, AlmacenMemoria
+
+from .conftest import Reloj
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(artefactos, "time", reloj)
+    return reloj
+
+
+@pytest.fixture
+def disco(tmp_path):
+    almacen = AlmacenDisco(str(tmp_path), max_bytes=10, ttl=100)
+    yield almacen
+    almacen.cerrar()
+
+
+def test_memoria_desaloja_lo_usado_hace_mas_tiempo():
+    almacen = AlmacenMemoria(max_bytes=10)
+    almacen.guardar("a", "pdf", b"1234")
+    almacen.guardar("b", "pdf", b"1234")
+    assert almacen.obtener("a", "pdf") == b"1234"
+
+    almacen.guardar("c", "pdf", b"1234")
+
+    assert almacen.obtener("b", "pdf") is None
+    assert almacen.obtener("a", "pdf") == b"1234"
+    assert almacen.metricas() == {"aciertos": 2, "fallos": 1, "desalojos": 1, "bytes": 8}
+
+
+def test_memoria_ignora_artefactos_mas_grandes_que_el_presupuesto():
+    almacen = AlmacenMemoria(max_bytes=4)
+    almacen.guardar("a", "pdf", b"12345")
+    assert almacen.obtener("a", "pdf") is None
+    assert almacen.bytes_usados() == 0
+
+
+def test_memoria_vence_por_ttl(reloj):
+    almacen = AlmacenMemoria(ttl=10, intervalo_barrido=1)
+    almacen.guardar("a", "pdf", b"x")
+    reloj.avanzar(5)
+    assert almacen.obtener("a", "pdf") == b"x"
+
+    reloj.avanzar(5)
+    assert almacen.obtener("a", "pdf") is None
+    assert almacen.desalojos == 1
+
+
+def test_memoria_purga_vencidos_al_guardar(reloj):
+    almacen = AlmacenMemoria(ttl=10, intervalo_barrido=1)
+    almacen.guardar("a", "pdf", b"viejo")
+    reloj.avanzar(11)
+    almacen.guardar("b", "pdf", b"x")
+    assert almacen.bytes_usados() == 1
+    assert almacen.desalojos == 1
+
+
+def test_consultas_internas_no_afectan_metricas():
+    almacen = AlmacenMemoria()
+    almacen.guardar("a", "pdf", b"x")
+    almacen.obtener("a", "pdf", contar=False)
+    almacen.obtener("b", "pdf", contar=False)
+    assert (almacen.aciertos, almacen.fallos) == (0, 0)
+
+
+def test_disco_desaloja_y_borra_el_archivo(disco):
+    disco.guardar("a", "pdf", b"123456")
+    ruta_a, _ = disco.ruta("a", "pdf")
+    disco.guardar("b", "pdf", b"123456")
+
+    assert not os.path.exists(ruta_a)
+    assert disco.obtener("a", "pdf") is None
+    assert disco.obtener("b", "pdf") == b"123456"
+    assert disco.bytes_usados() == 6
+    assert disco.desalojos == 1
+
+
+def test_disco_ruta_devuelve_sha256(disco):
+    disco.guardar("a", "pdf", b"hola")
+    ruta, sha256 = disco.ruta("a", "pdf")
+    with open(ruta, "rb") as archivo:
+        assert archivo.read() == b"hola"
+    assert sha256 == "b221d9dbb083a7f33428d7c2a3c3198ae925614d70210e28716ccaa7cd4ddb79"
+
+
+def test_disco_vence_por_ttl_y_purga_al_guardar(reloj, tmp_path):
+    almacen = AlmacenDisco(str(tmp_path), ttl=10, intervalo_barrido=1)
+    almacen.guardar("a", "pdf", b"viejo")
+    ruta_a, _ = almacen.ruta("a", "pdf")
+    reloj.avanzar(11)
+
+    almacen.guardar("b", "pdf", b"nuevo")
+
+    assert not os.path.exists(ruta_a)
+    assert almacen.bytes_usados() == 5
+    almacen.cerrar()
+
+
+def test_disco_retiene_archivo_desalojado_hasta_liberarlo(disco):
+    disco.guardar("a", "pdf", b"123456")
+    ruta_a, _ = disco.ruta("a", "pdf", retener=True)
+
+    disco.guardar("b", "pdf", b"123456")
+
+    assert os.path.exists(ruta_a)
+    assert disco.ruta("a", "pdf") is None
+    disco.liberar("a", "pdf")
+    assert not os.path.exists(ruta_a)
+
+
+def test_disco_recupera_indice_al_reabrir(tmp_path):
+    almacen = AlmacenDisco(str(tmp_path), max_bytes=12)
+    almacen.guardar("a", "pdf", b"1234")
+    almacen.guardar("b", "pdf", b"1234")
+    almacen.guardar("c", "pdf", b"1234")
+    almacen.guardar("b", "pdf", b"5678")
+    almacen.cerrar()
+    # Una escritura cortada deja una línea incompleta al final del registro
+    with open(almacen.ruta_indice, "a", encoding="utf-8") as registro:
+        registro.write('{"nombre": "cort')
+    # Un archivo borrado a mano no debe volver a aparecer
+    os.remove(almacen.ruta("c", "pdf")[0])
+
+    reabierto = AlmacenDisco(str(tmp_path), max_bytes=12)
+
+    assert reabierto.obtener("a", "pdf") == b"1234"
+    assert reabierto.obtener("b", "pdf") == b"5678"
+    assert reabierto.obtener("c", "pdf") is None
+    assert reabierto.bytes_usados() == 8
+    with open(reabierto.ruta_indice, encoding="utf-8") as registro:
+        assert len([json.loads(linea) for linea in registro]) == 2
+    reabierto.cerrar()
+
+
+def test_disco_borra_archivos_huerfanos_al_abrir(tmp_path):
+    almacen = AlmacenDisco(str(tmp_path))
+    almacen.guardar("a", "pdf", b"1234")
+    almacen.cerrar()
+    # Restos de un corte: archivo sin línea en el índice y temporales
+    (tmp_path / AlmacenDisco._nombre("b", "pdf")).write_bytes(b"huerfano")
+    (tmp_path / (AlmacenDisco._nombre("c", "pdf") + ".tmp")).write_bytes(b"cortado")
+    (tmp_path / "indice.jsonl.tmp").write_text("")
+
+    reabierto = AlmacenDisco(str(tmp_path))
+
+    assert sorted(os.listdir(tmp_path)) == sorted(["indice.jsonl", AlmacenDisco._nombre("a", "pdf")])
+    assert reabierto.obtener("a", "pdf") == b"1234"
+    assert reabierto.bytes_usados() == 4
+    reabierto.cerrar()
+
+
+def test_disco_cerrado_no_falla_al_guardar(tmp_path):
+    almacen = AlmacenDisco(str(tmp_path))
+    almacen.cerrar()
+    almacen.guardar("a", "pdf", b"1234")
+
+    # Lo guardado sin registrar no sobrevive a un reinicio
+    reabierto = AlmacenDisco(str(tmp_path))
+    assert reabierto.obtener("a", "pdf") is None
+    assert os.listdir(tmp_path) == ["indice.jsonl"]
+    reabierto.cerrar()
+
+
+def test_capas_sube_a_memoria_lo_encontrado_en_disco(tmp_path):
+    disco = AlmacenDisco(str(tmp_path))
+    disco.guardar("a", "pdf", b"x")
+    almacen = AlmacenEnCapas(AlmacenMemoria(), disco)
+
+    assert almacen.obtener("a", "pdf") == b"x"
+    assert almacen.memoria.obtener("a", "pdf", contar=False) == b"x"
+    assert almacen.obtener("b", "pdf") is None
+    metricas = almacen.metricas()
+    assert (metricas["aciertos"], metricas["fallos"]) == (1, 1)
+    disco.cerrar()
+
+
+def test_capas_cuenta_consultas_concurrentes(tmp_path):
+    disco = AlmacenDisco(str(tmp_path))
+    almacen = AlmacenEnCapas(AlmacenMemoria(), disco)
+    almacen.guardar("a", "pdf", b"x")
+
+    def consultar():
+        for _ in range(500):
+            almacen.obtener("a", "pdf")
+            almacen.obtener("b", "pdf")
+
+    hilos = [threading.Thread(target=consultar) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    metricas = almacen.metricas()
+    assert (metricas["aciertos"], metricas["fallos"]) == (4000, 4000)
+    disco.cerrar()
@@ -0,0 +1,129 @@
+"""Pruebas de la generación diferida de reportes."""
+
+import threading
+import time
+from collections import OrderedDict
+
+import pytest
+
+from backend.core import descargas
+from backend.core.artefactos import AlmacenDisco, AlmacenEnCapas, AlmacenMemoria
+
+
+@pytest.fixture
+def generados(monkeypatch, tmp_path):
+    """Almacén y registro de descargas propios; devuelve los IDs generados."""
+    disco = AlmacenDisco(str(tmp_path))
+    monkeypatch.setattr(descargas, "_almacen", AlmacenEnCapas(AlmacenMemoria(), disco))
+    monkeypatch.setattr(descargas, "_trabajos", OrderedDict())
+    llamadas = []
+
+    def generar_lento(descarga_id):
+        llamadas.append(descarga_id)
+        time.sleep(0.1)
+        return f"PDF {descarga_id}".encode("utf-8")
+
+    monkeypatch.setitem(descargas._GENERADORES, "pdf", generar_lento)
+    yield llamadas
+    disco.cerrar()
+
+
+def test_iniciar_descarga_no_genera_reportes(generados):
+    descarga_id = descargas.iniciar_descarga(precalcular=False)
+    assert generados == []
+    assert descargas.metricas_almacen()["bytes"] == 0
+
+    assert descargas.obtener_pdf(descarga_id) == f"PDF {descarga_id}".encode("utf-8")
+    assert generados == [descarga_id]
+
+
+def test_descarga_inexistente_no_genera(generados):
+    assert descargas.obtener_pdf("no-existe") is None
+    assert descargas.obtener_archivo("no-existe", "pdf") is None
+    assert generados == []
+
+
+def test_pedidos_simultaneos_generan_una_sola_vez(generados):
+    descarga_id = descargas.iniciar_descarga(precalcular=False)
+    resultados = []
+
+    def pedir_pdf():
+        resultados.append(descargas.obtener_pdf(descarga_id))
+
+    def pedir_archivo():
+        resultados.append(descargas.obtener_archivo(descarga_id, "pdf")[1])
+
+    hilos = [threading.Thread(target=pedir_pdf) for _ in range(5)]
+    hilos += [threading.Thread(target=pedir_archivo) for _ in range(5)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert generados == [descarga_id]
+    assert len(resultados) == 10
+    assert descargas._en_curso == {}
+
+
+def test_error_al_generar_llega_a_todos_los_que_esperan(generados, monkeypatch):
+    descarga_id = descargas.iniciar_descarga(precalcular=False)
+
+    def fallar(_):
+        time.sleep(0.1)
+        raise RuntimeError("sin datos")
+
+    monkeypatch.setitem(descargas._GENERADORES, "pdf", fallar)
+    errores = []
+
+    def pedir():
+        try:
+            descargas.obtener_pdf(descarga_id)
+        except RuntimeError as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=pedir) for _ in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert len(errores) == 4
+    assert descargas._en_curso == {}
+
+
+def test_registro_de_descargas_acotado(generados, monkeypatch):
+    monkeypatch.setattr(descargas, "_MAX_TRABAJOS", 2)
+    primera = descargas.iniciar_descarga(precalcular=False)
+    descargas.iniciar_descarga(precalcular=False)
+    ultima = descargas.iniciar_descarga(precalcular=False)
+
+    assert len(descargas._trabajos) == 2
+    assert descargas.obtener_pdf(primera) is None
+    assert descargas.obtener_pdf(ultima) is not None
+
+
+def test_registro_de_descargas_vence(generados, monkeypatch):
+    monkeypatch.setattr(descargas, "_TTL_TRABAJOS", 0.05)
+    descarga_id = descargas.iniciar_descarga(precalcular=False)
+    time.sleep(0.1)
+    assert descargas.obtener_pdf(descarga_id) is None
+    assert descarga_id not in descargas._trabajos
+
+
+def test_metricas_no_cuentan_consultas_internas(generados):
+    descarga_id = descargas.iniciar_descarga(precalcular=False)
+    descargas.obtener_archivo(descarga_id, "pdf")
+    descargas.obtener_archivo(descarga_id, "pdf")
+    descargas.obtener_pdf("no-existe")
+
+    metricas = descargas.metricas_almacen()
+    assert (metricas["aciertos"], metricas["fallos"]) == (1, 2)
+
+
+def test_precalcular_genera_en_segundo_plano(generados):
+    descarga_id = descargas.iniciar_descarga(precalcular=True)
+    limite = time.monotonic() + 2
+    while descargas._almacen.obtener(descarga_id, "pdf", contar=False) is None:
+        assert time.monotonic() < limite
+        time.sleep(0.01)
+    assert generados == [descarga_id]
@@ -0,0 +1,156 @@
+"""Pruebas del consultor de licencias."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from backend.core import licencias
+from backend.core.licencias import ConsultorLicencias, ErrorLicencias
+
+from .conftest import Reloj
+
+
+def _consultor(responder, **opciones) -> ConsultorLicencias:
+    """Consultor cuyas peticiones responde ``responder(request)``."""
+    consultor = ConsultorLicencias(**opciones)
+    consultor._cliente = httpx.AsyncClient(
+        base_url=consultor.base_url, transport=httpx.MockTransport(responder)
+    )
+    return consultor
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(licencias, "time", reloj)
+    return reloj
+
+
+def test_reutiliza_la_licencia_hasta_que_vence(reloj):
+    pedidos = []
+
+    def responder(request):
+        pedidos.append(request.url.path)
+        return httpx.Response(200, json={"active": True})
+
+    consultor = _consultor(responder, ttl=60)
+
+    async def consultar():
+        primera = await consultor.obtener("abc")
+        reloj.avanzar(59)
+        segunda = await consultor.obtener("abc")
+        reloj.avanzar(1)
+        tercera = await consultor.obtener("abc")
+        await consultor.cerrar()
+        return primera, segunda, tercera
+
+    assert asyncio.run(consultar()) == ({"active": True},) * 3
+    assert pedidos == ["/licenses/abc.json"] * 2
+    assert (consultor.aciertos, consultor.fallos) == (1, 2)
+
+
+def test_recuerda_ids_inexistentes_con_ttl_negativo(reloj):
+    pedidos = []
+
+    def responder(request):
+        pedidos.append(request.url.path)
+        return httpx.Response(200, content=b"null")
+
+    consultor = _consultor(responder, ttl=60, ttl_negativo=10)
+
+    async def consultar():
+        resultados = [await consultor.obtener("nada")]
+        reloj.avanzar(9)
+        resultados.append(await consultor.obtener("nada"))
+        reloj.avanzar(1)
+        resultados.append(await consultor.obtener("nada"))
+        await consultor.cerrar()
+        return resultados
+
+    assert asyncio.run(consultar()) == [None, None, None]
+    assert len(pedidos) == 2
+
+
+def test_consultas_simultaneas_comparten_una_peticion():
+    pedidos = []
+
+    async def responder(request):
+        pedidos.append(request.url.path)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"active": False})
+
+    consultor = _consultor(responder)
+
+    async def consultar():
+        resultados = await asyncio.gather(*(consultor.obtener("abc") for _ in range(10)))
+        await consultor.cerrar()
+        return resultados
+
+    assert asyncio.run(consultar()) == [{"active": False}] * 10
+    assert len(pedidos) == 1
+    assert consultor._en_curso == {}
+
+
+def test_cancelar_una_consulta_no_cancela_a_las_demas():
+    async def responder(request):
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"active": True})
+
+    consultor = _consultor(responder)
+
+    async def consultar():
+        cancelada = asyncio.ensure_future(consultor.obtener("abc"))
+        otra = asyncio.ensure_future(consultor.obtener("abc"))
+        await asyncio.sleep(0)
+        cancelada.cancel()
+        resultado = await otra
+        await consultor.cerrar()
+        return resultado
+
+    assert asyncio.run(consultar()) == {"active": True}
+
+
+def test_errores_no_se_guardan_en_cache():
+    respuestas = [httpx.Response(500), httpx.Response(200, json={"active": True})]
+    consultor = _consultor(lambda request: respuestas.pop(0))
+
+    async def consultar():
+        with pytest.raises(ErrorLicencias) as error:
+            await consultor.obtener("abc")
+        resultado = await consultor.obtener("abc")
+        await consultor.cerrar()
+        return error.value, resultado
+
+    error, resultado = asyncio.run(consultar())
+    assert error.status_code == 500
+    assert resultado == {"active": True}
+
+
+def test_falla_de_red_responde_503():
+    def responder(request):
+        raise httpx.ConnectError("sin conexión", request=request)
+
+    consultor = _consultor(responder)
+
+    async def consultar():
+        try:
+            await consultor.obtener("abc")
+        finally:
+            await consultor.cerrar()
+
+    with pytest.raises(ErrorLicencias) as error:
+        asyncio.run(consultar())
+    assert error.value.status_code == 503
+
+
+def test_cache_acotada_descarta_la_mas_antigua():
+    consultor = _consultor(lambda request: httpx.Response(200, json={}), max_entradas=2)
+
+    async def consultar():
+        for licencia_id in ("a", "b", "c"):
+            await consultor.obtener(licencia_id)
+        await consultor.cerrar()
+
+    asyncio.run(consultar())
+    assert list(consultor._cache) == ["b", "c"]
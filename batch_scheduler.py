@@ -0,0 +1,216 @@
+import os
+import queue
+import threading
+
+from selenium.webdriver.common.by import By
+
+from anses_engine import ANSESEngine, EngineObserver
+
+
+class BatchJob:
+    """Descarga de un rango de períodos de un beneficio con las credenciales de un usuario"""
+
+    def __init__(self, usuario, clave, beneficio, mes_inicial, anio_inicial, mes_final, anio_final,
+                 carpeta_descargas):
+        self.usuario = usuario
+        self.clave = clave
+        self.beneficio = beneficio
+        self.mes_inicial = mes_inicial
+        self.anio_inicial = anio_inicial
+        self.mes_final = mes_final
+        self.anio_final = anio_final
+        self.carpeta_descargas = carpeta_descargas
+
+    def __repr__(self):
+        return (f"BatchJob({self.usuario!r}, {self.beneficio!r}, "
+                f"{self.mes_inicial:02d}/{self.anio_inicial}-{self.mes_final:02d}/{self.anio_final})")
+
+
+class BatchObserver:
+    """Avance por trabajo del planificador; los métodos se llaman desde los hilos de cada navegador"""
+
+    def job_started(self, trabajo, navegador):
+        pass
+
+    def job_progress(self, trabajo, procesados, total):
+        pass
+
+    def job_finished(self, trabajo, resultado):
+        pass
+
+
+class _JobObserver(EngineObserver):
+    """Traduce las notificaciones del motor al trabajo que está ejecutando"""
+
+    def __init__(self, observador, trabajo):
+        self.observador = observador
+        self.trabajo = trabajo
+
+    def update_progress(self, procesados, total):
+        self.observador.job_progress(self.trabajo, procesados, total)
+
+
+class _BrowserSlot:
+    """Un motor con su navegador abierto y el usuario con el que está logueado"""
+
+    def __init__(self, numero, motor):
+        self.numero = numero
+        self.motor = motor
+        self.esperas = None
+        self.usuario = None
+
+    def preparar(self, carpeta_descargas):
+        """Abre el navegador la primera vez; después solo redirige las descargas"""
+        carpeta_descargas = os.path.abspath(carpeta_descargas)
+        if self.motor.driver is None:
+            self.esperas = self.motor.iniciar_navegador(carpeta_descargas)
+            self.usuario = None
+        else:
+            self.motor.cambiar_carpeta_descargas(carpeta_descargas)
+
+    def asegurar_sesion(self, usuario, clave):
+        """Deja el formulario de recibos abierto con la sesión del usuario pedido
+
+        Returns:
+            True si el formulario quedó disponible.
+        """
+        if self.usuario == usuario and self._formulario_disponible():
+            return True
+        if self.usuario is not None:
+            self.motor.cerrar_sesion()
+        self.usuario = None
+        if self.motor.login(self.esperas, usuario, clave) and self.motor.abrir_formulario_recibos(self.esperas):
+            self.usuario = usuario
+            return True
+        return False
+
+    def _formulario_disponible(self):
+        if self.motor._formulario_recibos_activo():
+            return True
+        try:
+            self.esperas.frame_containing((By.ID, "ctl00_PlaceContent_ddl_Beneficios"), timeout=5)
+            return True
+        except Exception:
+            return False  # La sesión venció: hay que volver a ingresar
+
+    def descartar(self):
+        """Cierra el navegador tras un error; el próximo trabajo abre uno nuevo"""
+        self.motor.cerrar_navegador()
+        self.esperas = None
+        self.usuario = None
+
+
+class BatchScheduler:
+    """Reparte trabajos de descarga entre un conjunto de navegadores que se mantienen abiertos
+
+    Los trabajos se agrupan por usuario y cada grupo se ejecuta completo en un
+    mismo navegador, de modo que el login (y su CAPTCHA) se hace una vez por
+    usuario y no por beneficio. Un usuario nunca se usa en dos navegadores a la
+    vez para no invalidar su propia sesión. Todos los motores comparten la
+    caché local de recibos.
+    """
+
+    def __init__(self, crear_motor, navegadores=2, observador=None, cache=None):
+        """
+        Args:
+            crear_motor: Callable sin argumentos que devuelve un ANSESEngine configurado.
+            navegadores: Cantidad máxima de navegadores abiertos en paralelo.
+            observador: BatchObserver que recibe el avance de cada trabajo.
+            cache: ReceiptCache compartida entre los motores (opcional).
+        """
+        self.crear_motor = crear_motor
+        self.navegadores = max(1, navegadores)
+        self.observador = observador or BatchObserver()
+        self.cache = cache
+        self._slots = []
+        self._lock = threading.Lock()
+        self._detenido = False
+
+    def run(self, trabajos):
+        """Ejecuta los trabajos y devuelve sus resultados en el mismo orden"""
+        self._detenido = False
+        grupos = {}
+        for indice, trabajo in enumerate(trabajos):
+            grupos.setdefault(trabajo.usuario, []).append(indice)
+
+        cola = queue.Queue()
+        for indices in grupos.values():
+            cola.put(indices)
+
+        resultados = [None] * len(trabajos)
+        hilos = [
+            threading.Thread(target=self._worker, args=(numero, cola, trabajos, resultados), daemon=True)
+            for numero in range(1, min(self.navegadores, len(grupos)) + 1)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        for indice, resultado in enumerate(resultados):
+            if resultado is None:
+                resultado = ANSESEngine.nuevo_resultado(trabajos[indice].beneficio, trabajos[indice].carpeta_descargas)
+                resultado['error'] = "Cancelado"
+                resultados[indice] = resultado
+        return resultados
+
+    def stop(self):
+        """Cancela los trabajos pendientes y corta los que están en curso"""
+        self._detenido = True
+        with self._lock:
+            for slot in self._slots:
+                slot.motor.stop()
+
+    def _worker(self, numero, cola, trabajos, resultados):
+        motor = self.crear_motor()
+        if self.cache is not None:
+            motor.cache_compartida = self.cache
+        slot = _BrowserSlot(numero, motor)
+        with self._lock:
+            self._slots.append(slot)
+        try:
+            while not self._detenido:
+                try:
+                    indices = cola.get_nowait()
+                except queue.Empty:
+                    break
+                for indice in indices:
+                    if self._detenido:
+                        break
+                    resultados[indice] = self._ejecutar(slot, trabajos[indice])
+        finally:
+            slot.descartar()
+            with self._lock:
+                self._slots.remove(slot)
+
+    def _ejecutar(self, slot, trabajo):
+        motor = slot.motor
+        motor.observador = _JobObserver(self.observador, trabajo)
+        resultado = motor.nuevo_resultado(trabajo.beneficio, trabajo.carpeta_descargas)
+        self.observador.job_started(trabajo, slot.numero)
+
+        motor.is_running = True
+        try:
+            if os.path.exists(trabajo.carpeta_descargas):
+                motor.limpiar_carpeta_completa(trabajo.carpeta_descargas)
+            else:
+                os.makedirs(trabajo.carpeta_descargas)
+
+            slot.preparar(trabajo.carpeta_descargas)
+            if not slot.asegurar_sesion(trabajo.usuario, trabajo.clave):
+                resultado['error'] = "No se pudo ingresar con el usuario"
+            else:
+                motor.descargar_rango(
+                    slot.esperas, trabajo.beneficio,
+                    trabajo.mes_inicial, trabajo.anio_inicial, trabajo.mes_final, trabajo.anio_final,
+                    trabajo.carpeta_descargas, resultado
+                )
+        except Exception as e:
+            motor.console.log(f"Error en el navegador {slot.numero} con el beneficio {trabajo.beneficio}: {e}", "error")
+            resultado['error'] = str(e)
+            slot.descartar()
+        finally:
+            motor.is_running = False
+
+        self.observador.job_finished(trabajo, resultado)
+        return resultado
@@ -3,7 +3,23 @@ import customtkinter as ctk
 
 
 class ConsoleWidget(ctk.CTkTextbox):
-    def __init__(self, parent, **kwargs):
+    """Consola de mensajes con tamaño acotado
+
+    Cuenta sus propias líneas en lugar de releer el texto, usa un tag por
+    severidad (no uno por línea) y recorta las líneas viejas de a lotes. Los
+    mensajes se acumulan y se insertan juntos en el próximo ciclo ocioso de
+    Tk, así una ráfaga de cientos de líneas produce un solo desplazamiento.
+    """
+
+    COLORES = {
+        "info": "#F8FAFC",
+        "warning": "#FBBF24",
+        "error": "#F87171",
+        "success": "#34D399",
+        "process": "#60A5FA"
+    }
+
+    def __init__(self, parent, max_lineas=100, lote_recorte=50, **kwargs):
         super().__init__(parent, **kwargs)
         self.configure(
             font=ctk.CTkFont(family="Consolas", size=12),
@@ -13,28 +29,49 @@ class ConsoleWidget(ctk.CTkTextbox):
             border_width=2
         )
         self.log_count = 0
+        self.max_lineas = max_lineas
+        self.lote_recorte = lote_recorte
+        self._lineas = 0
+        self._pendientes = []
+        self._volcado_programado = False
+
+        for tipo, color in self.COLORES.items():
+            self.tag_config(tipo, foreground=color)
 
     def log(self, mensaje, tipo="info"):
         timestamp = datetime.now().strftime("%H:%M:%S")
         self.log_count += 1
 
-        color_map = {
-            "info": "#F8FAFC",
-            "warning": "#FBBF24",
-            "error": "#F87171",
-            "success": "#34D399",
-            "process": "#60A5FA"
-        }
+        tag = tipo if tipo in self.COLORES else "info"
+        self._pendientes.append((f"[{timestamp}] [{self.log_count:03d}] {mensaje}\n", tag))
+        if not self._volcado_programado:
+            self._volcado_programado = True
+            self.after_idle(self._volcar)
+
+    def _volcar(self):
+        """Inserta los mensajes acumulados y recorta si se pasó del límite"""
+        self._volcado_programado = False
+        pendientes, self._pendientes = self._pendientes, []
+        if not pendientes:
+            return
+
+        # Si la ráfaga supera el límite, las primeras líneas ni se insertan
+        if len(pendientes) > self.max_lineas:
+            pendientes = pendientes[-self.max_lineas:]
 
-        color = color_map.get(tipo, "#F8FAFC")
+        for linea, tag in pendientes:
+            self.insert("end", linea, tag)
+            self._lineas += linea.count("\n")
 
-        line = f"[{timestamp}] [{self.log_count:03d}] {mensaje}\n"
-        tag = f"log_{self.log_count}"
+        if self._lineas > self.max_lineas + self.lote_recorte:
+            sobrantes = self._lineas - self.max_lineas
+            self.delete("1.0", f"{sobrantes + 1}.0")
+            self._lineas -= sobrantes
 
-        self.insert("end", line, tag)
-        self.tag_config(tag, foreground=color)
         self.see("end")
 
-        lines = self.get("1.0", "end").split('\n')
-        if len(lines) > 100:
-            self.delete("1.0", f"{len(lines)-100}.0")
+    def clear(self):
+        """Vacía la consola (los mensajes pendientes también se descartan)"""
+        self._pendientes = []
+        self.delete("1.0", "end")
+        self._lineas = 0
@@ -0,0 +1,153 @@
+import ctypes
+import ctypes.util
+import glob
+import os
+import select
+import struct
+import sys
+import time
+
+# Constantes de inotify(7)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENTO = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Vigilancia de un directorio con inotify (solo Linux)"""
+
+    def __init__(self, carpeta):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falló")
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(carpeta), _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE)
+        if wd < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch falló")
+
+    def wait(self, timeout):
+        """Bloquea hasta el próximo evento o el timeout
+
+        Returns:
+            Nombres de los archivos que se cerraron tras escribirse o que
+            llegaron por rename (Chrome renombra el ``.crdownload`` al terminar).
+        """
+        listos, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if not listos:
+            return set()
+        try:
+            datos = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        nombres = set()
+        offset = 0
+        while offset + _EVENTO.size <= len(datos):
+            _, mascara, _, largo = _EVENTO.unpack_from(datos, offset)
+            offset += _EVENTO.size
+            if mascara & (_IN_CLOSE_WRITE | _IN_MOVED_TO):
+                nombres.add(os.fsdecode(datos[offset:offset + largo].rstrip(b"\0")))
+            offset += largo
+        return nombres
+
+    def close(self):
+        os.close(self.fd)
+
+
+class DownloadWatcher:
+    """Detecta PDFs nuevos en la carpeta de descargas y avisa cuando están completos
+
+    En Linux despierta con eventos de inotify; en el resto de los sistemas
+    (o si inotify no está disponible) consulta la carpeta cada ``poll``
+    segundos. Un archivo se considera terminado cuando Chrome ya no tiene su
+    ``.crdownload``, el tamaño no cambió entre dos observaciones (o inotify
+    informó el cierre/rename del archivo) y el final contiene ``%%EOF``.
+    """
+
+    def __init__(self, carpeta, extension=".pdf", excluir=("todos_los_recibos.pdf",), poll=0.2):
+        self.carpeta = carpeta
+        self.extension = extension
+        self.excluir = set(excluir)
+        self.poll = poll
+        self._inotify = None
+        if sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify(carpeta)
+            except (OSError, AttributeError, TypeError):
+                self._inotify = None  # Se usa el sondeo como respaldo
+
+    @property
+    def event_driven(self):
+        return self._inotify is not None
+
+    def snapshot(self):
+        """Conjunto de archivos presentes antes de disparar una descarga"""
+        return set(self._candidatos())
+
+    def _candidatos(self):
+        for ruta in glob.glob(os.path.join(self.carpeta, "*" + self.extension)):
+            if os.path.basename(ruta) not in self.excluir:
+                yield ruta
+
+    def _terminado(self, ruta, tamanios, confirmados):
+        """Chequea los criterios de finalización; registra el tamaño observado"""
+        if os.path.exists(ruta + ".crdownload"):
+            return False
+        try:
+            tamanio = os.path.getsize(ruta)
+        except OSError:
+            return False
+        anterior = tamanios.get(ruta)
+        tamanios[ruta] = tamanio
+        estable = anterior == tamanio or os.path.basename(ruta) in confirmados
+        if tamanio == 0 or not estable:
+            return False
+        try:
+            with open(ruta, "rb") as archivo:
+                archivo.seek(max(tamanio - 1024, 0))
+                return b"%%EOF" in archivo.read()
+        except OSError:
+            return False
+
+    def wait_for_new(self, existentes, timeout=20):
+        """Espera un archivo nuevo (no incluido en ``existentes``) completamente descargado
+
+        Returns:
+            Ruta del archivo terminado, o None si no apareció antes del timeout.
+        """
+        limite = time.monotonic() + timeout
+        tamanios = {}
+        confirmados = set()
+        while True:
+            nuevos = [ruta for ruta in self._candidatos() if ruta not in existentes]
+            # El más reciente primero: es el que corresponde al último click
+            nuevos.sort(key=self._mtime, reverse=True)
+            for ruta in nuevos:
+                if self._terminado(ruta, tamanios, confirmados):
+                    return ruta
+
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return None
+            if self._inotify is not None:
+                # Sin nada a medio descargar se duerme hasta el próximo evento del directorio;
+                # con un archivo en curso se vuelve a mirar como mucho tras un sondeo
+                espera = restante if not tamanios else min(self.poll, restante)
+                confirmados |= self._inotify.wait(espera)
+            else:
+                time.sleep(min(self.poll, restante))
+
+    @staticmethod
+    def _mtime(ruta):
+        try:
+            return os.path.getmtime(ruta)
+        except OSError:
+            return 0
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
@@ -0,0 +1,184 @@
+from copy import copy
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+
+from excel_styler import ExcelStyler
+
+
+class SheetIndex:
+    """Índice persistente de una hoja: concepto -> columna y período -> fila"""
+
+    def __init__(self, worksheet):
+        self.conceptos = {}
+        self.periodos = {}
+        self.total_column = None
+        self.ultima_columna = 1  # Última columna de concepto (1 = PERÍODO)
+        self.ultima_fila = worksheet.max_row
+        self._leer_hoja(worksheet)
+
+    def _leer_hoja(self, worksheet):
+        """Recorre la hoja una única vez (headers en fila 3, períodos desde fila 4)"""
+        for col in range(2, worksheet.max_column + 1):
+            header_value = worksheet.cell(row=3, column=col).value
+            if header_value == "TOTAL":
+                self.total_column = col
+                break
+            elif header_value:
+                self.conceptos[header_value] = col
+                self.ultima_columna = col
+
+        for row in range(4, self.ultima_fila + 1):
+            periodo_cell = worksheet.cell(row=row, column=1).value
+            if periodo_cell:
+                self.periodos[str(periodo_cell)] = row
+
+    @property
+    def max_column(self):
+        return max(self.ultima_columna, self.total_column or 0)
+
+    def reset(self):
+        """Vacía el índice tras crear la estructura inicial de la hoja (filas 1 a 3)"""
+        self.conceptos = {}
+        self.periodos = {}
+        self.total_column = None
+        self.ultima_columna = 1
+        self.ultima_fila = 3
+
+    def add_concept(self, concepto):
+        """Asigna la siguiente columna libre a un concepto nuevo"""
+        self.ultima_columna += 1
+        self.conceptos[concepto] = self.ultima_columna
+        return self.ultima_columna
+
+    def add_period(self, periodo):
+        """Asigna la siguiente fila libre a un período nuevo"""
+        self.ultima_fila += 1
+        self.periodos[str(periodo)] = self.ultima_fila
+        return self.ultima_fila
+
+
+class ExcelWorkbookBuilder:
+    """Mantiene el libro de análisis en memoria durante toda la descarga"""
+
+    def __init__(self, ruta_excel, checkpoint_cada=0):
+        self.ruta_excel = ruta_excel
+        # Cada cuántos períodos se vuelca el libro a disco (0 = solo al final)
+        self.checkpoint_cada = checkpoint_cada
+        self.periodos_sin_guardar = 0
+        self.dirty = False
+        self.wb = self._abrir_workbook()
+        # Un único registro de estilos por libro
+        self.styler = ExcelStyler()
+        # Hojas que se escriben en modo streaming al guardar: [(nombre, escritor)]
+        self.hojas_streaming = []
+        # Índices por hoja, construidos la primera vez que se usan
+        self.indices = {}
+
+    def _abrir_workbook(self):
+        """Carga el libro existente o crea uno nuevo sin la hoja por defecto"""
+        try:
+            return load_workbook(self.ruta_excel)
+        except FileNotFoundError:
+            wb = Workbook()
+            if 'Sheet' in wb.sheetnames:
+                wb.remove(wb['Sheet'])
+            return wb
+
+    def has_sheet(self, nombre):
+        return nombre in self.wb.sheetnames
+
+    def get_sheet(self, nombre):
+        """Devuelve la hoja pedida, creándola si no existe"""
+        self.dirty = True
+        if nombre not in self.wb.sheetnames:
+            return self.wb.create_sheet(nombre)
+        return self.wb[nombre]
+
+    def sheet_index(self, nombre):
+        """Devuelve el índice de conceptos y períodos de la hoja"""
+        indice = self.indices.get(nombre)
+        if indice is None:
+            indice = SheetIndex(self.get_sheet(nombre))
+            self.indices[nombre] = indice
+        return indice
+
+    def add_streamed_sheet(self, nombre, escritor):
+        """Registra una hoja que se generará fila por fila al guardar
+
+        El escritor recibe una hoja write-only y debe configurar columnas,
+        paneles y filtros antes de emitir las filas en orden.
+        """
+        if nombre in self.wb.sheetnames:
+            self.wb.remove(self.wb[nombre])
+            self.indices.pop(nombre, None)
+        self.hojas_streaming = [(n, e) for n, e in self.hojas_streaming if n != nombre]
+        self.hojas_streaming.append((nombre, escritor))
+        self.dirty = True
+
+    def register_period(self):
+        """Registra un período agregado y guarda si corresponde un checkpoint
+
+        Returns:
+            True si se escribió un checkpoint a disco.
+        """
+        self.periodos_sin_guardar += 1
+        if self.checkpoint_cada and self.periodos_sin_guardar >= self.checkpoint_cada:
+            self.save()
+            return True
+        return False
+
+    def save(self):
+        """Escribe el libro completo a disco"""
+        if self.hojas_streaming:
+            self._save_write_only()
+        else:
+            self.wb.save(self.ruta_excel)
+        self.periodos_sin_guardar = 0
+        self.dirty = False
+
+    def close(self):
+        """Guarda los cambios pendientes, si los hay"""
+        if self.dirty:
+            self.save()
+
+    def _save_write_only(self):
+        """Guarda con un libro write-only: copia las hojas en memoria y emite las de streaming"""
+        wb_stream = Workbook(write_only=True)
+        for ws in self.wb.worksheets:
+            self._copiar_hoja(ws, wb_stream.create_sheet(ws.title))
+        for nombre, escritor in self.hojas_streaming:
+            escritor(wb_stream.create_sheet(nombre))
+        wb_stream.save(self.ruta_excel)
+
+    def _copiar_hoja(self, origen, destino):
+        """Copia valores, estilos y configuración de una hoja normal a una write-only"""
+        for clave, dim in origen.column_dimensions.items():
+            if dim.width:
+                destino.column_dimensions[clave].width = dim.width
+        for fila, dim in origen.row_dimensions.items():
+            if dim.height:
+                destino.row_dimensions[fila].height = dim.height
+        destino.freeze_panes = origen.freeze_panes
+        destino.auto_filter.ref = origen.auto_filter.ref
+
+        # Los estilos se resuelven una vez por style_id y se comparten entre celdas
+        for fila in origen.iter_rows():
+            destino.append([self._copiar_celda(celda, destino) for celda in fila])
+
+    def _copiar_celda(self, celda, destino):
+        if not celda.has_style:
+            if celda.value is None:
+                return None
+            return WriteOnlyCell(destino, value=celda.value)
+
+        nueva = WriteOnlyCell(destino, value=celda.value)
+        self.styler.apply_cached(nueva, ('copia', celda.style_id), lambda c: self._copiar_estilo(celda, c))
+        return nueva
+
+    def _copiar_estilo(self, origen, destino):
+        destino.font = copy(origen.font)
+        destino.fill = copy(origen.fill)
+        destino.border = copy(origen.border)
+        destino.alignment = copy(origen.alignment)
+        destino.number_format = origen.number_format
@@ -1,3 +1,5 @@
+from copy import copy
+
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment, NamedStyle
 
 class ExcelStyler:
@@ -21,77 +23,123 @@ class ExcelStyler:
             'deducciones_bg': 'FFEF4444', # Rojo para sección deducciones
             'totales_bg': 'FF6366F1'    # Púrpura para totales
         }
+        # Registro de objetos de estilo: se crean una vez y se reutilizan por referencia
+        self._cache = {}
 
-    def create_header_style(self):
-        """Estilo para headers de tabla"""
-        header_style = NamedStyle(name="header_style")
-        header_style.font = Font(
-            name='Calibri',
-            size=12,
-            bold=True,
-            color='FFFFFFFF'
+    def _cached(self, clave, factory):
+        """Devuelve el estilo registrado para la clave, creándolo la primera vez"""
+        estilo = self._cache.get(clave)
+        if estilo is None:
+            estilo = factory()
+            self._cache[clave] = estilo
+        return estilo
+
+    def apply_cached(self, cell, clave, aplicar):
+        """Aplica un estilo compuesto registrado como NamedStyle del libro
+
+        La primera celda con esa clave se estiliza con ``aplicar(cell)`` y el
+        resultado queda registrado en su libro; las siguientes solo asignan el
+        estilo por nombre, sin volver a buscar fuente, relleno, borde y
+        alineación en las tablas del libro.
+        """
+        nombre = "anses_" + "_".join(str(parte) for parte in clave)
+        libro = cell.parent.parent
+        if nombre not in libro.named_styles:
+            aplicar(cell)
+            estilo = NamedStyle(name=nombre)
+            estilo.font = copy(cell.font)
+            estilo.fill = copy(cell.fill)
+            estilo.border = copy(cell.border)
+            estilo.alignment = copy(cell.alignment)
+            estilo.protection = copy(cell.protection)
+            estilo.number_format = cell.number_format
+            libro.add_named_style(estilo)
+        cell.style = nombre
+
+    def font(self, size=11, bold=False, italic=False, color='FF1F2937'):
+        """Fuente Calibri compartida"""
+        return self._cached(
+            ('font', size, bold, italic, color),
+            lambda: Font(name='Calibri', size=size, bold=bold, italic=italic, color=color)
+        )
+
+    def fill(self, color):
+        """Relleno sólido compartido"""
+        return self._cached(
+            ('fill', color),
+            lambda: PatternFill(start_color=color, end_color=color, fill_type='solid')
         )
-        header_style.fill = PatternFill(
-            start_color=self.colors['header_bg'],
-            end_color=self.colors['header_bg'],
-            fill_type='solid'
+
+    def side(self, style, color):
+        """Lado de borde compartido"""
+        return self._cached(('side', style, color), lambda: Side(style=style, color=color))
+
+    def border(self, left, right, top, bottom):
+        """Borde compartido; cada lado es una tupla (estilo, color)"""
+        return self._cached(
+            ('border', left, right, top, bottom),
+            lambda: Border(
+                left=self.side(*left),
+                right=self.side(*right),
+                top=self.side(*top),
+                bottom=self.side(*bottom)
+            )
         )
-        header_style.border = Border(
-            left=Side(style='thin', color='FF000000'),
-            right=Side(style='thin', color='FF000000'),
-            top=Side(style='thin', color='FF000000'),
-            bottom=Side(style='thick', color='FF000000')
+
+    def alignment(self, horizontal, vertical='center', wrap_text=False):
+        """Alineación compartida"""
+        return self._cached(
+            ('alignment', horizontal, vertical, wrap_text),
+            lambda: Alignment(horizontal=horizontal, vertical=vertical, wrap_text=wrap_text)
         )
-        header_style.alignment = Alignment(
-            horizontal='center',
-            vertical='center',
-            wrap_text=True
+
+    def create_header_style(self):
+        """Estilo para headers de tabla"""
+        return self._cached('named_header_style', self._build_header_style)
+
+    def _build_header_style(self):
+        header_style = NamedStyle(name="header_style")
+        header_style.font = self.font(size=12, bold=True, color='FFFFFFFF')
+        header_style.fill = self.fill(self.colors['header_bg'])
+        header_style.border = self.border(
+            left=('thin', 'FF000000'),
+            right=('thin', 'FF000000'),
+            top=('thin', 'FF000000'),
+            bottom=('thick', 'FF000000')
         )
+        header_style.alignment = self.alignment('center', wrap_text=True)
         return header_style
 
     def create_data_style(self):
         """Estilo para datos de tabla"""
+        return self._cached('named_data_style', self._build_data_style)
+
+    def _build_data_style(self):
         data_style = NamedStyle(name="data_style")
-        data_style.font = Font(
-            name='Calibri',
-            size=11,
-            color='FF1F2937'
-        )
-        data_style.border = Border(
-            left=Side(style='thin', color='FFE5E7EB'),
-            right=Side(style='thin', color='FFE5E7EB'),
-            top=Side(style='thin', color='FFE5E7EB'),
-            bottom=Side(style='thin', color='FFE5E7EB')
-        )
-        data_style.alignment = Alignment(
-            horizontal='right',
-            vertical='center'
+        data_style.font = self.font(size=11, color='FF1F2937')
+        data_style.border = self.border(
+            left=('thin', 'FFE5E7EB'),
+            right=('thin', 'FFE5E7EB'),
+            top=('thin', 'FFE5E7EB'),
+            bottom=('thin', 'FFE5E7EB')
         )
+        data_style.alignment = self.alignment('right')
         data_style.number_format = '$#,##0.00'
         return data_style
 
     def create_period_style(self):
         """Estilo para columna de períodos"""
+        return self._cached('named_period_style', self._build_period_style)
+
+    def _build_period_style(self):
         period_style = NamedStyle(name="period_style")
-        period_style.font = Font(
-            name='Calibri',
-            size=11,
-            bold=True,
-            color='FF1E40AF'
-        )
-        period_style.fill = PatternFill(
-            start_color=self.colors['light'],
-            end_color=self.colors['light'],
-            fill_type='solid'
-        )
-        period_style.border = Border(
-            left=Side(style='thick', color='FF1E40AF'),
-            right=Side(style='thin', color='FFE5E7EB'),
-            top=Side(style='thin', color='FFE5E7EB'),
-            bottom=Side(style='thin', color='FFE5E7EB')
-        )
-        period_style.alignment = Alignment(
-            horizontal='center',
-            vertical='center'
+        period_style.font = self.font(size=11, bold=True, color='FF1E40AF')
+        period_style.fill = self.fill(self.colors['light'])
+        period_style.border = self.border(
+            left=('thick', 'FF1E40AF'),
+            right=('thin', 'FFE5E7EB'),
+            top=('thin', 'FFE5E7EB'),
+            bottom=('thin', 'FFE5E7EB')
         )
+        period_style.alignment = self.alignment('center')
         return period_style
@@ -0,0 +1,215 @@
+import os
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from receipt_table import filas_desde_html, procesar_filas_conceptos
+
+
+class ReceiptHttpError(Exception):
+    """La consulta por HTTP no devolvió lo esperado; se debe volver al navegador"""
+
+
+class _FormularioParser(HTMLParser):
+    """Serializa el primer formulario del HTML como lo haría el navegador"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.action = None
+        self.campos = {}      # name -> valor enviado
+        self.ids = {}         # id -> name
+        self.botones = {}     # id -> (name, value) de los submit
+        self._en_form = False
+        self._select = None   # [name, valor seleccionado, primer valor]
+        self._textarea = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "form" and self.action is None:
+            self._en_form = True
+            self.action = attrs.get("action") or ""
+            return
+        if not self._en_form:
+            return
+
+        name = attrs.get("name")
+        if name and attrs.get("id"):
+            self.ids[attrs["id"]] = name
+
+        if tag == "input" and name:
+            tipo = (attrs.get("type") or "text").lower()
+            if tipo in ("submit", "image", "button"):
+                if attrs.get("id"):
+                    self.botones[attrs["id"]] = (name, attrs.get("value") or "")
+            elif tipo in ("checkbox", "radio"):
+                if "checked" in attrs:
+                    self.campos[name] = attrs.get("value") or "on"
+            elif tipo != "file":
+                self.campos[name] = attrs.get("value") or ""
+        elif tag == "select" and name:
+            self._select = [name, None, None]
+        elif tag == "option" and self._select is not None:
+            valor = attrs.get("value") or ""
+            if self._select[2] is None:
+                self._select[2] = valor
+            if "selected" in attrs:
+                self._select[1] = valor
+        elif tag == "textarea" and name:
+            self._textarea = name
+            self.campos[name] = ""
+
+    def handle_endtag(self, tag):
+        if tag == "form" and self._en_form:
+            self._en_form = False
+        elif tag == "select" and self._select is not None:
+            name, seleccionado, primero = self._select
+            valor = seleccionado if seleccionado is not None else primero
+            if valor is not None:
+                self.campos[name] = valor
+            self._select = None
+        elif tag == "textarea":
+            self._textarea = None
+
+    def handle_data(self, data):
+        if self._textarea is not None:
+            self.campos[self._textarea] += data
+
+
+class ReceiptHttpFetcher:
+    """Consulta recibos por HTTP reutilizando la sesión autenticada del navegador
+
+    El navegador solo se usa para el login y el CAPTCHA; cada período se
+    resuelve con dos POST al formulario ASP.NET (consulta e impresión).
+    """
+
+    ID_BENEFICIOS = "ctl00_PlaceContent_ddl_Beneficios"
+    ID_MES = "ctl00_PlaceContent_txtMes"
+    ID_ANIO = "ctl00_PlaceContent_txtAnio"
+    ID_CONSULTAR = "ctl00_PlaceContent_btnConsultar"
+    ID_IMPRIMIR = "ctl00_PlaceContent_btn_imprimir"
+
+    def __init__(self, session, url_formulario, html_formulario, timeout=30):
+        self.session = session
+        self.url_formulario = url_formulario
+        self.timeout = timeout
+        self._cargar_formulario(html_formulario, url_formulario)
+
+    @staticmethod
+    def _nueva_sesion(pool_size=4):
+        """Sesión con pool de conexiones keep-alive"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @classmethod
+    def from_driver(cls, driver, pool_size=4, timeout=30):
+        """Crea el fetcher a partir del navegador posicionado en el frame del formulario"""
+        session = cls._nueva_sesion(pool_size)
+        session.headers["User-Agent"] = driver.execute_script("return navigator.userAgent")
+
+        for cookie in driver.get_cookies():
+            session.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain"),
+                path=cookie.get("path", "/")
+            )
+
+        url = driver.execute_script("return window.location.href")
+        return cls(session, url, driver.page_source, timeout=timeout)
+
+    def clone(self):
+        """Copia con sesión HTTP propia (mismas cookies) y estado de formulario independiente"""
+        session = self._nueva_sesion()
+        session.headers.update(self.session.headers)
+        session.cookies.update(self.session.cookies)
+
+        copia = ReceiptHttpFetcher.__new__(ReceiptHttpFetcher)
+        copia.session = session
+        copia.url_formulario = self.url_formulario
+        copia.timeout = self.timeout
+        copia.action = self.action
+        copia.campos = dict(self.campos)
+        copia.ids = dict(self.ids)
+        copia.botones = dict(self.botones)
+        return copia
+
+    def _cargar_formulario(self, html, url_base):
+        parser = _FormularioParser()
+        parser.feed(html)
+        parser.close()
+        if parser.action is None or self.ID_MES not in parser.ids:
+            raise ReceiptHttpError("El HTML no contiene el formulario de recibos")
+        self.action = urljoin(url_base, parser.action)
+        self.campos = parser.campos
+        self.ids = parser.ids
+        self.botones = parser.botones
+
+    def _datos_post(self, beneficio, mes, anio, boton_id):
+        if boton_id not in self.botones:
+            raise ReceiptHttpError(f"Botón {boton_id} no encontrado en el formulario")
+        datos = dict(self.campos)
+        datos[self.ids[self.ID_BENEFICIOS]] = beneficio
+        datos[self.ids[self.ID_MES]] = str(mes)
+        datos[self.ids[self.ID_ANIO]] = str(anio)
+        nombre, valor = self.botones[boton_id]
+        datos[nombre] = valor
+        return datos
+
+    def _post(self, datos):
+        respuesta = self.session.post(
+            self.action,
+            data=datos,
+            headers={"Referer": self.url_formulario},
+            timeout=self.timeout
+        )
+        if respuesta.status_code != 200:
+            raise ReceiptHttpError(f"Respuesta HTTP {respuesta.status_code}")
+        return respuesta
+
+    def fetch_conceptos(self, beneficio, mes, anio):
+        """Consulta el período y devuelve los datos con el formato de extraer_datos_tabla"""
+        respuesta = self._post(self._datos_post(beneficio, mes, anio, self.ID_CONSULTAR))
+        html = respuesta.text
+        filas = filas_desde_html(html)
+        if filas is None:
+            raise ReceiptHttpError(f"La respuesta de {mes:02d}/{anio} no contiene la grilla de conceptos")
+
+        # El postback trae un __VIEWSTATE nuevo para la siguiente operación
+        self._cargar_formulario(html, respuesta.url)
+
+        haberes, deducciones = procesar_filas_conceptos(filas)
+        return {
+            'periodo': f"{mes:02d}/{anio}",
+            'haberes': haberes,
+            'deducciones': deducciones
+        }
+
+    def fetch_pdf(self, beneficio, mes, anio, carpeta):
+        """Descarga el PDF del período consultado y devuelve la ruta donde se guardó"""
+        respuesta = self._post(self._datos_post(beneficio, mes, anio, self.ID_IMPRIMIR))
+        if not respuesta.content.startswith(b"%PDF"):
+            raise ReceiptHttpError(f"La impresión de {mes:02d}/{anio} no devolvió un PDF")
+
+        ruta = os.path.join(carpeta, f"recibo_{anio}{mes:02d}.pdf")
+        temporal = ruta + ".part"
+        with open(temporal, "wb") as archivo:
+            archivo.write(respuesta.content)
+        os.replace(temporal, ruta)
+        return ruta
+
+    def fetch_period(self, beneficio, mes, anio, carpeta):
+        """Consulta conceptos y PDF de un período
+
+        Returns:
+            Tupla (datos_periodo, ruta_pdf).
+        """
+        datos = self.fetch_conceptos(beneficio, mes, anio)
+        return datos, self.fetch_pdf(beneficio, mes, anio, carpeta)
+
+    def close(self):
+        self.session.close()
@@ -1,18 +1,59 @@
 import platform
 import getpass
 import hashlib
+import hmac
+import json
+import os
 import requests
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 import threading
 import customtkinter as ctk
 from tkinter import messagebox
 
 
+RUTA_TOKEN = os.path.join(os.path.expanduser("~"), ".anses_recibos", "licencia.json")
+RUTA_SECRETO = os.path.join(os.path.expanduser("~"), ".anses_recibos", "licencia.clave")
+TOLERANCIA_RELOJ = timedelta(minutes=5)  # Desfase admitido entre la emisión del token y el reloj actual
+
+
 class LicenseManager:
-    def __init__(self):
+    """Verificación de licencia contra Firebase con un token local firmado
+
+    Cada verificación exitosa en línea deja un token atado a ``machine_id``
+    que vence a las ``vigencia_token_horas`` (o antes, si vence la licencia).
+    Mientras el token sea válido, ``check_license`` responde sin ir a la red
+    y, si el token tiene más de ``refresco_minutos``, lo renueva en segundo
+    plano; un corte breve de conexión no impide usar la aplicación. Si
+    Firebase informa que la licencia ya no es válida, el token se borra.
+
+    La firma es un HMAC con una clave aleatoria propia de la instalación
+    (``ruta_secreto``, creada con permisos solo para el usuario) combinada con
+    el ID de la máquina: sin ese archivo no se puede fabricar un token, y un
+    token copiado a otro equipo no vale. Si la clave no se puede leer ni
+    crear, no se usan tokens y cada verificación va a Firebase.
+
+    El último uso se informa en segundo plano, a lo sumo una vez cada
+    ``intervalo_last_used_minutos``; sin conexión se reintenta enviando solo
+    el uso más reciente.
+    """
+
+    def __init__(self, ruta_token=RUTA_TOKEN, vigencia_token_horas=72, refresco_minutos=60,
+                 intervalo_last_used_minutos=15, ruta_secreto=RUTA_SECRETO):
         # URL de tu Firebase Realtime Database
         self.firebase_url = "https://recibos-anses-default-rtdb.firebaseio.com"
         self.machine_id = self.get_machine_id()
+        self.ruta_token = ruta_token
+        self.ruta_secreto = ruta_secreto
+        self._clave = None
+        self.vigencia_token = timedelta(hours=vigencia_token_horas)
+        self.refresco = timedelta(minutes=refresco_minutos)
+        self._refrescando = threading.Lock()
+        self.intervalo_last_used = intervalo_last_used_minutos * 60
+        self._uso_lock = threading.Lock()
+        self._uso_pendiente = None
+        self._ultimo_envio = None
+        self._enviando = False
 
     def get_machine_id(self):
         """Genera un ID único para la máquina"""
@@ -22,7 +63,27 @@ class LicenseManager:
         except:
             return "UNKNOWN_MACHINE"
 
-    def check_license(self):
+    def check_license(self, forzar=False):
+        """Verifica la licencia, con el token local si está vigente
+
+        Args:
+            forzar: Consultar Firebase aunque haya un token vigente.
+
+        Returns:
+            Tupla (válida, mensaje).
+        """
+        if not forzar:
+            token = self._leer_token()
+            if token is not None:
+                emitido = datetime.fromisoformat(token['emitido'])
+                if datetime.now() - emitido > self.refresco:
+                    self._refrescar_en_segundo_plano()
+                else:
+                    self.update_last_used()
+                return True, "Licencia válida, cierre la ventana para continuar"
+        return self.check_license_online()
+
+    def check_license_online(self):
         """Verifica si esta máquina tiene licencia válida en Firebase"""
         try:
             url = f"{self.firebase_url}/licenses/{self.machine_id}.json"
@@ -32,20 +93,25 @@ class LicenseManager:
                 license_data = response.json()
 
                 if license_data is None:
+                    self._borrar_token()
                     return False, f"Máquina no registrada.\nID: {self.machine_id}"
 
                 if license_data.get('active', False):
+                    expires_at = None
                     if 'expires_at' in license_data:
                         try:
-                            expires_at = datetime.fromisoformat(license_data['expires_at'])
+                            expires_at = self._hora_local(datetime.fromisoformat(license_data['expires_at']))
                             if datetime.now() > expires_at:
+                                self._borrar_token()
                                 return False, "Licencia expirada"
                         except:
                             pass
 
+                    self._guardar_token(expires_at)
                     self.update_last_used()
                     return True, "Licencia válida, cierre la ventana para continuar"
                 else:
+                    self._borrar_token()
                     return False, f"Licencia desactivada.\nID: {self.machine_id}"
             else:
                 return False, f"Error de conexión: {response.status_code}"
@@ -55,13 +121,153 @@ class LicenseManager:
         except Exception as e:
             return False, f"Error: {str(e)}"
 
-    def update_last_used(self):
-        """Actualiza la fecha de último uso en Firebase"""
+    def _clave_firma(self):
+        """Clave HMAC de los tokens: secreto aleatorio de la instalación + ID de máquina
+
+        Returns:
+            La clave, o None si el secreto no se puede leer ni crear.
+        """
+        if self._clave is None:
+            try:
+                secreto = self._leer_o_crear_secreto()
+            except OSError:
+                return None
+            if len(secreto) < 32:
+                return None
+            self._clave = hmac.new(secreto, f"licencia:{self.machine_id}".encode(), hashlib.sha256).digest()
+        return self._clave
+
+    def _leer_o_crear_secreto(self):
         try:
-            url = f"{self.firebase_url}/licenses/{self.machine_id}/last_used.json"
-            requests.put(url, json=datetime.now().isoformat(), timeout=5)
-        except:
-            pass  # No es crítico si falla
+            with open(self.ruta_secreto, "rb") as archivo:
+                return archivo.read()
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(self.ruta_secreto), exist_ok=True)
+        try:
+            # Solo el usuario puede leerlo; O_EXCL evita pisar uno creado en paralelo
+            descriptor = os.open(self.ruta_secreto, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            with open(self.ruta_secreto, "rb") as archivo:
+                return archivo.read()
+        secreto = os.urandom(32)
+        with os.fdopen(descriptor, "wb") as archivo:
+            archivo.write(secreto)
+        return secreto
+
+    def _firmar(self, datos):
+        clave = self._clave_firma()
+        if clave is None:
+            return None
+        mensaje = f"{datos['machine_id']}|{datos['emitido']}|{datos['expira']}".encode()
+        return hmac.new(clave, mensaje, hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def _hora_local(fecha):
+        """Pasa una fecha con zona horaria a la hora local sin zona (la del token)"""
+        if fecha.tzinfo is not None:
+            return fecha.astimezone().replace(tzinfo=None)
+        return fecha
+
+    def _guardar_token(self, expires_at=None):
+        """Guarda el token local tras una verificación exitosa en línea"""
+        ahora = datetime.now()
+        expira = ahora + self.vigencia_token
+        if expires_at is not None:
+            expira = min(expira, self._hora_local(expires_at))
+        datos = {
+            'machine_id': self.machine_id,
+            'emitido': ahora.isoformat(),
+            'expira': expira.isoformat(),
+        }
+        datos['firma'] = self._firmar(datos)
+        if datos['firma'] is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.ruta_token), exist_ok=True)
+            temporal = self.ruta_token + ".tmp"
+            with open(temporal, "w", encoding="utf-8") as archivo:
+                json.dump(datos, archivo)
+            os.replace(temporal, self.ruta_token)
+        except OSError:
+            pass  # Sin token se verifica en línea la próxima vez
+
+    def _leer_token(self):
+        """Devuelve el token local si es de esta máquina, está bien firmado y no venció
+
+        También se rechaza un token emitido en el futuro (con el reloj atrasado
+        nunca se renovaría) o con una vigencia mayor a la que se otorga.
+        """
+        try:
+            with open(self.ruta_token, encoding="utf-8") as archivo:
+                datos = json.load(archivo)
+            if datos.get('machine_id') != self.machine_id:
+                return None
+            firma = self._firmar(datos)
+            if firma is None or not hmac.compare_digest(datos.get('firma', ""), firma):
+                return None
+            ahora = datetime.now()
+            emitido = datetime.fromisoformat(datos['emitido'])
+            expira = datetime.fromisoformat(datos['expira'])
+            if ahora >= expira or emitido > ahora + TOLERANCIA_RELOJ:
+                return None
+            if expira - emitido > self.vigencia_token:
+                return None
+            return datos
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def _borrar_token(self):
+        try:
+            os.remove(self.ruta_token)
+        except OSError:
+            pass
+
+    def _refrescar_en_segundo_plano(self):
+        """Renueva el token en un hilo aparte; nunca hay dos renovaciones a la vez"""
+        if not self._refrescando.acquire(blocking=False):
+            return
+
+        def refrescar():
+            try:
+                # Un fallo de red conserva el token hasta que venza
+                self.check_license_online()
+            finally:
+                self._refrescando.release()
+
+        threading.Thread(target=refrescar, daemon=True).start()
+
+    def update_last_used(self):
+        """Registra el uso actual; el PUT a Firebase lo hace un hilo en segundo plano"""
+        with self._uso_lock:
+            self._uso_pendiente = datetime.now().isoformat()
+            if self._enviando:
+                return  # El hilo activo enviará este valor
+            self._enviando = True
+        threading.Thread(target=self._enviar_last_used, daemon=True).start()
+
+    def _enviar_last_used(self):
+        """Envía el último uso pendiente respetando el intervalo mínimo entre escrituras"""
+        url = f"{self.firebase_url}/licenses/{self.machine_id}/last_used.json"
+        while True:
+            if self._ultimo_envio is not None:
+                espera = self.intervalo_last_used - (time.monotonic() - self._ultimo_envio)
+                if espera > 0:
+                    time.sleep(espera)
+
+            with self._uso_lock:
+                valor = self._uso_pendiente
+            try:
+                enviado = requests.put(url, json=valor, timeout=5).status_code < 400
+            except requests.exceptions.RequestException:
+                enviado = False  # No es crítico: se reintenta en el próximo intervalo
+
+            with self._uso_lock:
+                self._ultimo_envio = time.monotonic()
+                if enviado and self._uso_pendiente == valor:
+                    self._uso_pendiente = None
+                    self._enviando = False
+                    return
 
 
 class LicenseDialog(ctk.CTkToplevel):
@@ -170,7 +376,7 @@ El administrador debe crear una licencia para tu máquina usando el generador de
             text="🔄 Verificar Nuevamente",
             font=ctk.CTkFont(size=14, weight="bold"),
             height=45,
-            command=self.check_license
+            command=lambda: self.check_license(forzar=True)
         )
         self.refresh_btn.pack(side="left", fill="x", expand=True, padx=(0, 10))
 
@@ -200,24 +406,24 @@ El administrador debe crear una licencia para tu máquina usando el generador de
         self.id_textbox.insert("1.0", self.license_manager.machine_id)
         self.id_textbox.configure(state="disabled")
 
-    def check_license(self):
-        """Verifica la licencia"""
+    def check_license(self, forzar=False):
+        """Verifica la licencia (el botón de reintento fuerza la consulta en línea)"""
         self.refresh_btn.configure(text="🔄 Verificando...", state="disabled")
         self.update_status(False, "🔄 Verificando licencia...")
 
         self.license_result = None
         self.checking_license = True
 
-        thread = threading.Thread(target=self._check_license_thread)
+        thread = threading.Thread(target=self._check_license_thread, args=(forzar,))
         thread.daemon = True
         thread.start()
 
         self._poll_license_result()
 
-    def _check_license_thread(self):
+    def _check_license_thread(self, forzar=False):
         """Hilo de verificación de licencia"""
         try:
-            valid, message = self.license_manager.check_license()
+            valid, message = self.license_manager.check_license(forzar=forzar)
             self.license_result = (valid, message)
             self.checking_license = False
         except Exception as e:
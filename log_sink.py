@@ -0,0 +1,151 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+DIRECTORIO_LOGS = os.path.join(os.path.expanduser("~"), ".anses_recibos", "logs")
+LOGGER = "anses"
+
+# Campos de contexto que se copian a cada registro JSON
+CAMPOS = ("tipo", "beneficio", "periodo", "paso", "duracion_ms")
+
+NIVELES = {
+    "error": logging.ERROR,
+    "warning": logging.WARNING,
+    "success": logging.INFO,
+    "process": logging.INFO,
+    "info": logging.INFO,
+}
+
+_listener = None
+_lock = threading.Lock()
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Una línea JSON por registro, con los campos de contexto del motor"""
+
+    def format(self, record):
+        datos = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "mensaje": record.getMessage(),
+            "hilo": record.threadName,
+        }
+        for campo in CAMPOS:
+            valor = getattr(record, campo, None)
+            if valor is not None:
+                datos[campo] = valor
+        if record.exc_info:
+            datos["excepcion"] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False)
+
+
+def configurar_log_json(directorio=DIRECTORIO_LOGS, max_bytes=5 * 1024 * 1024, copias=10):
+    """Agrega al logger ``anses`` un archivo JSONL rotativo escrito desde un hilo propio
+
+    Quien loguea solo encola el registro (QueueHandler); la serialización y
+    la escritura a disco las hace un QueueListener. Llamarla más de una vez
+    no agrega handlers nuevos.
+
+    Returns:
+        Ruta del archivo de log activo.
+    """
+    global _listener
+    ruta = os.path.join(directorio, "anses.jsonl")
+    with _lock:
+        if _listener is not None:
+            return ruta
+        os.makedirs(directorio, exist_ok=True)
+        archivo = RotatingFileHandler(ruta, maxBytes=max_bytes, backupCount=copias, encoding="utf-8")
+        archivo.setFormatter(JsonLineFormatter())
+
+        cola = queue.SimpleQueue()
+        logger = logging.getLogger(LOGGER)
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(QueueHandler(cola))
+        _listener = QueueListener(cola, archivo, respect_handler_level=True)
+        _listener.start()
+        atexit.register(detener_log_json)
+    return ruta
+
+
+def detener_log_json():
+    """Vacía la cola pendiente y cierra el archivo de log"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+class LogHub:
+    """Punto único de salida de los mensajes del motor
+
+    Cada mensaje se registra en el logger ``anses`` (con el beneficio y el
+    período en curso como campos) y se reenvía a los suscriptores, que son
+    consolas con ``log(mensaje, tipo)`` como el ConsoleWidget. Los pasos
+    medidos con ``paso()`` solo van al logger, en nivel DEBUG, y a
+    ``tiempos`` (un StepTimings) si está asignado.
+    """
+
+    def __init__(self, logger=None):
+        self.logger = logger or logging.getLogger(LOGGER)
+        self.suscriptores = []
+        self.tiempos = None
+        self._contexto = threading.local()
+
+    def subscribe(self, consola):
+        self.suscriptores.append(consola)
+        return consola
+
+    def unsubscribe(self, consola):
+        if consola in self.suscriptores:
+            self.suscriptores.remove(consola)
+
+    def contexto(self, **campos):
+        """Fija campos de contexto del hilo actual (None los quita)"""
+        actual = dict(getattr(self._contexto, "campos", {}))
+        for nombre, valor in campos.items():
+            if valor is None:
+                actual.pop(nombre, None)
+            else:
+                actual[nombre] = valor
+        self._contexto.campos = actual
+
+    def _extra(self, **campos):
+        extra = dict(getattr(self._contexto, "campos", {}))
+        extra.update({nombre: valor for nombre, valor in campos.items() if valor is not None})
+        return extra
+
+    def log(self, message, tipo="info"):
+        self.logger.log(NIVELES.get(tipo, logging.INFO), message, extra=self._extra(tipo=tipo))
+        for consola in self.suscriptores:
+            consola.log(message, tipo)
+
+    @contextmanager
+    def paso(self, nombre, **campos):
+        """Mide la duración de un paso y la registra al terminar (también si falla)"""
+        inicio = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            duracion_ms = round((time.perf_counter() - inicio) * 1000, 1)
+            if self.tiempos is not None:
+                self.tiempos.add(nombre, duracion_ms)
+            estado = "falló" if error is not None else "ok"
+            self.logger.debug(
+                f"Paso {nombre}: {estado} en {duracion_ms} ms",
+                extra=self._extra(paso=nombre, duracion_ms=duracion_ms, **campos)
+            )
@@ -0,0 +1,73 @@
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+
+class PageWaits:
+    """Esperas basadas en condiciones reales de la página, con cotas máximas configurables"""
+
+    def __init__(self, driver, timeout=15, poll_frequency=0.2):
+        self.driver = driver
+        self.timeout = timeout
+        self.poll_frequency = poll_frequency
+
+    def _wait(self, timeout=None):
+        return WebDriverWait(
+            self.driver,
+            timeout if timeout is not None else self.timeout,
+            poll_frequency=self.poll_frequency
+        )
+
+    def presence(self, locator, timeout=None):
+        """Espera a que el elemento exista en el DOM y lo devuelve"""
+        return self._wait(timeout).until(EC.presence_of_element_located(locator))
+
+    def clickable(self, locator, timeout=None):
+        """Espera a que el elemento sea clickeable y lo devuelve"""
+        return self._wait(timeout).until(EC.element_to_be_clickable(locator))
+
+    def document_ready(self, timeout=None):
+        """Espera a que el documento actual termine de cargar"""
+        return self._wait(timeout).until(
+            lambda driver: driver.execute_script("return document.readyState") == "complete"
+        )
+
+    def stale(self, elemento, timeout=None):
+        """Espera a que el elemento deje de pertenecer al DOM (la página fue reemplazada)
+
+        Returns:
+            True si el elemento quedó obsoleto antes de la cota, False si no.
+        """
+        if elemento is None:
+            return False
+
+        def obsoleto(driver):
+            try:
+                elemento.is_enabled()
+                return False
+            except WebDriverException:
+                # Obsoleto, o su frame ya no existe: en ambos casos la página cambió
+                return True
+
+        try:
+            self._wait(timeout).until(obsoleto)
+            return True
+        except TimeoutException:
+            return False
+
+    def frame_containing(self, locator, frame_locator=(By.TAG_NAME, "iframe"), timeout=None):
+        """Espera un iframe cuyo documento ya contenga el elemento y deja el foco en él"""
+        def condicion(driver):
+            driver.switch_to.default_content()
+            for iframe in driver.find_elements(*frame_locator):
+                try:
+                    driver.switch_to.frame(iframe)
+                    if driver.find_elements(*locator):
+                        return True
+                except WebDriverException:
+                    pass  # El iframe se recargó mientras se lo inspeccionaba
+                driver.switch_to.default_content()
+            return False
+
+        return self._wait(timeout).until(condicion)
@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ParallelPeriodFetcher:
+    """Descarga períodos por HTTP con un pool acotado y entrega los resultados en orden
+
+    Cada worker usa su propia copia del ReceiptHttpFetcher (sesión y
+    __VIEWSTATE independientes) y respeta un intervalo mínimo entre
+    consultas. Como mucho hay ``ventana`` períodos en vuelo o sin consumir,
+    así que memoria y disco quedan acotados aunque el rango sea largo.
+    """
+
+    def __init__(self, fetcher, beneficio, periodos, carpeta, workers=4, intervalo_minimo=0.0):
+        self.fetcher = fetcher
+        self.beneficio = beneficio
+        self.carpeta = carpeta
+        self.intervalo_minimo = intervalo_minimo
+        self.ventana = workers * 2
+        self._pendientes = iter(periodos)
+        self._futuros = deque()  # [((mes, anio), futuro)] en orden de período
+        self._local = threading.local()
+        self._clones = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="recibos-http")
+        self._llenar()
+
+    def _fetcher_del_hilo(self):
+        fetcher = getattr(self._local, "fetcher", None)
+        if fetcher is None:
+            fetcher = self.fetcher.clone()
+            self._local.fetcher = fetcher
+            self._local.ultima_consulta = 0.0
+            with self._lock:
+                self._clones.append(fetcher)
+        return fetcher
+
+    def _tarea(self, mes, anio):
+        fetcher = self._fetcher_del_hilo()
+
+        # Límite de ritmo por worker
+        espera = self._local.ultima_consulta + self.intervalo_minimo - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+        self._local.ultima_consulta = time.monotonic()
+
+        return fetcher.fetch_period(self.beneficio, mes, anio, self.carpeta)
+
+    def _llenar(self):
+        while len(self._futuros) < self.ventana:
+            try:
+                mes, anio = next(self._pendientes)
+            except StopIteration:
+                return
+            self._futuros.append(((mes, anio), self._executor.submit(self._tarea, mes, anio)))
+
+    def next_result(self, mes, anio):
+        """Bloquea hasta tener el período pedido (el siguiente en orden)
+
+        Returns:
+            Tupla (datos_periodo, ruta_pdf); propaga la excepción del worker si falló.
+        """
+        if not self._futuros or self._futuros[0][0] != (mes, anio):
+            raise ValueError(f"El período {mes:02d}/{anio} no es el siguiente en la cola")
+        _, futuro = self._futuros.popleft()
+        self._llenar()
+        return futuro.result()
+
+    def close(self):
+        """Cancela lo pendiente, borra PDFs descargados que no se consumieron y cierra sesiones"""
+        for _, futuro in self._futuros:
+            futuro.cancel()
+        self._executor.shutdown(wait=True)
+        for _, futuro in self._futuros:
+            if futuro.done() and not futuro.cancelled() and futuro.exception() is None:
+                _, ruta_pdf = futuro.result()
+                if os.path.exists(ruta_pdf):
+                    os.remove(ruta_pdf)
+        self._futuros.clear()
+        for fetcher in self._clones:
+            fetcher.close()
@@ -0,0 +1,259 @@
+import glob
+import hashlib
+import io
+import os
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (
+    ArrayObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NumberObject,
+    StreamObject,
+)
+
+
+class _Pendiente:
+    """Objeto cuya copia está en curso; el número se fija solo si alguien lo referencia antes de terminar"""
+
+    __slots__ = ("numero",)
+
+    def __init__(self, numero=None):
+        self.numero = numero
+
+
+class _PdfStreamWriter:
+    """Escribe un PDF objeto por objeto a medida que se agregan documentos
+
+    En memoria solo quedan los offsets de la tabla xref, los números de las
+    páginas y un hash por objeto escrito. Los objetos idénticos (fuentes,
+    imágenes, diccionarios de recursos) se escriben una sola vez y el resto
+    de las referencias apunta a esa copia.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.archivo = open(ruta, "wb")
+        self.archivo.write(b"%PDF-1.7\n%\xE2\xE3\xCF\xD3\n")
+        self.posiciones = []  # posiciones[n - 1] = offset del objeto n
+        self.hashes = {}      # sha1 del objeto serializado -> número
+        self.paginas = []
+        self.duplicados = 0
+        self._mapa = {}       # (idnum, generación) del documento actual -> número o _Pendiente
+        self._raiz_paginas = self._reservar()
+        self._catalogo = self._reservar()
+
+    def _reservar(self):
+        self.posiciones.append(None)
+        return len(self.posiciones)
+
+    def _escribir(self, numero, datos):
+        self.posiciones[numero - 1] = self.archivo.tell()
+        self.archivo.write(b"%d 0 obj\n" % numero)
+        self.archivo.write(datos)
+        self.archivo.write(b"\nendobj\n")
+
+    @staticmethod
+    def _serializar(objeto):
+        buffer = io.BytesIO()
+        objeto.write_to_stream(buffer, None)
+        return buffer.getvalue()
+
+    def add_document(self, reader):
+        """Copia todas las páginas del documento al final del PDF"""
+        self._mapa = {}
+        paginas = list(reader.pages)
+
+        # Las páginas se numeran antes de copiar para resolver las referencias
+        # cruzadas (anotaciones, destinos) sin arrastrar el árbol de páginas original
+        for pagina in paginas:
+            referencia = pagina.indirect_reference
+            if referencia is not None:
+                self._mapa[(referencia.idnum, referencia.generation)] = _Pendiente(self._reservar())
+
+        for pagina in paginas:
+            referencia = pagina.indirect_reference
+            if referencia is not None:
+                pendiente = self._mapa[(referencia.idnum, referencia.generation)]
+            else:
+                pendiente = _Pendiente(self._reservar())
+
+            copia = DictionaryObject()
+            for clave, valor in pagina.items():
+                if clave != "/Parent":
+                    copia[NameObject(clave)] = self._copiar(valor)
+            copia[NameObject("/Parent")] = IndirectObject(self._raiz_paginas, 0, None)
+            self._escribir(pendiente.numero, self._serializar(copia))
+            if referencia is not None:
+                self._mapa[(referencia.idnum, referencia.generation)] = pendiente.numero
+            self.paginas.append(pendiente.numero)
+
+        self._mapa = {}
+
+    def _copiar(self, objeto):
+        """Copia profunda con las referencias renumeradas al PDF de salida"""
+        if isinstance(objeto, IndirectObject):
+            return IndirectObject(self._referencia(objeto), 0, None)
+        if isinstance(objeto, StreamObject):
+            copia = objeto.__class__()
+            copia._data = objeto._data
+            for clave, valor in objeto.items():
+                # /Length se recalcula al escribir; si fuera indirecto quedaría huérfano
+                if clave != "/Length":
+                    copia[NameObject(clave)] = self._copiar(valor)
+            return copia
+        if isinstance(objeto, DictionaryObject):
+            copia = DictionaryObject()
+            for clave, valor in objeto.items():
+                copia[NameObject(clave)] = self._copiar(valor)
+            return copia
+        if isinstance(objeto, ArrayObject):
+            return ArrayObject(self._copiar(valor) for valor in objeto)
+        return objeto
+
+    def _referencia(self, indirecto):
+        """Devuelve el número de salida del objeto referenciado, copiándolo si hace falta"""
+        clave = (indirecto.idnum, indirecto.generation)
+        destino = self._mapa.get(clave)
+        if isinstance(destino, int):
+            return destino
+        if destino is not None:
+            # Referencia circular: el objeto queda fijado con un número propio
+            if destino.numero is None:
+                destino.numero = self._reservar()
+            return destino.numero
+
+        pendiente = _Pendiente()
+        self._mapa[clave] = pendiente
+        datos = self._serializar(self._copiar(indirecto.get_object()))
+
+        numero = pendiente.numero
+        if numero is None:
+            digest = hashlib.sha1(datos).digest()
+            numero = self.hashes.get(digest)
+            if numero is not None:
+                self.duplicados += 1
+                self._mapa[clave] = numero
+                return numero
+            numero = self._reservar()
+            self.hashes[digest] = numero
+        self._escribir(numero, datos)
+        self._mapa[clave] = numero
+        return numero
+
+    def close(self):
+        """Escribe el árbol de páginas, el catálogo, la tabla xref y el trailer"""
+        raiz = DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject(IndirectObject(n, 0, None) for n in self.paginas),
+            NameObject("/Count"): NumberObject(len(self.paginas)),
+        })
+        self._escribir(self._raiz_paginas, self._serializar(raiz))
+        catalogo = DictionaryObject({
+            NameObject("/Type"): NameObject("/Catalog"),
+            NameObject("/Pages"): IndirectObject(self._raiz_paginas, 0, None),
+        })
+        self._escribir(self._catalogo, self._serializar(catalogo))
+
+        xref = self.archivo.tell()
+        self.archivo.write(b"xref\n0 %d\n" % (len(self.posiciones) + 1))
+        self.archivo.write(b"0000000000 65535 f \n")
+        for posicion in self.posiciones:
+            self.archivo.write(b"%010d 00000 n \n" % posicion)
+        self.archivo.write(
+            b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(self.posiciones) + 1, self._catalogo, xref)
+        )
+        self.archivo.close()
+
+    def abort(self):
+        self.archivo.close()
+        try:
+            os.remove(self.ruta)
+        except OSError:
+            pass
+
+
+class ChunkedPdfMerger:
+    """Une los recibos en bloques de tamaño fijo que se escriben a disco al completarse
+
+    Cada bloque es un PDF válido (``todos_los_recibos.pdf.bloque001``, ...), de
+    modo que un corte a mitad de la descarga no pierde los recibos ya unidos.
+    Al final los bloques se concatenan en el PDF definitivo leyendo uno por
+    vez, con fuentes y recursos repetidos escritos una sola vez.
+    """
+
+    def __init__(self, ruta_final, recibos_por_bloque=12):
+        self.ruta_final = ruta_final
+        self.recibos_por_bloque = recibos_por_bloque
+        self.bloques = []
+        self.recibos = 0
+        self.duplicados_bloques = 0  # Objetos repetidos omitidos dentro de cada bloque
+        self._actual = None
+        self._recibos_en_bloque = 0
+        # Bloques de una ejecución anterior con el mismo destino
+        for ruta in glob.glob(glob.escape(ruta_final) + ".bloque*"):
+            os.remove(ruta)
+
+    def _ruta_bloque(self, numero):
+        return f"{self.ruta_final}.bloque{numero:03d}"
+
+    def append(self, ruta_pdf):
+        """Agrega las páginas de un recibo al bloque en curso"""
+        reader = PdfReader(ruta_pdf)
+        if reader.is_encrypted:
+            reader.decrypt("")
+
+        if self._actual is None:
+            self._actual = _PdfStreamWriter(self._ruta_bloque(len(self.bloques) + 1) + ".part")
+        self._actual.add_document(reader)
+        self.recibos += 1
+        self._recibos_en_bloque += 1
+        if self._recibos_en_bloque >= self.recibos_por_bloque:
+            self._cerrar_bloque()
+
+    def _cerrar_bloque(self):
+        if self._actual is None:
+            return
+        self._actual.close()
+        self.duplicados_bloques += self._actual.duplicados
+        ruta = self._actual.ruta[:-len(".part")]
+        os.replace(self._actual.ruta, ruta)
+        self.bloques.append(ruta)
+        self._actual = None
+        self._recibos_en_bloque = 0
+
+    def write(self, ruta=None):
+        """Concatena los bloques en el PDF final y los elimina
+
+        Returns:
+            Cantidad de objetos repetidos que se omitieron, dentro de los bloques
+            y al unirlos en el PDF final.
+        """
+        ruta = ruta or self.ruta_final
+        self._cerrar_bloque()
+
+        salida = _PdfStreamWriter(ruta + ".part")
+        try:
+            for bloque in self.bloques:
+                salida.add_document(PdfReader(bloque))
+            salida.close()
+        except Exception:
+            salida.abort()
+            raise
+        os.replace(salida.ruta, ruta)
+
+        for bloque in self.bloques:
+            os.remove(bloque)
+        self.bloques = []
+        duplicados = self.duplicados_bloques + salida.duplicados
+        self.duplicados_bloques = 0
+        return duplicados
+
+    def close(self):
+        """Descarta el bloque a medio escribir; los bloques completos quedan en disco"""
+        if self._actual is not None:
+            self._actual.abort()
+            self._actual = None
+            self._recibos_en_bloque = 0
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from datetime import date
+
+DIRECTORIO_CACHE = os.path.join(os.path.expanduser("~"), ".anses_recibos", "cache")
+
+
+class ReceiptCache:
+    """Caché local persistente de recibos ya descargados
+
+    Guarda por ``(beneficio, mes, anio)`` la tabla de conceptos parseada y el
+    PDF. Los PDFs se almacenan por contenido (``blobs/<sha256>.pdf``) y un
+    índice JSON relaciona cada período con su blob. Los meses recientes no se
+    sirven ni se guardan porque ANSES todavía puede reemplazarlos.
+
+    El desalojo se hace por antigüedad (``max_dias`` desde que se guardó) y
+    luego por tamaño total (``max_bytes``), descartando primero lo menos usado.
+
+    Una misma instancia puede compartirse entre hilos; varias instancias sobre
+    el mismo directorio no se coordinan entre sí.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_CACHE, max_bytes=500 * 1024 * 1024,
+                 max_dias=730, meses_recientes=2):
+        self.directorio = directorio
+        self.dir_blobs = os.path.join(directorio, "blobs")
+        self.ruta_indice = os.path.join(directorio, "indice.json")
+        self.max_bytes = max_bytes
+        self.max_dias = max_dias
+        self.meses_recientes = meses_recientes
+        self.aciertos = 0
+        self.fallos = 0
+        self._cambios = False
+        self._lock = threading.RLock()
+        os.makedirs(self.dir_blobs, exist_ok=True)
+        self.indice = self._leer_indice()
+        self.evict()
+
+    def _leer_indice(self):
+        try:
+            with open(self.ruta_indice, encoding="utf-8") as archivo:
+                return json.load(archivo)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _guardar_indice(self):
+        temporal = self.ruta_indice + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump(self.indice, archivo, ensure_ascii=False)
+        os.replace(temporal, self.ruta_indice)
+        self._cambios = False
+
+    @staticmethod
+    def _clave(beneficio, mes, anio):
+        return f"{beneficio}|{anio}{mes:02d}"
+
+    def _ruta_blob(self, sha256):
+        return os.path.join(self.dir_blobs, f"{sha256}.pdf")
+
+    def es_reciente(self, mes, anio, hoy=None):
+        """Indica si el período cae dentro de los últimos ``meses_recientes`` meses"""
+        hoy = hoy or date.today()
+        return (hoy.year * 12 + hoy.month) - (anio * 12 + mes) < self.meses_recientes
+
+    def get(self, beneficio, mes, anio):
+        """Busca el período en la caché
+
+        Returns:
+            Tupla (datos_periodo, ruta_pdf) o None si no está (o es reciente).
+        """
+        with self._lock:
+            if self.es_reciente(mes, anio):
+                return None
+            entrada = self.indice.get(self._clave(beneficio, mes, anio))
+            if entrada is None or not os.path.exists(self._ruta_blob(entrada["sha256"])):
+                self.fallos += 1
+                return None
+
+            entrada["usado"] = time.time()
+            self._cambios = True
+            self.aciertos += 1
+            datos = {
+                'periodo': f"{mes:02d}/{anio}",
+                'haberes': entrada["haberes"],
+                'deducciones': entrada["deducciones"]
+            }
+            return datos, self._ruta_blob(entrada["sha256"])
+
+    def put(self, beneficio, mes, anio, datos, ruta_pdf):
+        """Guarda conceptos y PDF de un período descargado (se ignora si es reciente)"""
+        with self._lock:
+            if self.es_reciente(mes, anio) or not datos:
+                return False
+
+            sha = hashlib.sha256()
+            with open(ruta_pdf, "rb") as archivo:
+                for bloque in iter(lambda: archivo.read(1024 * 1024), b""):
+                    sha.update(bloque)
+            sha256 = sha.hexdigest()
+
+            destino = self._ruta_blob(sha256)
+            if not os.path.exists(destino):
+                temporal = destino + ".tmp"
+                shutil.copyfile(ruta_pdf, temporal)
+                os.replace(temporal, destino)
+
+            ahora = time.time()
+            self.indice[self._clave(beneficio, mes, anio)] = {
+                "sha256": sha256,
+                "tamanio": os.path.getsize(destino),
+                "haberes": datos['haberes'],
+                "deducciones": datos['deducciones'],
+                "guardado": ahora,
+                "usado": ahora,
+            }
+            self.evict()
+            self._guardar_indice()
+            return True
+
+    def evict(self):
+        """Aplica los límites de antigüedad y tamaño; devuelve cuántas entradas se quitaron"""
+        with self._lock:
+            quitadas = 0
+            if self.max_dias:
+                limite = time.time() - self.max_dias * 86400
+                for clave in [c for c, e in self.indice.items() if e["guardado"] < limite]:
+                    del self.indice[clave]
+                    quitadas += 1
+
+            if self.max_bytes:
+                # Los blobs compartidos por varios períodos se cuentan una sola vez
+                tamanios = {e["sha256"]: e["tamanio"] for e in self.indice.values()}
+                referencias = Counter(e["sha256"] for e in self.indice.values())
+                total = sum(tamanios.values())
+                for clave, entrada in sorted(self.indice.items(), key=lambda item: item[1]["usado"]):
+                    if total <= self.max_bytes:
+                        break
+                    del self.indice[clave]
+                    quitadas += 1
+                    referencias[entrada["sha256"]] -= 1
+                    if not referencias[entrada["sha256"]]:
+                        total -= tamanios[entrada["sha256"]]
+
+            if quitadas:
+                self._cambios = True
+                self._borrar_blobs_huerfanos()
+            return quitadas
+
+    def _borrar_blobs_huerfanos(self):
+        en_uso = {e["sha256"] for e in self.indice.values()}
+        for nombre in os.listdir(self.dir_blobs):
+            sha256 = nombre.split(".", 1)[0]
+            if sha256 not in en_uso:
+                try:
+                    os.remove(os.path.join(self.dir_blobs, nombre))
+                except OSError:
+                    pass
+
+    def close(self):
+        """Persiste las marcas de uso pendientes"""
+        with self._lock:
+            if self._cambios:
+                self._guardar_indice()
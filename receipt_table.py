@@ -0,0 +1,122 @@
+from html.parser import HTMLParser
+
+# Grilla de conceptos del recibo de haberes de ANSES
+
+TABLA_CONCEPTOS_ID = "ctl00_PlaceContent_gvConceptos"
+SELECTOR_FILAS = "tr.grilla_item, tr.grilla_aternateitem"
+CLASES_FILAS = {"grilla_item", "grilla_aternateitem"}
+
+# Devuelve en una sola llamada la matriz de textos de las filas de datos.
+# Se normalizan los espacios duros como lo hace WebElement.text.
+SCRIPT_FILAS_CONCEPTOS = """
+const tabla = arguments[0];
+return Array.from(tabla.querySelectorAll(arguments[1]), function (fila) {
+    return Array.from(fila.getElementsByTagName('td'), function (td) {
+        return (td.innerText || td.textContent || '').replace(/\\u00a0/g, ' ');
+    });
+});
+"""
+
+
+class _GrillaConceptosParser(HTMLParser):
+    """Recorre el HTML y junta el texto de las celdas de las filas de datos de la grilla"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.filas = []
+        self.encontrada = False
+        self._profundidad_tabla = 0  # > 0 mientras se está dentro de la grilla
+        self._fila = None
+        self._celda = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "table":
+            if self._profundidad_tabla:
+                self._profundidad_tabla += 1
+            elif attrs.get("id") == TABLA_CONCEPTOS_ID:
+                self._profundidad_tabla = 1
+                self.encontrada = True
+        elif not self._profundidad_tabla:
+            return
+        elif tag == "tr":
+            clases = set((attrs.get("class") or "").split())
+            self._fila = [] if clases & CLASES_FILAS else None
+        elif tag == "td" and self._fila is not None:
+            self._celda = []
+        elif tag == "br" and self._celda is not None:
+            self._celda.append("\n")
+
+    def handle_endtag(self, tag):
+        if not self._profundidad_tabla:
+            return
+        if tag == "table":
+            self._profundidad_tabla -= 1
+        elif tag == "td" and self._celda is not None:
+            # Mismo criterio que WebElement.text: espacios colapsados por línea
+            lineas = "".join(self._celda).split("\n")
+            self._fila.append("\n".join(" ".join(linea.split()) for linea in lineas).strip())
+            self._celda = None
+        elif tag == "tr" and self._fila is not None:
+            self.filas.append(self._fila)
+            self._fila = None
+
+    def handle_data(self, data):
+        if self._celda is not None:
+            self._celda.append(data.replace("\u00a0", " ").replace("\n", " "))
+
+
+def filas_desde_html(html):
+    """Extrae de un HTML el texto de las filas de datos de la grilla de conceptos
+
+    Returns:
+        Lista de filas (listas de textos de celda), o None si la grilla no está en el HTML.
+    """
+    parser = _GrillaConceptosParser()
+    parser.feed(html)
+    parser.close()
+    return parser.filas if parser.encontrada else None
+
+
+def _parsear_importe(texto):
+    """Convierte un importe con coma decimal; devuelve None si no es numérico"""
+    if not texto:
+        return None
+    try:
+        return float(texto.replace(",", "."))
+    except ValueError:
+        return None
+
+
+def procesar_filas_conceptos(filas):
+    """Convierte las filas de texto de la grilla en haberes y deducciones
+
+    Args:
+        filas: Iterable de listas con el texto de cada celda
+            (concepto, empresa, descripción, haberes, deducciones).
+
+    Returns:
+        Tupla (haberes, deducciones) con diccionarios concepto -> importe.
+    """
+    conceptos_haberes = {}
+    conceptos_deducciones = {}
+
+    for celdas in filas:
+        if len(celdas) < 5:
+            continue
+        concepto, empresa, descripcion, haberes_text, deducciones_text = (
+            celda.strip() for celda in celdas[:5]
+        )
+
+        # Crear clave única para el concepto
+        clave_concepto = f"{concepto}-{empresa}: {descripcion}"
+
+        valor_haber = _parsear_importe(haberes_text)
+        if valor_haber is not None:
+            conceptos_haberes[clave_concepto] = valor_haber
+
+        valor_deduccion = _parsear_importe(deducciones_text)
+        if valor_deduccion is not None:
+            conceptos_deducciones[clave_concepto] = valor_deduccion
+
+    return conceptos_haberes, conceptos_deducciones
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+
+
+class RunManifest:
+    """Checkpoint por período de una descarga, para retomarla tras un corte
+
+    Vive en el subdirectorio ``.progreso`` de la carpeta de descargas (la
+    limpieza al iniciar solo borra archivos sueltos). Cada período terminado
+    agrega una línea JSON al manifiesto con los conceptos extraídos, la ruta
+    del PDF conservado y su hash; el PDF se mueve a ``.progreso/recibos``.
+    """
+
+    DIRECTORIO = ".progreso"
+    ARCHIVO = "manifiesto.jsonl"
+
+    def __init__(self, carpeta):
+        self.directorio = os.path.join(carpeta, self.DIRECTORIO)
+        self.dir_recibos = os.path.join(self.directorio, "recibos")
+        self.ruta = os.path.join(self.directorio, self.ARCHIVO)
+
+    @staticmethod
+    def _hash(ruta):
+        sha = hashlib.sha256()
+        with open(ruta, "rb") as archivo:
+            for bloque in iter(lambda: archivo.read(1024 * 1024), b""):
+                sha.update(bloque)
+        return sha.hexdigest()
+
+    def _ruta_recibo(self, beneficio, mes, anio):
+        beneficio_seguro = re.sub(r"[^0-9A-Za-z_-]", "_", str(beneficio))
+        return os.path.join(self.dir_recibos, f"{beneficio_seguro}_{anio}{mes:02d}.pdf")
+
+    def _termina_en_salto(self):
+        with open(self.ruta, "rb") as archivo:
+            archivo.seek(-1, os.SEEK_END)
+            return archivo.read(1) == b"\n"
+
+    def load(self, beneficio):
+        """Lee los períodos completos del beneficio cuyo PDF sigue intacto
+
+        Returns:
+            Diccionario (mes, anio) -> entrada del manifiesto.
+        """
+        entradas = {}
+        try:
+            with open(self.ruta, encoding="utf-8") as archivo:
+                for linea in archivo:
+                    try:
+                        entrada = json.loads(linea)
+                    except ValueError:
+                        continue  # Última línea truncada por un corte
+                    if entrada.get("beneficio") == beneficio:
+                        entradas[(entrada["mes"], entrada["anio"])] = entrada
+        except FileNotFoundError:
+            return {}
+
+        completos = {}
+        for clave, entrada in entradas.items():
+            if entrada.get("estado") != "completo":
+                continue
+            try:
+                if self._hash(entrada["pdf"]) != entrada["sha256"]:
+                    continue
+            except OSError:
+                continue
+            completos[clave] = entrada
+        return completos
+
+    def record_period(self, beneficio, mes, anio, datos, ruta_pdf):
+        """Conserva el PDF del período y lo marca como completo
+
+        Returns:
+            Ruta donde quedó guardado el PDF.
+        """
+        os.makedirs(self.dir_recibos, exist_ok=True)
+        destino = self._ruta_recibo(beneficio, mes, anio)
+        os.replace(ruta_pdf, destino)
+
+        entrada = {
+            "beneficio": beneficio,
+            "mes": mes,
+            "anio": anio,
+            "estado": "completo",
+            "haberes": datos['haberes'] if datos else None,
+            "deducciones": datos['deducciones'] if datos else None,
+            "pdf": destino,
+            "sha256": self._hash(destino),
+        }
+        linea = json.dumps(entrada, ensure_ascii=False) + "\n"
+        with open(self.ruta, "ab") as archivo:
+            # Si un corte dejó la última línea a medias, la entrada nueva empieza en su propia línea
+            if archivo.tell() and not self._termina_en_salto():
+                linea = "\n" + linea
+            archivo.write(linea.encode("utf-8"))
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        return destino
+
+    @staticmethod
+    def datos_periodo(entrada):
+        """Reconstruye el diccionario de extraer_datos_tabla, o None si no hubo grilla"""
+        if entrada.get("haberes") is None and entrada.get("deducciones") is None:
+            return None
+        return {
+            'periodo': f"{entrada['mes']:02d}/{entrada['anio']}",
+            'haberes': entrada.get("haberes") or {},
+            'deducciones': entrada.get("deducciones") or {}
+        }
+
+    def clear(self):
+        """Elimina el manifiesto y los PDFs conservados"""
+        shutil.rmtree(self.directorio, ignore_errors=True)
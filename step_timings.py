@@ -0,0 +1,62 @@
+import csv
+import json
+import math
+import os
+import threading
+
+COLUMNAS = ("paso", "cantidad", "total_ms", "p50_ms", "p95_ms", "max_ms")
+
+
+def percentil(valores_ordenados, p):
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    indice = max(0, math.ceil(p / 100 * len(valores_ordenados)) - 1)
+    return valores_ordenados[indice]
+
+
+class StepTimings:
+    """Duraciones de cada paso de una ejecución, para ver dónde se va el tiempo por recibo
+
+    Los pasos se informan en el orden en que aparecen por primera vez. Al
+    final se resumen con p50, p95 y máximo y se exportan a JSON y CSV.
+    """
+
+    def __init__(self):
+        self._duraciones = {}
+        self._lock = threading.Lock()
+
+    def add(self, paso, duracion_ms):
+        with self._lock:
+            self._duraciones.setdefault(paso, []).append(duracion_ms)
+
+    def summary(self):
+        """Devuelve una fila por paso con cantidad, total, p50, p95 y máximo en milisegundos"""
+        with self._lock:
+            duraciones = {paso: sorted(valores) for paso, valores in self._duraciones.items()}
+        return [
+            {
+                "paso": paso,
+                "cantidad": len(valores),
+                "total_ms": round(sum(valores), 1),
+                "p50_ms": percentil(valores, 50),
+                "p95_ms": percentil(valores, 95),
+                "max_ms": valores[-1],
+            }
+            for paso, valores in duraciones.items()
+        ]
+
+    def export(self, carpeta, nombre="tiempos_pasos"):
+        """Escribe el resumen como ``<nombre>.json`` y ``<nombre>.csv`` en la carpeta
+
+        Returns:
+            Tupla (ruta_json, ruta_csv).
+        """
+        filas = self.summary()
+        ruta_json = os.path.join(carpeta, f"{nombre}.json")
+        ruta_csv = os.path.join(carpeta, f"{nombre}.csv")
+        with open(ruta_json, "w", encoding="utf-8") as archivo:
+            json.dump(filas, archivo, ensure_ascii=False, indent=2)
+        with open(ruta_csv, "w", newline="", encoding="utf-8") as archivo:
+            escritor = csv.DictWriter(archivo, fieldnames=COLUMNAS)
+            escritor.writeheader()
+            escritor.writerows(filas)
+        return ruta_json, ruta_csv
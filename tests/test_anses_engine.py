@@ -0,0 +1,82 @@
+import os
+
+from PyPDF2 import PdfWriter
+
+import anses_engine
+from anses_engine import ANSESEngine
+from receipt_cache import ReceiptCache
+
+
+def _pdf(ruta):
+    writer = PdfWriter()
+    writer.add_blank_page(width=200, height=200)
+    # Contenido distinto por archivo: la caché guarda los PDFs por hash
+    writer.add_metadata({"/Title": os.path.basename(ruta)})
+    with open(ruta, "wb") as archivo:
+        writer.write(archivo)
+    return ruta
+
+
+def _datos(mes, anio):
+    return {"periodo": f"{mes:02d}/{anio}", "haberes": {"001-0: HABER": 100.0}, "deducciones": {}}
+
+
+class FetcherFalso:
+    """ReceiptHttpFetcher que arma el PDF en el momento y anota los períodos pedidos"""
+
+    def __init__(self, pedidos):
+        self.pedidos = pedidos
+
+    def clone(self):
+        return FetcherFalso(self.pedidos)
+
+    def fetch_period(self, beneficio, mes, anio, carpeta):
+        self.pedidos.append((mes, anio))
+        return _datos(mes, anio), _pdf(os.path.join(carpeta, f"recibo_{anio}{mes:02d}.pdf"))
+
+    def close(self):
+        pass
+
+
+class CacheSinBlob(ReceiptCache):
+    """Caché cuyo PDF desaparece justo después de encontrarlo (desalojo desde otro slot)"""
+
+    def get(self, beneficio, mes, anio):
+        encontrado = super().get(beneficio, mes, anio)
+        if encontrado is not None:
+            os.remove(encontrado[1])
+        return encontrado
+
+
+class Consola:
+    def __init__(self):
+        self.mensajes = []
+
+    def log(self, mensaje, tipo="info"):
+        self.mensajes.append((tipo, mensaje))
+
+
+def test_periodo_cacheado_sin_pdf_se_descarga_sin_salir_del_modo_http(tmp_path, monkeypatch):
+    pedidos = []
+    monkeypatch.setattr(
+        anses_engine.ReceiptHttpFetcher, "from_driver", classmethod(lambda cls, *a, **k: FetcherFalso(pedidos))
+    )
+    cache = CacheSinBlob(str(tmp_path / "cache"))
+    cache.put("123", 2, 2020, _datos(2, 2020), _pdf(str(tmp_path / "cacheado.pdf")))
+    carpeta = tmp_path / "descargas"
+    carpeta.mkdir()
+
+    consola = Consola()
+    engine = ANSESEngine(console=consola)
+    engine.is_running = True
+    engine.modo_http = True
+    engine.workers_http = 2
+    engine.intervalo_http = 0
+    engine.cache_compartida = cache
+
+    resultado = engine.descargar_rango(None, "123", 1, 2020, 3, 2020, str(carpeta))
+
+    assert sorted(pedidos) == [(1, 2020), (2, 2020), (3, 2020)]
+    assert not any("Modo HTTP falló" in mensaje for _, mensaje in consola.mensajes)
+    assert resultado["archivos_procesados"] == 3
+    assert resultado["completado"]
@@ -0,0 +1,84 @@
+import os
+import threading
+
+import pytest
+
+import download_watcher
+from download_watcher import DownloadWatcher
+
+PDF = b"%PDF-1.4\n1 0 obj\n<< >>\nendobj\ntrailer\n<< >>\n%%EOF\n"
+
+
+def _sin_inotify():
+    raise OSError("inotify deshabilitado en la prueba")
+
+
+@pytest.fixture
+def watcher(tmp_path, monkeypatch):
+    """Watcher con el sondeo como único mecanismo, en cualquier sistema"""
+    monkeypatch.setattr(download_watcher, "_Inotify", lambda carpeta: _sin_inotify())
+    watcher = DownloadWatcher(str(tmp_path), poll=0.05)
+    assert not watcher.event_driven
+    yield watcher
+    watcher.close()
+
+
+def _mas_tarde(segundos, accion):
+    temporizador = threading.Timer(segundos, accion)
+    temporizador.start()
+    return temporizador
+
+
+def test_archivo_sin_eof_no_esta_terminado(watcher, tmp_path):
+    ruta = tmp_path / "recibo.pdf"
+    previos = watcher.snapshot()
+    ruta.write_bytes(PDF[:20])
+
+    assert watcher.wait_for_new(previos, timeout=0.3) is None
+
+    with open(ruta, "ab") as archivo:
+        archivo.write(PDF[20:])
+    assert watcher.wait_for_new(previos, timeout=2) == str(ruta)
+
+
+def test_espera_a_que_chrome_renombre_el_crdownload(watcher, tmp_path):
+    ruta = tmp_path / "recibo.pdf"
+    parcial = tmp_path / "recibo.pdf.crdownload"
+    previos = watcher.snapshot()
+    parcial.write_bytes(PDF)
+    # Mientras exista el .crdownload no cuenta, aunque el destino parezca completo
+    ruta.write_bytes(PDF)
+
+    assert watcher.wait_for_new(previos, timeout=0.3) is None
+
+    temporizador = _mas_tarde(0.1, lambda: os.replace(parcial, ruta))
+    assert watcher.wait_for_new(previos, timeout=2) == str(ruta)
+    temporizador.join()
+
+
+def test_ignora_archivos_previos_a_la_descarga(watcher, tmp_path):
+    (tmp_path / "anterior.pdf").write_bytes(PDF)
+    (tmp_path / "todos_los_recibos.pdf").write_bytes(PDF)
+    previos = watcher.snapshot()
+
+    assert watcher.wait_for_new(previos, timeout=0.3) is None
+
+    nuevo = tmp_path / "nuevo.pdf"
+    temporizador = _mas_tarde(0.1, lambda: nuevo.write_bytes(PDF))
+    assert watcher.wait_for_new(previos, timeout=2) == str(nuevo)
+    temporizador.join()
+
+
+def test_con_inotify_despierta_con_el_rename(tmp_path):
+    watcher = DownloadWatcher(str(tmp_path), poll=0.05)
+    if not watcher.event_driven:
+        pytest.skip("inotify no disponible")
+    try:
+        parcial = tmp_path / "recibo.pdf.crdownload"
+        parcial.write_bytes(PDF)
+        previos = watcher.snapshot()
+        temporizador = _mas_tarde(0.1, lambda: os.replace(parcial, tmp_path / "recibo.pdf"))
+        assert watcher.wait_for_new(previos, timeout=2) == str(tmp_path / "recibo.pdf")
+        temporizador.join()
+    finally:
+        watcher.close()
@@ -0,0 +1,82 @@
+from openpyxl import Workbook, load_workbook
+
+from anses_engine import ANSESEngine
+from excel_builder import ExcelWorkbookBuilder, SheetIndex
+
+
+def _hoja_existente():
+    ws = Workbook().active
+    ws.cell(row=1, column=1, value="📊 HABERES")
+    ws.cell(row=3, column=1, value="PERÍODO")
+    ws.cell(row=3, column=2, value="001-0: HABER")
+    ws.cell(row=3, column=3, value="002-0: BONO")
+    ws.cell(row=3, column=4, value="TOTAL")
+    ws.cell(row=4, column=1, value="01/2020")
+    ws.cell(row=5, column=1, value="02/2020")
+    return ws
+
+
+def test_sheet_index_lee_la_hoja_existente():
+    indice = SheetIndex(_hoja_existente())
+
+    assert indice.conceptos == {"001-0: HABER": 2, "002-0: BONO": 3}
+    assert indice.periodos == {"01/2020": 4, "02/2020": 5}
+    assert indice.total_column == 4
+    assert indice.max_column == 4
+
+    assert indice.add_period("03/2020") == 6
+
+
+def test_sheet_index_reset_tras_crear_la_estructura():
+    indice = SheetIndex(_hoja_existente())
+
+    indice.reset()
+
+    assert (indice.conceptos, indice.periodos, indice.total_column) == ({}, {}, None)
+    assert indice.add_concept("001-0: HABER") == 2
+    assert indice.add_period("01/2020") == 4
+
+
+def test_builder_reutiliza_el_indice_de_cada_hoja(tmp_path):
+    builder = ExcelWorkbookBuilder(str(tmp_path / "analisis.xlsx"))
+    assert builder.sheet_index("Haberes") is builder.sheet_index("Haberes")
+
+
+def _datos(periodo, haberes):
+    return {"periodo": periodo, "haberes": haberes, "deducciones": {}}
+
+
+def _ejecutar(ruta, periodos):
+    """Una ejecución completa del motor sobre el mismo Excel (como al repetir la descarga)"""
+    engine = ANSESEngine()
+    for datos in periodos:
+        engine.actualizar_excel(datos, ruta)
+    engine.guardar_excel()
+
+
+def _tabla(ruta):
+    ws = load_workbook(ruta)["Haberes"]
+    encabezados = [c.value for c in ws[3]]
+    filas = {fila[0]: list(fila[1:]) for fila in ws.iter_rows(min_row=4, values_only=True) if fila[0]}
+    return encabezados, filas
+
+
+def test_reejecucion_reutiliza_columnas_y_filas(tmp_path):
+    ruta = str(tmp_path / "analisis_recibos.xlsx")
+    _ejecutar(ruta, [
+        _datos("01/2020", {"001-0: HABER": 100.0, "002-0: BONO": 10.0}),
+        _datos("02/2020", {"001-0: HABER": 110.0}),
+    ])
+
+    _ejecutar(ruta, [
+        _datos("02/2020", {"001-0: HABER": 120.0, "002-0: BONO": 12.0}),
+        _datos("01/2020", {"001-0: HABER": 100.0}),
+        _datos("03/2020", {"001-0: HABER": 130.0, "003-0: OTRO": 5.0}),
+    ])
+
+    encabezados, filas = _tabla(ruta)
+    assert encabezados == ["PERÍODO", "001-0: HABER", "002-0: BONO", "003-0: OTRO"]
+    assert list(filas) == ["01/2020", "02/2020", "03/2020"]
+    assert filas["01/2020"] == [100.0, 10.0, None]
+    assert filas["02/2020"] == [120.0, 12.0, None]
+    assert filas["03/2020"] == [130.0, None, 5.0]
@@ -0,0 +1,76 @@
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+
+from excel_builder import ExcelWorkbookBuilder
+from excel_styler import ExcelStyler
+
+
+def _estilo_dato(styler):
+    def aplicar(cell):
+        cell.font = styler.font(size=11, bold=True, color='FF059669')
+        cell.fill = styler.fill(styler.colors['alt_row'])
+        cell.alignment = styler.alignment('right')
+        cell.number_format = '$#,##0.00'
+    return aplicar
+
+
+def _chequear_estilo(cell):
+    assert cell.font.bold and cell.font.color.rgb == 'FF059669'
+    assert cell.fill.fgColor.rgb == 'FFF1F5F9'
+    assert cell.alignment.horizontal == 'right'
+    assert cell.number_format == '$#,##0.00'
+
+
+def test_apply_cached_registra_un_estilo_con_nombre_por_clave(tmp_path):
+    styler = ExcelStyler()
+    wb = Workbook()
+    ws = wb.active
+    llamadas = []
+
+    def aplicar(cell):
+        llamadas.append(cell.coordinate)
+        _estilo_dato(styler)(cell)
+
+    for fila in range(1, 6):
+        styler.apply_cached(ws.cell(row=fila, column=1, value=fila), ('dato', False), aplicar)
+
+    assert llamadas == ["A1"]
+    assert wb.named_styles.count("anses_dato_False") == 1
+
+    ruta = str(tmp_path / "estilos.xlsx")
+    wb.save(ruta)
+    for fila in load_workbook(ruta).active.iter_rows():
+        _chequear_estilo(fila[0])
+
+
+def test_apply_cached_en_hojas_write_only(tmp_path):
+    styler = ExcelStyler()
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Resumen")
+    for valor in range(3):
+        cell = WriteOnlyCell(ws, value=valor)
+        styler.apply_cached(cell, ('dato', False), _estilo_dato(styler))
+        ws.append([cell])
+
+    ruta = str(tmp_path / "estilos.xlsx")
+    wb.save(ruta)
+
+    for fila in load_workbook(ruta)["Resumen"].iter_rows():
+        _chequear_estilo(fila[0])
+
+
+def test_copia_de_hojas_conserva_los_estilos(tmp_path):
+    ruta = str(tmp_path / "analisis.xlsx")
+    builder = ExcelWorkbookBuilder(ruta)
+    ws = builder.get_sheet("Haberes")
+    for fila in range(1, 4):
+        celda = ws.cell(row=fila, column=1, value=fila)
+        _estilo_dato(builder.styler)(celda)
+    builder.add_streamed_sheet("Resumen", lambda hoja: hoja.append(["ok"]))
+
+    builder.save()
+
+    wb = load_workbook(ruta)
+    assert wb.sheetnames == ["Haberes", "Resumen"]
+    for fila in wb["Haberes"].iter_rows():
+        _chequear_estilo(fila[0])
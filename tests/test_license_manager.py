@@ -0,0 +1,143 @@
+import json
+import os
+import stat
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import license_manager
+from license_manager import TOLERANCIA_RELOJ, LicenseManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return LicenseManager(
+        ruta_token=str(tmp_path / "licencia.json"),
+        ruta_secreto=str(tmp_path / "licencia.clave"),
+        vigencia_token_horas=72,
+    )
+
+
+@pytest.fixture
+def hora_argentina(monkeypatch):
+    """Reloj local en UTC-3, como el de los usuarios"""
+    if not hasattr(time, "tzset"):
+        pytest.skip("time.tzset no existe en esta plataforma")
+    monkeypatch.setenv("TZ", "America/Argentina/Buenos_Aires")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def _escribir_firmado(manager, emitido, expira):
+    datos = {
+        'machine_id': manager.machine_id,
+        'emitido': emitido.isoformat(),
+        'expira': expira.isoformat(),
+    }
+    datos['firma'] = manager._firmar(datos)
+    with open(manager.ruta_token, "w", encoding="utf-8") as archivo:
+        json.dump(datos, archivo)
+
+
+def test_token_firmado_ida_y_vuelta(manager):
+    manager._guardar_token()
+
+    token = manager._leer_token()
+
+    assert token is not None
+    assert token['machine_id'] == manager.machine_id
+    if os.name == "posix":
+        assert stat.S_IMODE(os.stat(manager.ruta_secreto).st_mode) == 0o600
+
+
+def test_rechaza_expira_modificado(manager):
+    manager._guardar_token()
+    with open(manager.ruta_token, encoding="utf-8") as archivo:
+        datos = json.load(archivo)
+    datos['expira'] = (datetime.fromisoformat(datos['expira']) + timedelta(days=30)).isoformat()
+    with open(manager.ruta_token, "w", encoding="utf-8") as archivo:
+        json.dump(datos, archivo)
+
+    assert manager._leer_token() is None
+
+
+def test_rechaza_token_emitido_en_el_futuro(manager):
+    ahora = datetime.now()
+    _escribir_firmado(manager, ahora + TOLERANCIA_RELOJ / 2, ahora + timedelta(hours=1))
+    assert manager._leer_token() is not None
+
+    emitido = ahora + TOLERANCIA_RELOJ + timedelta(minutes=1)
+    _escribir_firmado(manager, emitido, emitido + timedelta(hours=1))
+    assert manager._leer_token() is None
+
+
+def test_rechaza_vigencia_mayor_a_la_otorgada(manager):
+    ahora = datetime.now()
+    _escribir_firmado(manager, ahora, ahora + manager.vigencia_token + timedelta(minutes=1))
+    assert manager._leer_token() is None
+
+
+def test_rechaza_token_vencido(manager):
+    ahora = datetime.now()
+    _escribir_firmado(manager, ahora - timedelta(hours=2), ahora - timedelta(hours=1))
+    assert manager._leer_token() is None
+
+
+def test_sin_la_clave_original_el_token_no_vale(manager):
+    manager._guardar_token()
+    os.remove(manager.ruta_secreto)
+
+    # Una instancia nueva crea otra clave y no reconoce el token anterior
+    otro = LicenseManager(ruta_token=manager.ruta_token, ruta_secreto=manager.ruta_secreto)
+    assert otro._leer_token() is None
+
+
+def test_clave_ilegible_no_usa_tokens(tmp_path):
+    # Un directorio en lugar del archivo: no se puede leer ni crear la clave
+    (tmp_path / "licencia.clave").mkdir()
+    manager = LicenseManager(
+        ruta_token=str(tmp_path / "licencia.json"), ruta_secreto=str(tmp_path / "licencia.clave")
+    )
+
+    manager._guardar_token()
+
+    assert not os.path.exists(manager.ruta_token)
+    assert manager._leer_token() is None
+
+
+def test_clave_demasiado_corta_no_usa_tokens(tmp_path):
+    (tmp_path / "licencia.clave").write_bytes(b"corta")
+    manager = LicenseManager(
+        ruta_token=str(tmp_path / "licencia.json"), ruta_secreto=str(tmp_path / "licencia.clave")
+    )
+
+    manager._guardar_token()
+
+    assert manager._leer_token() is None
+
+
+def test_vencimiento_utc_se_convierte_a_hora_local(manager, hora_argentina):
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+
+    manager._guardar_token(expires_at)
+
+    expira = datetime.fromisoformat(manager._leer_token()['expira'])
+    assert abs(expira - (datetime.now() + timedelta(hours=1))) < timedelta(minutes=1)
+
+
+def test_licencia_vencida_en_utc_se_rechaza(manager, hora_argentina, monkeypatch):
+    vencida = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+
+    class Respuesta:
+        status_code = 200
+
+        def json(self):
+            return {'active': True, 'expires_at': vencida}
+
+    monkeypatch.setattr(license_manager.requests, "get", lambda *a, **k: Respuesta())
+
+    assert manager.check_license_online() == (False, "Licencia expirada")
+    assert manager._leer_token() is None
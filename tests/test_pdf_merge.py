@@ -0,0 +1,63 @@
+import os
+
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import DictionaryObject, NameObject
+
+from pdf_merge import ChunkedPdfMerger
+
+
+def _recibo(ruta):
+    """PDF de una página que usa una fuente indirecta, igual en todos los recibos"""
+    writer = PdfWriter()
+    writer.add_blank_page(width=200, height=200)
+    fuente = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    writer.pages[0][NameObject("/Resources")] = DictionaryObject({
+        NameObject("/Font"): DictionaryObject({NameObject("/F1"): fuente}),
+    })
+    with open(ruta, "wb") as archivo:
+        writer.write(archivo)
+    return str(ruta)
+
+
+def test_une_por_bloques_y_cuenta_duplicados(tmp_path):
+    recibos = [_recibo(tmp_path / f"recibo{i}.pdf") for i in range(3)]
+    final = str(tmp_path / "todos_los_recibos.pdf")
+    merger = ChunkedPdfMerger(final, recibos_por_bloque=2)
+
+    for recibo in recibos:
+        merger.append(recibo)
+
+    # El primer bloque se escribe al completarse; el segundo sigue abierto
+    assert merger.bloques == [final + ".bloque001"]
+    assert merger.duplicados_bloques == 1
+
+    # Una fuente repetida en el primer bloque y otra al unir los dos bloques
+    assert merger.write() == 2
+    assert merger.duplicados_bloques == 0
+    assert len(PdfReader(final).pages) == 3
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        ["todos_los_recibos.pdf", "recibo0.pdf", "recibo1.pdf", "recibo2.pdf"]
+    )
+
+
+def test_close_descarta_el_bloque_a_medio_escribir(tmp_path):
+    final = str(tmp_path / "todos_los_recibos.pdf")
+    merger = ChunkedPdfMerger(final, recibos_por_bloque=2)
+    merger.append(_recibo(tmp_path / "recibo.pdf"))
+
+    merger.close()
+
+    assert not any(nombre.endswith(".part") for nombre in os.listdir(tmp_path))
+
+
+def test_borra_bloques_de_una_ejecucion_anterior(tmp_path):
+    final = str(tmp_path / "todos_los_recibos.pdf")
+    (tmp_path / "todos_los_recibos.pdf.bloque001").write_bytes(b"viejo")
+
+    ChunkedPdfMerger(final)
+
+    assert os.listdir(tmp_path) == []
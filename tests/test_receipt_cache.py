@@ -0,0 +1,81 @@
+import os
+import time
+from datetime import date
+
+import pytest
+
+from receipt_cache import ReceiptCache
+
+DATOS = {"periodo": "01/2020", "haberes": {"001-0: HABER": 100.0}, "deducciones": {"300-0: DTO": 5.0}}
+
+
+def _pdf(carpeta, nombre, contenido):
+    ruta = os.path.join(carpeta, nombre)
+    with open(ruta, "wb") as archivo:
+        archivo.write(contenido)
+    return ruta
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ReceiptCache(str(tmp_path / "cache"))
+
+
+def test_guarda_y_sirve_periodos(cache, tmp_path):
+    assert cache.put("123", 1, 2020, DATOS, _pdf(tmp_path, "a.pdf", b"recibo"))
+
+    datos, ruta_pdf = cache.get("123", 1, 2020)
+
+    assert datos == DATOS
+    with open(ruta_pdf, "rb") as archivo:
+        assert archivo.read() == b"recibo"
+    assert cache.get("123", 2, 2020) is None
+    assert (cache.aciertos, cache.fallos) == (1, 1)
+
+
+def test_no_guarda_meses_recientes(cache, tmp_path):
+    hoy = date.today()
+    assert cache.es_reciente(hoy.month, hoy.year)
+    assert not cache.put("123", hoy.month, hoy.year, DATOS, _pdf(tmp_path, "a.pdf", b"x"))
+    assert cache.get("123", hoy.month, hoy.year) is None
+
+
+def test_pdfs_iguales_comparten_blob(cache, tmp_path):
+    cache.put("123", 1, 2020, DATOS, _pdf(tmp_path, "a.pdf", b"igual"))
+    cache.put("456", 1, 2020, DATOS, _pdf(tmp_path, "b.pdf", b"igual"))
+
+    assert len(os.listdir(cache.dir_blobs)) == 1
+
+
+def test_desaloja_lo_menos_usado_por_tamanio(tmp_path):
+    cache = ReceiptCache(str(tmp_path / "cache"), max_bytes=10)
+    cache.put("123", 1, 2020, DATOS, _pdf(tmp_path, "a.pdf", b"123456"))
+    cache.put("123", 2, 2020, DATOS, _pdf(tmp_path, "b.pdf", b"abcdef"))
+
+    assert cache.get("123", 1, 2020) is None
+    assert cache.get("123", 2, 2020) is not None
+    assert len(os.listdir(cache.dir_blobs)) == 1
+
+
+def test_desaloja_por_antiguedad_al_abrir(tmp_path):
+    directorio = str(tmp_path / "cache")
+    cache = ReceiptCache(directorio, max_dias=30)
+    cache.put("123", 1, 2020, DATOS, _pdf(tmp_path, "a.pdf", b"x"))
+    cache.indice["123|202001"]["guardado"] = time.time() - 31 * 86400
+    cache._guardar_indice()
+
+    reabierta = ReceiptCache(directorio, max_dias=30)
+
+    assert reabierta.get("123", 1, 2020) is None
+    assert os.listdir(reabierta.dir_blobs) == []
+
+
+def test_close_persiste_marcas_de_uso(cache, tmp_path):
+    cache.put("123", 1, 2020, DATOS, _pdf(tmp_path, "a.pdf", b"x"))
+    usado = cache.indice["123|202001"]["usado"]
+    time.sleep(0.01)
+    cache.get("123", 1, 2020)
+
+    cache.close()
+
+    assert ReceiptCache(cache.directorio).indice["123|202001"]["usado"] > usado
@@ -0,0 +1,42 @@
+from receipt_table import filas_desde_html, procesar_filas_conceptos
+
+HTML = """
+<html><body>
+<table id="otra"><tr class="grilla_item"><td>no</td></tr></table>
+<table id="ctl00_PlaceContent_gvConceptos">
+  <tr class="grilla_header"><td>Concepto</td><td>Empresa</td><td>Descripción</td><td>Haberes</td><td>Deducciones</td></tr>
+  <tr class="grilla_item">
+    <td>001</td><td>0</td><td>HABER&nbsp;&nbsp;MENSUAL<br>  REGULAR </td><td>1000,50</td><td></td>
+  </tr>
+  <tr class="grilla_aternateitem">
+    <td>300</td><td>0</td><td>DTO</td><td></td><td>25,10</td>
+  </tr>
+</table>
+</body></html>
+"""
+
+
+def test_filas_desde_html_lee_solo_las_filas_de_datos_de_la_grilla():
+    assert filas_desde_html(HTML) == [
+        ["001", "0", "HABER MENSUAL\nREGULAR", "1000,50", ""],
+        ["300", "0", "DTO", "", "25,10"],
+    ]
+
+
+def test_filas_desde_html_sin_grilla():
+    assert filas_desde_html("<html><table id='otra'></table></html>") is None
+    assert filas_desde_html("<table id='ctl00_PlaceContent_gvConceptos'></table>") == []
+
+
+def test_procesar_filas_conceptos():
+    filas = [
+        ["001", "0", "HABER", "1000,50", ""],
+        ["300", "0", "DTO", "", " 25,10 "],
+        ["400", "0", "NOTA", "s/d", "-"],
+        ["incompleta"],
+    ]
+
+    haberes, deducciones = procesar_filas_conceptos(filas)
+
+    assert haberes == {"001-0: HABER": 1000.5}
+    assert deducciones == {"300-0: DTO": 25.1}
@@ -0,0 +1,56 @@
+import os
+
+from run_manifest import RunManifest
+
+DATOS = {"periodo": "03/2024", "haberes": {"001-0: HABER": 100.0}, "deducciones": {}}
+
+
+def _pdf(carpeta, nombre="recibo.pdf", contenido=b"%PDF recibo"):
+    ruta = os.path.join(carpeta, nombre)
+    with open(ruta, "wb") as archivo:
+        archivo.write(contenido)
+    return ruta
+
+
+def test_registra_y_retoma_periodos(tmp_path):
+    manifiesto = RunManifest(str(tmp_path))
+    destino = manifiesto.record_period("123", 3, 2024, DATOS, _pdf(tmp_path))
+
+    assert os.path.dirname(destino) == manifiesto.dir_recibos
+    assert not os.path.exists(tmp_path / "recibo.pdf")
+
+    completos = RunManifest(str(tmp_path)).load("123")
+    assert list(completos) == [(3, 2024)]
+    assert RunManifest.datos_periodo(completos[(3, 2024)]) == DATOS
+    assert RunManifest(str(tmp_path)).load("otro") == {}
+
+
+def test_descarta_periodos_con_pdf_modificado(tmp_path):
+    manifiesto = RunManifest(str(tmp_path))
+    destino = manifiesto.record_period("123", 3, 2024, DATOS, _pdf(tmp_path))
+    with open(destino, "ab") as archivo:
+        archivo.write(b"corrupto")
+
+    assert manifiesto.load("123") == {}
+
+
+def test_tolera_una_linea_cortada(tmp_path):
+    manifiesto = RunManifest(str(tmp_path))
+    manifiesto.record_period("123", 3, 2024, DATOS, _pdf(tmp_path))
+    with open(manifiesto.ruta, "a", encoding="utf-8") as archivo:
+        archivo.write('{"beneficio": "123", "mes"')
+
+    manifiesto.record_period("123", 4, 2024, None, _pdf(tmp_path))
+
+    completos = manifiesto.load("123")
+    assert sorted(completos) == [(3, 2024), (4, 2024)]
+    assert RunManifest.datos_periodo(completos[(4, 2024)]) is None
+
+
+def test_clear_borra_el_progreso(tmp_path):
+    manifiesto = RunManifest(str(tmp_path))
+    manifiesto.record_period("123", 3, 2024, DATOS, _pdf(tmp_path))
+
+    manifiesto.clear()
+
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,53 @@
+import csv
+import json
+
+from log_sink import LogHub
+from step_timings import StepTimings, percentil
+
+
+def test_percentil_por_rango_mas_cercano():
+    valores = list(range(1, 21))
+    assert percentil(valores, 50) == 10
+    assert percentil(valores, 95) == 19
+    assert percentil([7], 95) == 7
+
+
+def test_resumen_por_paso_en_orden_de_aparicion():
+    tiempos = StepTimings()
+    for duracion in (30.0, 10.0, 20.0):
+        tiempos.add("descarga", duracion)
+    tiempos.add("consulta", 5.0)
+
+    assert tiempos.summary() == [
+        {"paso": "descarga", "cantidad": 3, "total_ms": 60.0, "p50_ms": 20.0, "p95_ms": 30.0, "max_ms": 30.0},
+        {"paso": "consulta", "cantidad": 1, "total_ms": 5.0, "p50_ms": 5.0, "p95_ms": 5.0, "max_ms": 5.0},
+    ]
+
+
+def test_export_json_y_csv(tmp_path):
+    tiempos = StepTimings()
+    tiempos.add("consulta", 5.0)
+
+    ruta_json, ruta_csv = tiempos.export(str(tmp_path))
+
+    with open(ruta_json, encoding="utf-8") as archivo:
+        assert json.load(archivo) == tiempos.summary()
+    with open(ruta_csv, newline="", encoding="utf-8") as archivo:
+        filas = list(csv.DictReader(archivo))
+    assert filas == [{"paso": "consulta", "cantidad": "1", "total_ms": "5.0",
+                      "p50_ms": "5.0", "p95_ms": "5.0", "max_ms": "5.0"}]
+
+
+def test_loghub_registra_pasos_aunque_fallen():
+    hub = LogHub()
+    hub.tiempos = StepTimings()
+
+    with hub.paso("consulta"):
+        pass
+    try:
+        with hub.paso("consulta"):
+            raise ValueError
+    except ValueError:
+        pass
+
+    assert hub.tiempos.summary()[0]["cantidad"] == 2
@@ -0,0 +1,88 @@
+import threading
+import traceback
+from collections import deque
+
+
+class UIEventQueue:
+    """Cola de actualizaciones de la interfaz que el hilo de Tk procesa por lotes
+
+    Los hilos de trabajo solo encolan; el bucle principal drena la cola cada
+    ``intervalo_ms`` con ``root.after``. Hay tres tipos de evento:
+
+    - ``call``: se ejecuta siempre y en orden (mensajes de consola, avisos).
+    - ``latest``: solo importa el último valor por clave (barra de progreso).
+    - ``merge``: combina argumentos por nombre, conservando el último valor
+      no nulo de cada uno (estadísticas con campos parciales).
+
+    Las actualizaciones combinadas se aplican antes que los eventos en orden
+    del mismo lote, de modo que un aviso final nunca queda tapado por un valor
+    de progreso viejo.
+    """
+
+    def __init__(self, root, intervalo_ms=50, max_por_lote=500):
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self.max_por_lote = max_por_lote
+        self._eventos = deque()
+        self._ultimos = {}
+        self._lock = threading.Lock()
+        self._activa = False
+
+    def call(self, funcion, *args):
+        with self._lock:
+            self._eventos.append((funcion, args))
+
+    def latest(self, clave, funcion, *args):
+        with self._lock:
+            self._ultimos[clave] = (funcion, args, None)
+
+    def merge(self, clave, funcion, **campos):
+        with self._lock:
+            anterior = self._ultimos.get(clave)
+            combinados = dict(anterior[2]) if anterior and anterior[2] is not None else {}
+            combinados.update({nombre: valor for nombre, valor in campos.items() if valor is not None})
+            self._ultimos[clave] = (funcion, (), combinados)
+
+    def start(self):
+        if not self._activa:
+            self._activa = True
+            self.root.after(self.intervalo_ms, self._drenar)
+
+    def stop(self):
+        self._activa = False
+
+    def _drenar(self):
+        with self._lock:
+            ultimos = list(self._ultimos.values())
+            self._ultimos.clear()
+            cantidad = min(len(self._eventos), self.max_por_lote)
+            lote = [self._eventos.popleft() for _ in range(cantidad)]
+            pendientes = bool(self._eventos)
+
+        for funcion, args, campos in ultimos:
+            self._aplicar(funcion, args, campos or {})
+        for funcion, args in lote:
+            self._aplicar(funcion, args, {})
+
+        if self._activa:
+            # Con eventos atrasados se vuelve enseguida, cediendo igual el turno a Tk
+            self.root.after(1 if pendientes else self.intervalo_ms, self._drenar)
+
+    @staticmethod
+    def _aplicar(funcion, args, campos):
+        try:
+            funcion(*args, **campos)
+        except Exception:
+            # Un widget destruido no debe cortar el drenaje del resto
+            traceback.print_exc()
+
+
+class QueuedConsole:
+    """Consola para hilos de trabajo: encola cada mensaje hacia la consola real"""
+
+    def __init__(self, eventos, console):
+        self.eventos = eventos
+        self.console = console
+
+    def log(self, message, tipo="info"):
+        self.eventos.call(self.console.log, message, tipo)